@@ -0,0 +1,627 @@
+# -*- coding: utf-8 -*-
+"""
+bench module.
+
+it measures how many concurrent players a charma node sustains. a synthetic
+movie is generated with ffmpeg `testsrc` and registered in a temporary sqlite
+database, then it is played by simulated players through the streaming api.
+all files are created inside a temporary workspace which is removed at the end.
+
+usage example:
+
+`python bench.py`
+`python bench.py --players 8 --duration 120`
+`python bench.py --players 8 --shared true`
+`python bench.py --players 4 --size 1920x1080 --max_jobs 4`
+"""
+
+import os
+import re
+import math
+import time
+import shutil
+import tempfile
+
+from threading import Thread
+
+import ffmpeg
+import fire
+
+import pyrin.utils.path as path_utils
+import pyrin.configuration.services as config_services
+import pyrin.database.migration.services as migration_services
+
+from pyrin.core.structs import CoreObject
+from pyrin.database.services import get_current_store
+
+import charma.movies.services as movie_services
+import charma.movies.root.services as movie_root_services
+import charma.streaming.services as stream_services
+
+from charma import CharmaApplication
+from charma.movies.models import MovieEntity
+from charma.streaming.enumerations import TranscodingStatusEnum
+
+
+def set_config(file, section, key, value):
+    """
+    sets the value of given key in given settings file and keeps its comments.
+
+    :param str file: settings file path.
+    :param str section: section name. if set to None, the key
+                        will be set in all sections which have it.
+
+    :param str key: key name.
+    :param object value: value to be set.
+    """
+
+    pattern = re.compile(r'^(\s*{key}\s*[:=]\s*).*$'.format(key=re.escape(key)))
+    current_section = None
+    lines = []
+    with open(file, encoding='utf-8') as settings:
+        for line in settings.read().splitlines():
+            stripped = line.strip()
+            if stripped.startswith('[') and stripped.endswith(']'):
+                current_section = stripped[1:-1]
+            elif section is None or section == current_section:
+                line = pattern.sub(lambda match: '{prefix}{value}'.format(
+                    prefix=match.group(1), value=value), line)
+
+            lines.append(line)
+
+    with open(file, mode='w', encoding='utf-8') as settings:
+        settings.write('\n'.join(lines) + '\n')
+
+
+def create_settings(source, workspace, **options):
+    """
+    creates a copy of given settings directory which uses given workspace.
+
+    the database, stream directory and image directories of the copy are all
+    inside the workspace, so benchmarks do not touch the application data.
+
+    :param str source: settings directory path to be copied.
+    :param str workspace: workspace directory path.
+
+    :keyword int max_jobs: maximum number of concurrent transcoding jobs.
+                           if not provided, the configured value will be kept.
+
+    :returns: settings directory path of the copy.
+    :rtype: str
+    """
+
+    settings = os.path.join(workspace, 'settings')
+    shutil.copytree(source, settings)
+    database = os.path.join(workspace, 'charma.db')
+    set_config(os.path.join(settings, 'database.ini'), None, 'sqlalchemy_url',
+               'sqlite:///{database}'.format(database=database))
+
+    streaming = os.path.join(settings, 'streaming.ini')
+    set_config(streaming, 'general', 'directory', os.path.join(workspace, 'stream'))
+    set_config(streaming, 'serving', 'mode', 'direct')
+    set_config(streaming, 'warmup', 'enabled', 'false')
+    max_jobs = options.get('max_jobs')
+    if max_jobs is not None:
+        set_config(streaming, 'transcoding', 'max_jobs', max_jobs)
+
+    for name in ('movies', 'persons'):
+        set_config(os.path.join(settings, '{name}.ini'.format(name=name)), 'images',
+                   'root_directory', os.path.join(workspace, 'images', name))
+
+    return settings
+
+
+def get_percentiles(values, *percentiles):
+    """
+    gets the given percentiles of values using nearest rank method.
+
+    :param list[float] values: values to get their percentiles.
+    :param int percentiles: percentiles to be calculated.
+
+    :returns: dict(str p{percentile}: float value)
+    :rtype: dict
+    """
+
+    result = dict()
+    ordered = sorted(values)
+    for percentile in percentiles:
+        value = None
+        if len(ordered) > 0:
+            rank = max(int(math.ceil(percentile / 100 * len(ordered))), 1)
+            value = round(ordered[rank - 1], 3)
+
+        result['p{percentile}'.format(percentile=percentile)] = value
+
+    return result
+
+
+class SimulatedPlayer(CoreObject):
+    """
+    simulated player class.
+
+    it plays a stream through the application api like a real player. it
+    requests the manifest, then requests the segments in order and never
+    gets ahead of its playback position by more than the buffer size.
+    """
+
+    # how many seconds to wait before retrying a request which has failed.
+    POLL_INTERVAL = 0.2
+
+    # segment duration to be used if it is not available in the manifest.
+    DEFAULT_SEGMENT_DURATION = 5.0
+
+    def __init__(self, client, movie_id, **options):
+        """
+        initializes an instance of SimulatedPlayer.
+
+        :param flask.testing.FlaskClient client: application test client.
+        :param uuid.UUID movie_id: movie id to be played.
+
+        :keyword float buffer: maximum number of seconds to get ahead
+                               of playback position. defaults to 30.
+
+        :keyword float timeout: maximum number of seconds to wait for
+                                each request to succeed. defaults to 120.
+        """
+
+        super().__init__()
+
+        self._client = client
+        self._movie_id = movie_id
+        self._buffer = options.get('buffer') or 30
+        self._timeout = options.get('timeout') or 120
+
+        self.first_manifest = None
+        self.latencies = []
+        self.stalls = 0
+        self.error = None
+
+    def _get_url(self, file=None):
+        """
+        gets the api url of given stream file.
+
+        :param str file: file name. if not provided, the stream start url will be returned.
+
+        :rtype: str
+        """
+
+        if file is None:
+            return '/stream/{movie_id}'.format(movie_id=self._movie_id)
+
+        return '/stream/{movie_id}/{file}'.format(movie_id=self._movie_id, file=file)
+
+    def _fetch(self, file=None):
+        """
+        requests the given stream file until it succeeds.
+
+        :param str file: file name. if not provided, the stream will be started.
+
+        :raises TimeoutError: timeout error.
+
+        :returns: tuple[bytes content, float latency]
+        :rtype: tuple[bytes, float]
+        """
+
+        start = time.monotonic()
+        while True:
+            response = self._client.get(self._get_url(file))
+            try:
+                if response.status_code == 200:
+                    content = response.get_data()
+                    return content, time.monotonic() - start
+            finally:
+                response.close()
+
+            if time.monotonic() - start > self._timeout:
+                raise TimeoutError('Stream file [{file}] of movie [{movie_id}] is not '
+                                   'available after [{timeout}] seconds.'
+                                   .format(file=file or 'manifest', movie_id=self._movie_id,
+                                           timeout=self._timeout))
+
+            time.sleep(self.POLL_INTERVAL)
+
+    def _parse_hls(self, content):
+        """
+        gets the segments of given hls media playlist.
+
+        :param str content: playlist content.
+
+        :returns: tuple[list[tuple[str file, float duration]] segments, bool ended]
+        :rtype: tuple[list[tuple[str, float]], bool]
+        """
+
+        segments = []
+        duration = self.DEFAULT_SEGMENT_DURATION
+        for line in content.splitlines():
+            line = line.strip()
+            if line.startswith('#EXTINF:'):
+                duration = float(line[8:].split(',')[0])
+            elif len(line) > 0 and not line.startswith('#'):
+                segments.append((line, duration))
+
+        return segments, '#EXT-X-ENDLIST' in content
+
+    def _get_attributes(self, content):
+        """
+        gets the attributes of given xml tag content.
+
+        :param str content: tag content.
+
+        :rtype: dict
+        """
+
+        return dict(re.findall(r'([\w:]+)="([^"]*)"', content))
+
+    def _parse_dash(self, content):
+        """
+        gets the segments of the first representation of given dash manifest.
+
+        the first item is the initialization segment.
+
+        :param str content: manifest content.
+
+        :returns: tuple[list[tuple[str file, float duration]] segments, bool ended]
+        :rtype: tuple[list[tuple[str, float]], bool]
+        """
+
+        representation = self._get_attributes(
+            re.search(r'<Representation\b([^>]*)>', content).group(1))
+        template = self._get_attributes(
+            re.search(r'<SegmentTemplate\b([^>]*)>', content).group(1))
+
+        identifier = representation.get('id', '')
+        timescale = int(template.get('timescale', 1))
+        durations = []
+        for item in re.findall(r'<S\b([^>]*)/>', content):
+            attributes = self._get_attributes(item)
+            repeat = int(attributes.get('r', 0))
+            durations.extend([int(attributes['d']) / timescale] * (max(repeat, 0) + 1))
+
+        if len(durations) == 0 and 'duration' in template:
+            durations.append(int(template['duration']) / timescale)
+
+        def get_file(name, number=None):
+            name = name.replace('$RepresentationID$', identifier)
+            if number is not None:
+                name = re.sub(r'\$Number(%0(\d+)d)?\$',
+                              lambda match: str(number).zfill(int(match.group(2) or 0)),
+                              name)
+
+            return name
+
+        start = int(template.get('startNumber', 1))
+        segments = [(get_file(template['initialization']), 0)]
+        for index, duration in enumerate(durations):
+            segments.append((get_file(template['media'], start + index), duration))
+
+        return segments, 'type="static"' in content
+
+    def _parse(self, content):
+        """
+        gets the segments of given manifest and the manifest to be refreshed.
+
+        if the manifest is an hls master playlist, its first
+        rendition playlist will be requested and parsed.
+
+        :param bytes content: manifest content.
+
+        :returns: tuple[list[tuple[str file, float duration]] segments,
+                        bool ended,
+                        str manifest: file name of the manifest to be refreshed.
+                                      it is None if the stream must be started again.]
+        :rtype: tuple[list[tuple[str, float]], bool, str]
+        """
+
+        content = content.decode('utf-8')
+        if '<MPD' in content:
+            segments, ended = self._parse_dash(content)
+            return segments, ended, None
+
+        manifest = None
+        if '#EXT-X-STREAM-INF:' in content:
+            manifest = self._parse_hls(content)[0][0][0]
+            content = self._fetch(manifest)[0].decode('utf-8')
+
+        segments, ended = self._parse_hls(content)
+        return segments, ended, manifest
+
+    def _play(self):
+        """
+        plays the stream until its last segment.
+        """
+
+        content, self.first_manifest = self._fetch()
+        segments, ended, manifest = self._parse(content)
+        index = 0
+        position = 0.0
+        started = time.monotonic()
+        while True:
+            if index >= len(segments):
+                if ended is True:
+                    return
+
+                # dash manifests are refreshed by starting the stream
+                # again, which returns the current manifest.
+                time.sleep(self.POLL_INTERVAL)
+                segments, ended, manifest = self._parse(self._fetch(manifest)[0])
+                continue
+
+            file, duration = segments[index]
+            ahead = position - (time.monotonic() - started)
+            if ahead > self._buffer:
+                time.sleep(ahead - self._buffer)
+
+            latency = self._fetch(file)[1]
+            self.latencies.append(latency)
+
+            # playback stalls if the segment arrives after its playback time.
+            late = time.monotonic() - started - position
+            if late > 0 and duration > 0:
+                self.stalls += 1
+                started += late
+
+            position += duration
+            index += 1
+
+    def run(self):
+        """
+        plays the stream and keeps the error if playback fails.
+        """
+
+        try:
+            self._play()
+        except Exception as error:
+            self.error = str(error)
+
+
+class StreamingBenchmark(CoreObject):
+    """
+    streaming benchmark class.
+
+    it generates a synthetic movie with ffmpeg `testsrc`, registers it in the
+    database and plays it with multiple simulated players at the same time.
+    it reports time to first manifest, segment latency percentiles, transcoding
+    cpu time per stream and disk usage of streams.
+    """
+
+    # title of registered movies.
+    TITLE = 'Benchmark'
+
+    # how many seconds to wait between each check for running transcodings.
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, app, workspace, **options):
+        """
+        initializes an instance of StreamingBenchmark.
+
+        :param Application app: application instance.
+        :param str workspace: workspace directory path.
+
+        :keyword int players: number of simulated players. defaults to 4.
+        :keyword bool shared: specifies that all players must play the same
+                              movie. otherwise each player plays its own
+                              movie and has its own transcoding.
+                              defaults to False.
+
+        :keyword int duration: duration of synthetic movie in seconds. defaults to 60.
+        :keyword str size: frame size of synthetic movie. defaults to `1280x720`.
+        :keyword bool remux: generate synthetic movie with codecs which could be
+                             streamed without re-encoding. defaults to False.
+
+        :keyword float buffer: maximum number of seconds that each player gets
+                               ahead of its playback position. defaults to 30.
+
+        :keyword float timeout: maximum number of seconds to wait for each
+                                request to succeed. defaults to 120.
+        """
+
+        super().__init__()
+
+        self._app = app
+        self._workspace = workspace
+        self._players = options.get('players') or 4
+        self._shared = options.get('shared', False)
+        self._duration = options.get('duration') or 60
+        self._size = options.get('size') or '1280x720'
+        self._remux = options.get('remux', False)
+        self._buffer = options.get('buffer')
+        self._timeout = options.get('timeout')
+        self._stream_directory = config_services.get('streaming', 'general', 'directory')
+
+    def _create_video(self, file):
+        """
+        creates a synthetic movie file.
+
+        :param str file: movie file path.
+        """
+
+        video = ffmpeg.input('testsrc=duration={duration}:size={size}:rate=25'
+                             .format(duration=self._duration, size=self._size),
+                             format='lavfi')
+        audio = ffmpeg.input('sine=frequency=1000:duration={duration}'
+                             .format(duration=self._duration), format='lavfi')
+
+        # mpeg4 video could not be remuxed into streams, so it is always transcoded.
+        codec = 'libx264' if self._remux is True else 'mpeg4'
+        ffmpeg.output(video, audio, file, vcodec=codec, acodec='aac',
+                      pix_fmt='yuv420p').run(overwrite_output=True, quiet=True)
+
+    def _register_movies(self, count):
+        """
+        registers the given number of movies in the database.
+
+        all movies share the same synthetic file, each one from its own directory.
+
+        :param int count: number of movies.
+
+        :returns: list[uuid.UUID]
+        :rtype: list[uuid.UUID]
+        """
+
+        root = os.path.join(self._workspace, 'movies')
+        path_utils.create_directory(root)
+        source = os.path.join(self._workspace, 'benchmark.mp4')
+        self._create_video(source)
+        movie_root_services.create(root)
+
+        result = []
+        for index in range(count):
+            directory_name = '{title} {index}'.format(title=self.TITLE, index=index)
+            directory = os.path.join(root, directory_name)
+            path_utils.create_directory(directory)
+            file = os.path.join(directory, 'benchmark.mp4')
+            try:
+                os.link(source, file)
+            except OSError:
+                shutil.copyfile(source, file)
+
+            result.append(movie_services.create(directory_name, directory_name,
+                                                forced=True,
+                                                resolution=MovieEntity.ResolutionEnum.HD))
+
+        get_current_store().commit()
+        return result
+
+    def _wait_for_transcodings(self, movie_ids):
+        """
+        blocks until the transcodings of given movies are ended.
+
+        :param list[uuid.UUID] movie_ids: movie ids.
+        """
+
+        deadline = time.monotonic() + (self._timeout or 120) + self._duration
+        while time.monotonic() < deadline:
+            statuses = [stream_services.get_stream_status(item) for item in movie_ids]
+            if all(item['status'] not in (TranscodingStatusEnum.QUEUED,
+                                          TranscodingStatusEnum.STARTED)
+                   and item['running_jobs'] == 0 for item in statuses):
+                return
+
+            time.sleep(self.POLL_INTERVAL)
+
+    def _get_disk_usage(self, movie_ids):
+        """
+        gets the total size of streams of given movies in bytes.
+
+        :param list[uuid.UUID] movie_ids: movie ids.
+
+        :returns: dict(uuid.UUID movie_id: int size)
+        :rtype: dict
+        """
+
+        result = dict()
+        for movie_id in movie_ids:
+            size = 0
+            directory = os.path.join(self._stream_directory, str(movie_id))
+            for root, directories, files in os.walk(directory):
+                for file in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, file))
+                    except OSError:
+                        pass
+
+            result[movie_id] = size
+
+        return result
+
+    def run(self):
+        """
+        runs the benchmark and gets its report.
+
+        :returns: dict(int players: number of players,
+                       int streams: number of transcoded streams,
+                       int duration: duration of synthetic movie in seconds,
+                       dict first_manifest: percentiles of time to first manifest,
+                       dict segment_latency: percentiles of segment latency,
+                       int stalls: number of playback stalls of all players,
+                       list[str] errors: errors of failed players,
+                       dict cpu: cpu seconds of transcodings and of application,
+                       dict disk: disk usage of streams in megabytes)
+        :rtype: dict
+        """
+
+        migration_services.create_all()
+        movie_ids = self._register_movies(1 if self._shared is True else self._players)
+        players = [SimulatedPlayer(self._app.test_client(),
+                                   movie_ids[index % len(movie_ids)],
+                                   buffer=self._buffer, timeout=self._timeout)
+                   for index in range(self._players)]
+
+        before = os.times()
+        threads = [Thread(target=item.run, daemon=True) for item in players]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self._wait_for_transcodings(movie_ids)
+        after = os.times()
+
+        # transcodings run in child processes which are joined when they
+        # end, so their cpu time is accounted in the children cpu times.
+        transcoding = (after.children_user - before.children_user) + \
+            (after.children_system - before.children_system)
+        application = (after.user - before.user) + (after.system - before.system)
+        sizes = self._get_disk_usage(movie_ids)
+        total_size = sum(sizes.values()) / 1024 / 1024
+        latencies = [value for item in players for value in item.latencies]
+        first_manifests = [item.first_manifest for item in players
+                           if item.first_manifest is not None]
+
+        segment_latency = get_percentiles(latencies, 50, 90, 99, 100)
+        segment_latency.update(count=len(latencies))
+        return dict(players=self._players,
+                    streams=len(movie_ids),
+                    duration=self._duration,
+                    first_manifest=get_percentiles(first_manifests, 50, 90, 100),
+                    segment_latency=segment_latency,
+                    stalls=sum(item.stalls for item in players),
+                    errors=[item.error for item in players if item.error is not None],
+                    cpu=dict(transcoding=round(transcoding, 2),
+                             per_stream=round(transcoding / len(movie_ids), 2),
+                             per_media_second=round(transcoding / len(movie_ids) /
+                                                    self._duration, 3),
+                             application=round(application, 2)),
+                    disk=dict(total=round(total_size, 2),
+                              per_stream=round(total_size / len(movie_ids), 2)))
+
+
+def run(players=4, duration=60, size='1280x720', shared=False, remux=False,
+        buffer=30, timeout=120, max_jobs=None):
+    """
+    runs the streaming benchmark and gets its report.
+
+    :param int players: number of simulated players.
+    :param int duration: duration of synthetic movie in seconds.
+    :param str size: frame size of synthetic movie.
+    :param bool shared: specifies that all players must play the same movie.
+    :param bool remux: generate synthetic movie with codecs which
+                       could be streamed without re-encoding.
+
+    :param float buffer: maximum number of seconds that each player
+                         gets ahead of its playback position.
+
+    :param float timeout: maximum number of seconds to wait for each request.
+    :param int max_jobs: maximum number of concurrent transcoding jobs.
+                         if not provided, the configured value will be used.
+
+    :rtype: dict
+    """
+
+    workspace = tempfile.mkdtemp(prefix='charma-bench-')
+    try:
+        source = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'charma', 'settings')
+        settings = create_settings(source, workspace, max_jobs=max_jobs)
+        app = CharmaApplication(scripting_mode=True, settings_directory=settings)
+        benchmark = StreamingBenchmark(app, workspace, players=players, duration=duration,
+                                       size=size, shared=shared, remux=remux,
+                                       buffer=buffer, timeout=timeout)
+        return benchmark.run()
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    fire.Fire(run)
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+bench scraper module.
+
+it measures the parser backends of scraper against saved imdb pages.
+each page is parsed with every backend and extracted with the registered
+updaters, then the results of each backend are compared with `bs4` backend.
+
+to save the imdb page and credits page of some movies as fixtures, execute:
+`python bench_scraper.py save ./fixtures https://www.imdb.com/title/tt0111161/`
+
+usage example:
+
+`python bench_scraper.py run ./fixtures`
+`python bench_scraper.py run ./fixtures --rounds 10`
+"""
+
+import os
+import time
+
+import fire
+
+import pyrin.utils.path as path_utils
+
+from pyrin.core.structs import CoreObject
+
+import charma.scraper.services as scraper_services
+import charma.updater.services as updater_services
+
+from charma import CharmaApplication
+from charma.scraper.enumerations import ParserBackendEnum
+from charma.updater.enumerations import UpdaterCategoryEnum
+
+
+app_instance = CharmaApplication(scripting_mode=True)
+
+
+# suffix of the saved credits page of each movie page fixture.
+CREDITS_SUFFIX = '.credits'
+
+
+def save(directory, *urls):
+    """
+    fetches the imdb page and credits page of given movie urls into given directory.
+
+    each page is saved with the movie id as its name, for example
+    `tt0111161.html` and `tt0111161.credits.html`.
+
+    :param str directory: fixtures directory path.
+    :param str urls: imdb page urls of movies.
+
+    :returns: list of saved file paths.
+    :rtype: list[str]
+    """
+
+    path_utils.create_directory(directory, ignore_existed=True)
+    files = []
+    for url in urls:
+        url = url.rstrip('/')
+        name = url.split('/')[-1]
+        pages = [(url, name), ('{url}/fullcredits'.format(url=url),
+                               '{name}{suffix}'.format(name=name, suffix=CREDITS_SUFFIX))]
+
+        for page_url, page_name in pages:
+            response = scraper_services.get(page_url)
+            file = os.path.join(directory, '{name}.html'.format(name=page_name))
+            with open(file, mode='w', encoding='utf-8') as output:
+                output.write(response.text)
+
+            files.append(file)
+
+    return files
+
+
+class ParserBenchmark(CoreObject):
+    """
+    parser benchmark class.
+
+    it parses saved imdb pages with each parser backend and extracts
+    them with the registered updaters, the same way that the updater does.
+    the results of all backends are compared with `bs4` backend, so any
+    incompatibility of a backend is reported.
+
+    directors are not extracted, because their updater
+    fetches the imdb page of each director.
+    """
+
+    def __init__(self, fixtures, **options):
+        """
+        initializes an instance of ParserBenchmark.
+
+        :param str fixtures: directory path of saved html pages.
+                             credits page of each movie page must be
+                             saved with `.credits.html` suffix.
+
+        :keyword int rounds: number of times that each page is processed.
+                             the best time of all rounds is reported.
+                             defaults to 5 if not provided.
+
+        :keyword list[str] backends: parser backends to be measured.
+                                     defaults to all backends if not provided.
+        """
+
+        super().__init__()
+
+        self._fixtures = fixtures
+        self._rounds = options.get('rounds') or 5
+        self._backends = options.get('backends') or ParserBackendEnum.values()
+        self._categories = [item for item in UpdaterCategoryEnum.values()
+                            if item != UpdaterCategoryEnum.DIRECTORS]
+
+    def _get_pages(self):
+        """
+        gets the content of saved movie pages and their credits pages.
+
+        :returns: list[tuple[str name, str page, str credits]]
+        :rtype: list[tuple[str, str, str]]
+        """
+
+        pages = []
+        for file in sorted(os.listdir(self._fixtures)):
+            name, extension = os.path.splitext(file)
+            if extension != '.html' or name.endswith(CREDITS_SUFFIX):
+                continue
+
+            page = self._read(file)
+            credits = None
+            credits_file = '{name}{suffix}.html'.format(name=name, suffix=CREDITS_SUFFIX)
+            if os.path.isfile(os.path.join(self._fixtures, credits_file)):
+                credits = self._read(credits_file)
+
+            pages.append((name, page, credits))
+
+        return pages
+
+    def _read(self, file):
+        """
+        reads the content of given fixture file.
+
+        :param str file: file name.
+
+        :rtype: str
+        """
+
+        with open(os.path.join(self._fixtures, file), encoding='utf-8') as content:
+            return content.read()
+
+    def _extract(self, content, credits):
+        """
+        extracts the data of given contents with updaters of all categories.
+
+        :param bs4.BeautifulSoup | LXMLTag content: the html content of imdb page.
+        :param bs4.BeautifulSoup | LXMLTag credits: the html content of credits page.
+
+        :returns: dict[str category, object value]
+        :rtype: dict
+        """
+
+        result = dict()
+        for category in self._categories:
+            options = dict()
+            if category in UpdaterCategoryEnum.persons:
+                if credits is None:
+                    continue
+
+                options.update(credits=credits)
+
+            result[category] = updater_services.get_updater(category).fetch(content, **options)
+
+        return result
+
+    def _measure(self, backend, page, credits):
+        """
+        measures the best parse and extract times of given page with given backend.
+
+        :param str backend: parser backend.
+        :param str page: imdb page.
+        :param str credits: credits page.
+
+        :returns: tuple[float parse, float extract, dict result]
+        :rtype: tuple[float, float, dict]
+        """
+
+        best_parse = None
+        best_extract = None
+        result = None
+        for index in range(self._rounds):
+            start = time.perf_counter()
+            content = scraper_services.parse(page, backend=backend)
+            credits_content = None
+            if credits is not None:
+                credits_content = scraper_services.parse(credits, backend=backend)
+
+            parsed = time.perf_counter()
+            result = self._extract(content, credits_content)
+            extracted = time.perf_counter()
+            parse_time = parsed - start
+            extract_time = extracted - parsed
+            if best_parse is None or parse_time < best_parse:
+                best_parse = parse_time
+
+            if best_extract is None or extract_time < best_extract:
+                best_extract = extract_time
+
+        return best_parse, best_extract, result
+
+    def run(self):
+        """
+        runs the benchmark and gets its report.
+
+        :returns: dict(int pages: number of measured pages,
+                       dict backends: dict(str backend: dict(float parse: total parse seconds,
+                                                              float extract: total extract
+                                                                             seconds,
+                                                              float total: total seconds,
+                                                              float speedup: speedup of total
+                                                                             time relative to
+                                                                             bs4 backend)),
+                       list[dict] mismatches: list[dict(str page: page name,
+                                                        str backend: parser backend,
+                                                        str category: updater category,
+                                                        object expected: bs4 result,
+                                                        object actual: backend result)])
+        :rtype: dict
+        """
+
+        pages = self._get_pages()
+        backends = dict()
+        mismatches = []
+        for backend in self._backends:
+            backends[backend] = dict(parse=0, extract=0, total=0)
+
+        for name, page, credits in pages:
+            results = dict()
+            for backend in self._backends:
+                parse_time, extract_time, result = self._measure(backend, page, credits)
+                backends[backend]['parse'] += parse_time
+                backends[backend]['extract'] += extract_time
+                backends[backend]['total'] += parse_time + extract_time
+                results[backend] = result
+
+            expected = results.get(ParserBackendEnum.BEAUTIFUL_SOUP)
+            if expected is None:
+                continue
+
+            for backend, result in results.items():
+                for category, value in result.items():
+                    if value != expected.get(category):
+                        mismatches.append(dict(page=name, backend=backend,
+                                               category=category,
+                                               expected=expected.get(category),
+                                               actual=value))
+
+        base = backends.get(ParserBackendEnum.BEAUTIFUL_SOUP)
+        for backend, stats in backends.items():
+            stats.update(speedup=None)
+            if base is not None and stats['total'] > 0:
+                stats.update(speedup=round(base['total'] / stats['total'], 2))
+
+            for key in ('parse', 'extract', 'total'):
+                stats[key] = round(stats[key], 6)
+
+        return dict(pages=len(pages), backends=backends, mismatches=mismatches)
+
+
+def run(fixtures, rounds=5):
+    """
+    runs the parser benchmark and gets its report.
+
+    :param str fixtures: directory path of saved html pages.
+    :param int rounds: number of times that each page is processed.
+
+    :rtype: dict
+    """
+
+    return ParserBenchmark(fixtures, rounds=rounds).run()
+
+
+if __name__ == '__main__':
+    fire.Fire(dict(save=save, run=run))
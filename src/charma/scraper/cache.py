@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+scraper cache module.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+
+from threading import Lock
+
+import pyrin.utils.path as path_utils
+import pyrin.logging.services as logging_services
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from pyrin.core.structs import CoreObject
+from pyrin.processor.request.enumerations import RequestHeaderEnum
+from pyrin.processor.response.enumerations import ResponseHeaderEnum
+
+
+class HTTPCache(CoreObject):
+    """
+    http cache class.
+
+    it keeps successful responses on disk keyed by their url. each entry is a
+    single gzip file containing a json header line and the response body.
+    entries younger than ttl are served without sending any request, and older
+    entries which have an `ETag` or `Last-Modified` header are revalidated with
+    a conditional request. the age of an entry is the modified time of its file,
+    which is renewed on each revalidation. when total size of entries exceeds
+    max size, the least recently stored or revalidated entries are removed.
+
+    all files are written into a temporary file first and then renamed,
+    so a partially written entry is never read.
+    """
+
+    LOGGER = logging_services.get_logger('scraper')
+    EXTENSION = '.gz'
+
+    # response headers which are kept in each entry.
+    HEADERS = (ResponseHeaderEnum.CONTENT_TYPE,
+               ResponseHeaderEnum.ETAG,
+               ResponseHeaderEnum.LAST_MODIFIED)
+
+    def __init__(self, directory, **options):
+        """
+        initializes an instance of HTTPCache.
+
+        :param str directory: directory path to store entries into it.
+
+        :keyword int ttl: number of seconds that an entry is served without
+                          revalidation. defaults to 86400 if not provided.
+
+        :keyword int max_size: maximum total size of entries in megabytes.
+                               if not provided, there will be no limit.
+
+        :keyword list[str] content_types: content types of responses to be cached.
+                                          if not provided, all responses will be cached.
+        """
+
+        super().__init__()
+
+        self._directory = os.path.abspath(directory)
+        self._ttl = options.get('ttl') or 86400
+        self._max_size = options.get('max_size')
+        self._content_types = options.get('content_types')
+        self._lock = Lock()
+        path_utils.create_directory(self._directory, ignore_existed=True)
+        self._size = sum(os.path.getsize(item) for item in self._get_files())
+
+    def _get_files(self):
+        """
+        gets the file paths of all entries.
+
+        :rtype: list[str]
+        """
+
+        files = []
+        with os.scandir(self._directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(self.EXTENSION):
+                    files.append(entry.path)
+
+        return files
+
+    def _get_file(self, url):
+        """
+        gets the file path of the entry of given url.
+
+        :param str url: url of entry.
+
+        :rtype: str
+        """
+
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, '{name}{extension}'
+                            .format(name=name, extension=self.EXTENSION))
+
+    def _is_cacheable(self, response):
+        """
+        gets a value indicating that given response could be cached.
+
+        :param requests.Response response: response object.
+
+        :rtype: bool
+        """
+
+        if response.status_code != 200:
+            return False
+
+        if not self._content_types:
+            return True
+
+        content_type = response.headers.get(ResponseHeaderEnum.CONTENT_TYPE) or ''
+        content_type = content_type.split(';')[0].strip().lower()
+        return content_type in self._content_types
+
+    def _evict(self):
+        """
+        removes the least recently stored or revalidated entries until
+        total size of entries gets lower than max size.
+
+        it must be called while the lock is acquired.
+        """
+
+        if self._max_size is None or self._size <= self._max_size * 1024 * 1024:
+            return
+
+        files = []
+        for item in self._get_files():
+            try:
+                stat = os.stat(item)
+                files.append((stat.st_mtime, stat.st_size, item))
+            except OSError:
+                continue
+
+        self._size = sum(item[1] for item in files)
+        for modified_time, size, item in sorted(files):
+            if self._size <= self._max_size * 1024 * 1024:
+                break
+
+            try:
+                os.remove(item)
+                self._size -= size
+            except OSError:
+                continue
+
+    def get(self, url):
+        """
+        gets the cached entry of given url.
+
+        it returns None if there is no valid entry for given url.
+
+        :param str url: url of entry.
+
+        :returns: dict(str url: requested url,
+                       int status: response status code,
+                       dict headers: kept response headers,
+                       str encoding: response encoding,
+                       bytes content: response body,
+                       bool fresh: specifies that the entry could be used
+                                   without revalidation)
+        :rtype: dict
+        """
+
+        file = self._get_file(url)
+        try:
+            modified_time = os.path.getmtime(file)
+            with gzip.open(file, mode='rb') as entry:
+                header, content = entry.read().split(b'\n', 1)
+
+            result = json.loads(header.decode('utf-8'))
+        except (OSError, EOFError, ValueError):
+            return None
+
+        if result.get('url') != url:
+            return None
+
+        result.update(content=content, fresh=time.time() - modified_time < self._ttl)
+        return result
+
+    def get_validators(self, entry):
+        """
+        gets the request headers to revalidate given entry.
+
+        :param dict entry: cached entry.
+
+        :rtype: dict
+        """
+
+        headers = dict()
+        etag = entry['headers'].get(ResponseHeaderEnum.ETAG)
+        last_modified = entry['headers'].get(ResponseHeaderEnum.LAST_MODIFIED)
+        if etag is not None:
+            headers[RequestHeaderEnum.IF_NONE_MATCH] = etag
+
+        if last_modified is not None:
+            headers[RequestHeaderEnum.IF_MODIFIED_SINCE] = last_modified
+
+        return headers
+
+    def get_response(self, entry):
+        """
+        gets a `Response` object from given entry.
+
+        :param dict entry: cached entry.
+
+        :rtype: requests.Response
+        """
+
+        response = Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response._content = entry['content']
+        return response
+
+    def set(self, url, response):
+        """
+        stores given response as the entry of given url.
+
+        it does nothing if the response could not be cached.
+
+        :param str url: url of entry.
+        :param requests.Response response: response object.
+        """
+
+        if not self._is_cacheable(response):
+            return
+
+        headers = {name: response.headers.get(name) for name in self.HEADERS
+                   if response.headers.get(name) is not None}
+
+        header = dict(url=url, status=response.status_code,
+                      headers=headers, encoding=response.encoding)
+
+        file = self._get_file(url)
+        temp_file = '{file}.{id}.tmp'.format(file=file, id=id(response))
+        try:
+            with gzip.open(temp_file, mode='wb') as entry:
+                entry.write(json.dumps(header).encode('utf-8'))
+                entry.write(b'\n')
+                entry.write(response.content)
+
+            size = os.path.getsize(temp_file)
+            with self._lock:
+                previous_size = os.path.getsize(file) if os.path.isfile(file) else 0
+                os.replace(temp_file, file)
+                self._size += size - previous_size
+                self._evict()
+        except OSError as error:
+            self.LOGGER.error('Failed to cache response of [{url}]: {error}'
+                              .format(url=url, error=str(error)))
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def refresh(self, url):
+        """
+        renews the age of the entry of given url after it has been revalidated.
+
+        :param str url: url of entry.
+        """
+
+        try:
+            os.utime(self._get_file(url))
+        except OSError:
+            pass
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+scraper enumerations module.
+"""
+
+from pyrin.core.enumerations import CoreEnum
+
+
+class ParserBackendEnum(CoreEnum):
+    """
+    parser backend enum.
+    """
+
+    # builds a `BeautifulSoup` tree using configured `parser`.
+    BEAUTIFUL_SOUP = 'bs4'
+
+    # builds an lxml tree which is wrapped by `LXMLTag` objects.
+    LXML = 'lxml'
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+scraper limiting module.
+"""
+
+import time
+
+from threading import Lock
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import pyrin.logging.services as logging_services
+
+from pyrin.core.structs import CoreObject
+from pyrin.processor.response.enumerations import ResponseHeaderEnum
+
+
+class HostRateLimiter(CoreObject):
+    """
+    host rate limiter class.
+
+    it keeps a token bucket for each host. each request takes a token from the
+    bucket of its host and waits if the bucket is empty. the rate of each bucket
+    is adjusted with additive increase on successful responses and multiplicative
+    decrease on throttled responses, so requests to each host are sent at the
+    highest rate that the host accepts. the `Retry-After` header of throttled
+    responses blocks all requests to that host until the given time.
+    """
+
+    LOGGER = logging_services.get_logger('scraper')
+
+    # status codes which show that the host is throttling the requests.
+    THROTTLED_STATUSES = (429, 503)
+
+    def __init__(self, **options):
+        """
+        initializes an instance of HostRateLimiter.
+
+        :keyword float rate: initial number of requests per second for each host.
+                             defaults to 2 if not provided.
+
+        :keyword float min_rate: minimum number of requests per second for each host.
+                                 defaults to 0.1 if not provided.
+
+        :keyword float max_rate: maximum number of requests per second for each host.
+                                 defaults to 10 if not provided.
+
+        :keyword int burst: maximum number of requests which could be sent at
+                            once to a host after it has been idle.
+                            defaults to 4 if not provided.
+
+        :keyword float increase: requests per second to be added to the
+                                 rate of a host on each successful response.
+                                 defaults to 0.1 if not provided.
+
+        :keyword float decrease: factor to multiply the rate of a host by on
+                                 each throttled response. defaults to 0.5 if
+                                 not provided.
+
+        :keyword float max_retry_after: maximum number of seconds to block a host
+                                        for, regardless of its `Retry-After` header.
+                                        defaults to 60 if not provided.
+        """
+
+        super().__init__()
+
+        self._rate = options.get('rate') or 2
+        self._min_rate = options.get('min_rate') or 0.1
+        self._max_rate = options.get('max_rate') or 10
+        self._burst = options.get('burst') or 4
+        self._increase = options.get('increase') or 0.1
+        self._decrease = options.get('decrease') or 0.5
+        self._max_retry_after = options.get('max_retry_after') or 60
+        self._lock = Lock()
+
+        # a dict containing the bucket of each host. `updated` is the time that
+        # tokens are refilled to and it is in the future while the host is blocked.
+        # in the form of: {str host: dict(float rate, float tokens, float updated)}
+        self._buckets = dict()
+
+    def _get_host(self, url):
+        """
+        gets the host of given url.
+
+        :param str url: url to get its host.
+
+        :rtype: str
+        """
+
+        return urlparse(url).netloc.lower()
+
+    def _get_bucket(self, host, now):
+        """
+        gets the bucket of given host and refills its tokens.
+
+        it must be called while the lock is acquired.
+
+        :param str host: host name.
+        :param float now: current monotonic time.
+
+        :rtype: dict
+        """
+
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = dict(rate=self._rate, tokens=self._burst, updated=now)
+            self._buckets[host] = bucket
+
+        if now > bucket['updated']:
+            elapsed = now - bucket['updated']
+            bucket['tokens'] = min(self._burst, bucket['tokens'] + elapsed * bucket['rate'])
+            bucket['updated'] = now
+
+        return bucket
+
+    def _get_retry_after(self, value):
+        """
+        gets the number of seconds from given `Retry-After` header value.
+
+        it returns None if value is not valid.
+
+        :param str value: header value. it could be
+                          a number of seconds or an http date.
+
+        :rtype: float
+        """
+
+        if not value:
+            return None
+
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        if date is None:
+            return None
+
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+
+        return max((date - datetime.now(timezone.utc)).total_seconds(), 0)
+
+    def acquire(self, url):
+        """
+        waits until a request could be sent to the host of given url.
+
+        tokens are reserved in the order of calls, so concurrent
+        requests to the same host are spread over time.
+
+        :param str url: url to be fetched.
+        """
+
+        host = self._get_host(url)
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._get_bucket(host, now)
+            bucket['tokens'] -= 1
+            wait = bucket['updated'] - now
+            if bucket['tokens'] < 0:
+                wait += -bucket['tokens'] / bucket['rate']
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def is_throttled(self, response):
+        """
+        gets a value indicating that given response shows that its host is throttling.
+
+        :param requests.Response response: response object.
+
+        :rtype: bool
+        """
+
+        return response.status_code in self.THROTTLED_STATUSES
+
+    def update(self, url, response):
+        """
+        adjusts the rate of the host of given url based on given response.
+
+        :param str url: fetched url.
+        :param requests.Response response: response object.
+        """
+
+        host = self._get_host(url)
+        throttled = self.is_throttled(response)
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._get_bucket(host, now)
+            if throttled is not True:
+                bucket['rate'] = min(self._max_rate, bucket['rate'] + self._increase)
+                return
+
+            bucket['rate'] = max(self._min_rate, bucket['rate'] * self._decrease)
+            bucket['tokens'] = min(bucket['tokens'], 0)
+            seconds = self._get_retry_after(
+                response.headers.get(ResponseHeaderEnum.RETRY_AFTER))
+            if seconds is not None:
+                seconds = min(seconds, self._max_retry_after)
+                bucket['updated'] = max(bucket['updated'], now + seconds)
+
+            rate = bucket['rate']
+
+        self.LOGGER.warning('Host [{host}] is throttling requests with status [{status}], '
+                            'rate is decreased to [{rate:.2f}] requests per second.'
+                            .format(host=host, status=response.status_code, rate=rate))
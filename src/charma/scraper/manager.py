@@ -5,14 +5,22 @@ scraper manager module.
 
 import requests
 
+from concurrent.futures import ThreadPoolExecutor
+
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 import pyrin.configuration.services as config_services
+import pyrin.logging.services as logging_services
 
 from pyrin.core.structs import Manager
 from pyrin.processor.request.enumerations import RequestHeaderEnum
 
 from charma.scraper import ScraperPackage
+from charma.scraper.cache import HTTPCache
+from charma.scraper.limiting import HostRateLimiter
+from charma.scraper.parsers import LXMLTag
+from charma.scraper.enumerations import ParserBackendEnum
 
 
 class ScraperManager(Manager):
@@ -21,6 +29,7 @@ class ScraperManager(Manager):
     """
 
     package_class = ScraperPackage
+    LOGGER = logging_services.get_logger('scraper')
 
     def __init__(self):
         """
@@ -31,6 +40,134 @@ class ScraperManager(Manager):
 
         self._user_agent = config_services.get('scraper', 'general', 'user_agent')
         self._parser = config_services.get('scraper', 'general', 'parser')
+        self._backend = config_services.get('scraper', 'general', 'backend')
+        self._concurrency = config_services.get('scraper', 'session', 'concurrency')
+        self._session = self._create_session()
+        self._cache = self._create_cache()
+        self._limiter = self._create_limiter()
+        self._retries = config_services.get('scraper', 'rate_limit', 'retries')
+
+    def _create_session(self):
+        """
+        creates a session which keeps connections alive and reuses them.
+
+        a session is safe to be shared between threads for sending requests,
+        each thread gets its own connection from the pool of related host.
+
+        :rtype: requests.Session
+        """
+
+        pool_connections = config_services.get('scraper', 'session', 'pool_connections')
+        pool_maxsize = config_services.get('scraper', 'session', 'pool_maxsize')
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _create_cache(self):
+        """
+        creates the http cache which keeps fetched pages on disk.
+
+        it returns None if cache is disabled.
+
+        :rtype: HTTPCache
+        """
+
+        if config_services.get('scraper', 'cache', 'enabled') is not True:
+            return None
+
+        directory = config_services.get('scraper', 'cache', 'directory')
+        ttl = config_services.get('scraper', 'cache', 'ttl')
+        max_size = config_services.get('scraper', 'cache', 'max_size')
+        content_types = config_services.get('scraper', 'cache', 'content_types')
+        return HTTPCache(directory, ttl=ttl * 3600, max_size=max_size,
+                         content_types=content_types)
+
+    def _create_limiter(self):
+        """
+        creates the rate limiter which limits requests to each host.
+
+        it returns None if rate limit is disabled.
+
+        :rtype: HostRateLimiter
+        """
+
+        configs = config_services.get_section('scraper', 'rate_limit')
+        if configs.get('enabled') is not True:
+            return None
+
+        return HostRateLimiter(**configs)
+
+    def _send(self, url, **options):
+        """
+        sends a get request to given url and returns a `Response` object.
+
+        if rate limit is enabled, it waits for the rate limit of the url host
+        and retries throttled requests up to configured `retries` times.
+
+        :param str url: url to be fetched.
+
+        :rtype: requests.Response
+        """
+
+        if self._limiter is None:
+            return self._session.get(url, **options)
+
+        attempt = 0
+        while True:
+            self._limiter.acquire(url)
+            response = self._session.get(url, **options)
+            self._limiter.update(url, response)
+            if not self._limiter.is_throttled(response) or attempt >= self._retries:
+                return response
+
+            # the dropped response must release its connection back to the pool.
+            response.close()
+            attempt += 1
+
+    def _get_all(self, method, urls, **options):
+        """
+        calls given method for each of given urls concurrently and returns the results.
+
+        results are in the same order as urls.
+
+        :param function method: method to be called for each url.
+        :param list[str] urls: urls to be fetched.
+
+        :keyword bool ignore_errors: specifies that failed urls must be logged
+                                     and have None as their result. otherwise
+                                     the error of the first failed url will be
+                                     raised. defaults to False if not provided.
+
+        :keyword int concurrency: max number of urls to be fetched concurrently.
+                                  defaults to `concurrency` config if not provided.
+
+        :rtype: list
+        """
+
+        ignore_errors = options.pop('ignore_errors', False)
+        concurrency = options.pop('concurrency', None) or self._concurrency
+        if len(urls) <= 0:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(urls)),
+                                thread_name_prefix='scraper') as executor:
+            futures = [executor.submit(method, item, **dict(options)) for item in urls]
+
+        results = []
+        for url, future in zip(urls, futures):
+            error = future.exception()
+            if error is None:
+                results.append(future.result())
+            elif ignore_errors is True:
+                self.LOGGER.error('Failed to fetch [{url}]: {error}'
+                                  .format(url=url, error=str(error)))
+                results.append(None)
+            else:
+                raise error
+
+        return results
 
     def get(self, url, **options):
         """
@@ -46,10 +183,13 @@ class ScraperManager(Manager):
 
         :keyword dict headers: headers to be sent with request.
 
+        :keyword bool cache: use http cache for this request if it is enabled.
+                            defaults to True if not provided.
+
         :rtype: requests.Response
         """
 
-        headers = options.get('headers') or {}
+        headers = dict(options.get('headers') or {})
         options.setdefault('allow_redirects', True)
         add_user_agent = options.pop('add_user_agent', True)
         if add_user_agent is True:
@@ -59,8 +199,25 @@ class ScraperManager(Manager):
         # to get consistent results for any movie on any client.
         headers[RequestHeaderEnum.ACCEPT_LANGUAGE] = 'en-US'
         options.update(headers=headers)
-        response = requests.get(url, **options)
+        use_cache = options.pop('cache', True) is True and self._cache is not None
+        entry = None
+        if use_cache is True:
+            entry = self._cache.get(url)
+            if entry is not None:
+                if entry['fresh'] is True:
+                    return self._cache.get_response(entry)
+
+                headers.update(self._cache.get_validators(entry))
+
+        response = self._send(url, **options)
+        if entry is not None and response.status_code == 304:
+            self._cache.refresh(url)
+            return self._cache.get_response(entry)
+
         response.raise_for_status()
+        if use_cache is True:
+            self._cache.set(url, response)
+
         return response
 
     def get_soup(self, url, **options):
@@ -77,8 +234,96 @@ class ScraperManager(Manager):
 
         :keyword dict headers: headers to be sent with request.
 
-        :rtype: bs4.BeautifulSoup
+        :keyword bool cache: use http cache for this request if it is enabled.
+                            defaults to True if not provided.
+
+        :rtype: bs4.BeautifulSoup | LXMLTag
         """
 
         response = self.get(url, **options)
-        return BeautifulSoup(response.text, self._parser)
+        return self.parse(response.text)
+
+    def parse(self, text, **options):
+        """
+        parses given html text and returns a `BeautifulSoup` compatible object.
+
+        :param str text: html text to be parsed.
+
+        :keyword str backend: parser backend to be used.
+                              defaults to `backend` config if not provided.
+        :enum backend:
+            BEAUTIFUL_SOUP = 'bs4'
+            LXML = 'lxml'
+
+        :rtype: bs4.BeautifulSoup | LXMLTag
+        """
+
+        backend = options.get('backend') or self._backend
+        if backend == ParserBackendEnum.LXML:
+            return LXMLTag.from_html(text)
+
+        return BeautifulSoup(text, self._parser)
+
+    def get_many(self, urls, **options):
+        """
+        gets the results of given urls concurrently and returns a list of `Response` objects.
+
+        results are in the same order as urls.
+
+        :param list[str] urls: urls to be fetched.
+
+        :keyword bool add_user_agent: add user agent into request headers.
+                                      defaults to True if not provided.
+
+        :keyword bool allow_redirects: allow redirects.
+                                       defaults to True if not provided.
+
+        :keyword dict headers: headers to be sent with request.
+
+        :keyword bool cache: use http cache for this request if it is enabled.
+                            defaults to True if not provided.
+
+        :keyword bool ignore_errors: specifies that failed urls must be logged
+                                     and have None as their result. otherwise
+                                     the error of the first failed url will be
+                                     raised. defaults to False if not provided.
+
+        :keyword int concurrency: max number of urls to be fetched concurrently.
+                                  defaults to `concurrency` config if not provided.
+
+        :rtype: list[requests.Response]
+        """
+
+        return self._get_all(self.get, urls, **options)
+
+    def get_soup_many(self, urls, **options):
+        """
+        gets the results of given urls concurrently and returns a list of `BeautifulSoup` objects.
+
+        results are in the same order as urls.
+
+        :param list[str] urls: urls to be fetched.
+
+        :keyword bool add_user_agent: add user agent into request headers.
+                                      defaults to True if not provided.
+
+        :keyword bool allow_redirects: allow redirects.
+                                       defaults to True if not provided.
+
+        :keyword dict headers: headers to be sent with request.
+
+        :keyword bool cache: use http cache for this request if it is enabled.
+                            defaults to True if not provided.
+
+        :keyword bool ignore_errors: specifies that failed urls must be logged
+                                     and have None as their result. otherwise
+                                     the error of the first failed url will be
+                                     raised. defaults to False if not provided.
+
+        :keyword int concurrency: max number of urls to be fetched concurrently.
+                                  defaults to `concurrency` config if not provided.
+
+        :rtype: list[bs4.BeautifulSoup | LXMLTag]
+        """
+
+        return self._get_all(self.get_soup, urls, **options)
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+scraper parsers module.
+"""
+
+from itertools import chain
+
+from bs4 import NavigableString
+from lxml import etree, html
+
+from pyrin.core.structs import CoreObject
+
+
+class LXMLTag(CoreObject):
+    """
+    lxml tag class.
+
+    it wraps an element of an lxml tree and exposes the subset of `bs4.Tag` api
+    which is used by scrapers. the tree is built and searched by lxml itself,
+    which is much faster than building a `BeautifulSoup` tree, and only the
+    matched elements are wrapped.
+
+    supported search arguments are tag name, attribute filters as a dict or
+    keyword arguments (`class_` for class attribute) and `recursive`. each
+    filter value could be a string, a compiled regex, True or False, with
+    the same meaning as `BeautifulSoup` filters.
+    """
+
+    def __init__(self, element, document=False):
+        """
+        initializes an instance of LXMLTag.
+
+        :param lxml.html.HtmlElement element: element to be wrapped.
+        :param bool document: specifies that this tag represents the whole document,
+                              so the root element itself is included in searches.
+                              defaults to False if not provided.
+        """
+
+        super().__init__()
+
+        self._element = element
+        self._document = document
+
+    @classmethod
+    def from_html(cls, text):
+        """
+        parses given html document and returns its root tag.
+
+        :param str text: html document.
+
+        :rtype: LXMLTag
+        """
+
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+
+        parser = html.HTMLParser(encoding='utf-8')
+        return cls(html.document_fromstring(text, parser=parser), document=True)
+
+    def _get_filters(self, attrs, kwargs):
+        """
+        gets all attribute filters from given arguments.
+
+        :param dict attrs: attribute filters.
+        :param dict kwargs: keyword attribute filters.
+
+        :rtype: list[tuple[str, object]]
+        """
+
+        filters = []
+        if attrs:
+            filters.extend(attrs.items())
+
+        for name, value in kwargs.items():
+            if name == 'class_':
+                name = 'class'
+
+            filters.append((name, value))
+
+        return filters
+
+    def _match_value(self, name, value, expected):
+        """
+        gets a value indicating that given attribute value matches the expected one.
+
+        :param str name: attribute name.
+        :param str value: attribute value. it is None if the attribute is not available.
+        :param str | re.Pattern | bool expected: expected value.
+
+        :rtype: bool
+        """
+
+        if expected is True:
+            return value is not None
+
+        if expected is False or expected is None:
+            return value is None
+
+        if value is None:
+            return False
+
+        candidates = [value]
+        if name == 'class':
+            candidates.extend(value.split())
+
+        if isinstance(expected, str):
+            return expected in candidates
+
+        return any(expected.search(item) is not None for item in candidates)
+
+    def _match(self, element, filters):
+        """
+        gets a value indicating that given element matches all given filters.
+
+        :param lxml.html.HtmlElement element: element to be checked.
+        :param list[tuple[str, object]] filters: attribute filters.
+
+        :rtype: bool
+        """
+
+        for name, expected in filters:
+            if not self._match_value(name, element.get(name), expected):
+                return False
+
+        return True
+
+    def _iter(self, elements, filters, limit=None):
+        """
+        gets matched elements of given elements wrapped into tags.
+
+        :param iterable[lxml.html.HtmlElement] elements: elements to be checked.
+        :param list[tuple[str, object]] filters: attribute filters.
+        :param int limit: max number of tags to be returned.
+
+        :rtype: list[LXMLTag]
+        """
+
+        result = []
+        for element in elements:
+            if self._match(element, filters):
+                result.append(LXMLTag(element))
+                if limit is not None and len(result) >= limit:
+                    break
+
+        return result
+
+    def _get_descendants(self, name, recursive):
+        """
+        gets the descendant elements with given name in document order.
+
+        :param str name: tag name. if not provided, all tags will be included.
+        :param bool recursive: specifies that all descendants must be
+                               included, otherwise only direct children.
+
+        :rtype: iterable[lxml.html.HtmlElement]
+        """
+
+        tag = name or etree.Element
+        if recursive is not True:
+            if self._document is True:
+                return iter([self._element] if name in (None, self._element.tag) else [])
+
+            return self._element.iterchildren(tag)
+
+        # lxml includes the element itself, but `BeautifulSoup` does not. the
+        # root element of a document is a child of `BeautifulSoup` object itself.
+        elements = self._element.iter(tag)
+        if self._document is not True and name in (None, self._element.tag):
+            next(elements, None)
+
+        return elements
+
+    def find(self, name=None, attrs=None, recursive=True, **kwargs):
+        """
+        gets the first descendant tag which matches given filters.
+
+        it returns None if nothing matched.
+
+        :param str name: tag name.
+        :param dict attrs: attribute filters.
+        :param bool recursive: search all descendants, otherwise only direct children.
+                               defaults to True if not provided.
+
+        :rtype: LXMLTag
+        """
+
+        result = self.find_all(name, attrs, recursive=recursive, limit=1, **kwargs)
+        if len(result) > 0:
+            return result[0]
+
+        return None
+
+    def find_all(self, name=None, attrs=None, recursive=True, limit=None, **kwargs):
+        """
+        gets all descendant tags which match given filters in document order.
+
+        :param str name: tag name.
+        :param dict attrs: attribute filters.
+        :param bool recursive: search all descendants, otherwise only direct children.
+                               defaults to True if not provided.
+
+        :param int limit: max number of tags to be returned.
+
+        :rtype: list[LXMLTag]
+        """
+
+        filters = self._get_filters(attrs, kwargs)
+        return self._iter(self._get_descendants(name, recursive), filters, limit)
+
+    def find_next(self, name=None, attrs=None, **kwargs):
+        """
+        gets the first tag after this tag in document order which matches given filters.
+
+        descendants of this tag are included, as in `BeautifulSoup`.
+        it returns None if nothing matched.
+
+        :param str name: tag name.
+        :param dict attrs: attribute filters.
+
+        :rtype: LXMLTag
+        """
+
+        filters = self._get_filters(attrs, kwargs)
+        following = self._element.xpath('following::*')
+        if name is not None:
+            following = (item for item in following if item.tag == name)
+
+        elements = chain(self._get_descendants(name, True), following)
+        result = self._iter(elements, filters, limit=1)
+        if len(result) > 0:
+            return result[0]
+
+        return None
+
+    def get(self, key, default=None):
+        """
+        gets the value of given attribute.
+
+        class attribute is returned as a list, as in `BeautifulSoup`.
+
+        :param str key: attribute name.
+        :param object default: value to be returned if attribute is not available.
+
+        :rtype: str | list[str]
+        """
+
+        value = self._element.get(key)
+        if value is None:
+            return default
+
+        if key == 'class':
+            return value.split()
+
+        return value
+
+    def get_text(self, separator='', strip=False):
+        """
+        gets all texts of this tag and its descendants joined together.
+
+        :param str separator: separator to join texts with.
+        :param bool strip: strip each text and skip empty ones.
+
+        :rtype: str
+        """
+
+        texts = self._element.itertext()
+        if strip is True:
+            texts = (item.strip() for item in texts)
+            texts = (item for item in texts if len(item) > 0)
+
+        return separator.join(texts)
+
+    @property
+    def text(self):
+        """
+        gets all texts of this tag and its descendants.
+
+        :rtype: str
+        """
+
+        return self.get_text()
+
+    @property
+    def string(self):
+        """
+        gets the only text of this tag.
+
+        it returns None if this tag has more than one child or no text at all.
+
+        :rtype: str
+        """
+
+        children = list(self._element)
+        if len(children) == 0:
+            return self._element.text
+
+        if len(children) == 1 and not self._element.text and not children[0].tail:
+            return LXMLTag(children[0]).string
+
+        return None
+
+    @property
+    def next(self):
+        """
+        gets the next element after this tag in document order.
+
+        it is the first child of this tag which could be a text.
+        texts are returned as `NavigableString`, as in `BeautifulSoup`.
+
+        :rtype: LXMLTag | bs4.NavigableString
+        """
+
+        if self._element.text is not None:
+            return NavigableString(self._element.text)
+
+        children = list(self._element)
+        if len(children) > 0:
+            return LXMLTag(children[0])
+
+        if self._element.tail is not None:
+            return NavigableString(self._element.tail)
+
+        following = self._element.getnext()
+        if following is not None:
+            return LXMLTag(following)
+
+        return None
+
+    @property
+    def parent(self):
+        """
+        gets the parent tag of this tag.
+
+        :rtype: LXMLTag
+        """
+
+        parent = self._element.getparent()
+        if parent is None:
+            return None
+
+        return LXMLTag(parent)
+
+    @property
+    def name(self):
+        """
+        gets the tag name of this tag.
+
+        :rtype: str
+        """
+
+        return self._element.tag
+
+    @property
+    def attrs(self):
+        """
+        gets all attributes of this tag.
+
+        :rtype: dict
+        """
+
+        return dict(self._element.attrib)
@@ -22,6 +22,9 @@ def get(url, **options):
 
     :keyword dict headers: headers to be sent with request.
 
+    :keyword bool cache: use http cache for this request if it is enabled.
+                        defaults to True if not provided.
+
     :rtype: requests.Response
     """
 
@@ -42,7 +45,94 @@ def get_soup(url, **options):
 
     :keyword dict headers: headers to be sent with request.
 
-    :rtype: bs4.BeautifulSoup
+    :keyword bool cache: use http cache for this request if it is enabled.
+                        defaults to True if not provided.
+
+    :rtype: bs4.BeautifulSoup | LXMLTag
     """
 
     return get_component(ScraperPackage.COMPONENT_NAME).get_soup(url, **options)
+
+
+def get_many(urls, **options):
+    """
+    gets the results of given urls concurrently and returns a list of `Response` objects.
+
+    results are in the same order as urls.
+
+    :param list[str] urls: urls to be fetched.
+
+    :keyword bool add_user_agent: add user agent into request headers.
+                                  defaults to True if not provided.
+
+    :keyword bool allow_redirects: allow redirects.
+                                   defaults to True if not provided.
+
+    :keyword dict headers: headers to be sent with request.
+
+    :keyword bool cache: use http cache for this request if it is enabled.
+                        defaults to True if not provided.
+
+    :keyword bool ignore_errors: specifies that failed urls must be logged
+                                 and have None as their result. otherwise
+                                 the error of the first failed url will be
+                                 raised. defaults to False if not provided.
+
+    :keyword int concurrency: max number of urls to be fetched concurrently.
+                              defaults to `concurrency` config if not provided.
+
+    :rtype: list[requests.Response]
+    """
+
+    return get_component(ScraperPackage.COMPONENT_NAME).get_many(urls, **options)
+
+
+def get_soup_many(urls, **options):
+    """
+    gets the results of given urls concurrently and returns a list of `BeautifulSoup` objects.
+
+    results are in the same order as urls.
+
+    :param list[str] urls: urls to be fetched.
+
+    :keyword bool add_user_agent: add user agent into request headers.
+                                  defaults to True if not provided.
+
+    :keyword bool allow_redirects: allow redirects.
+                                   defaults to True if not provided.
+
+    :keyword dict headers: headers to be sent with request.
+
+    :keyword bool cache: use http cache for this request if it is enabled.
+                        defaults to True if not provided.
+
+    :keyword bool ignore_errors: specifies that failed urls must be logged
+                                 and have None as their result. otherwise
+                                 the error of the first failed url will be
+                                 raised. defaults to False if not provided.
+
+    :keyword int concurrency: max number of urls to be fetched concurrently.
+                              defaults to `concurrency` config if not provided.
+
+    :rtype: list[bs4.BeautifulSoup | LXMLTag]
+    """
+
+    return get_component(ScraperPackage.COMPONENT_NAME).get_soup_many(urls, **options)
+
+
+def parse(text, **options):
+    """
+    parses given html text and returns a `BeautifulSoup` compatible object.
+
+    :param str text: html text to be parsed.
+
+    :keyword str backend: parser backend to be used.
+                          defaults to `backend` config if not provided.
+    :enum backend:
+        BEAUTIFUL_SOUP = 'bs4'
+        LXML = 'lxml'
+
+    :rtype: bs4.BeautifulSoup | LXMLTag
+    """
+
+    return get_component(ScraperPackage.COMPONENT_NAME).parse(text, **options)
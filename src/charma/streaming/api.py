@@ -20,6 +20,52 @@ def get_provider_names():
     return streaming_services.get_provider_names()
 
 
+@api('/stream/metrics', authenticated=False)
+def get_metrics(**options):
+    """
+    gets streaming performance metrics.
+
+    :returns: dict(dict time_to_manifest: dict(int count: number of measured requests,
+                                               float last: last wait time in seconds,
+                                               float average: average wait time in seconds,
+                                               float max: maximum wait time in seconds),
+                   dict encoder: dict(str resolution: dict(str preset: current preset name,
+                                                           float speed: last measured speed)),
+                   dict storage: dict(str backend: storage backend name,
+                                      int streams: number of streams in memory,
+                                      int size: total size of files in memory in bytes))
+    :rtype: dict
+    """
+
+    return streaming_services.get_metrics(**options)
+
+
+@api('/stream/evict', methods=HTTPMethodEnum.PATCH, authenticated=False)
+def evict(**options):
+    """
+    removes old streams from stream directory.
+
+    :returns: dict(int removed: number of removed streams,
+                   int stopped: number of stopped orphaned transcodings,
+                   int freed: freed disk space in bytes)
+    :rtype: dict
+    """
+
+    return streaming_services.evict(**options)
+
+
+@api('/stream/warmup', methods=HTTPMethodEnum.PATCH, authenticated=False)
+def warmup(**options):
+    """
+    pre-transcodes streams of movies which are likely to be played soon.
+
+    :returns: dict(int submitted: number of submitted warmups)
+    :rtype: dict
+    """
+
+    return streaming_services.warmup(**options)
+
+
 @api('/stream/<uuid:movie_id>', authenticated=False)
 def start_stream(movie_id, **options):
     """
@@ -33,6 +79,7 @@ def start_stream(movie_id, **options):
     :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
     :raises MovieFileNotFoundError: movie file not found error.
     :raises MultipleMovieFilesFoundError: multiple movie files found error.
+    :raises StreamIsQueuedError: stream is queued error.
     :raises StreamDoesNotExistError: stream does not exist error.
 
     :rtype: bytes
@@ -41,6 +88,53 @@ def start_stream(movie_id, **options):
     return streaming_services.start_stream(movie_id, **options)
 
 
+@api('/stream/<uuid:movie_id>/status', authenticated=False)
+def get_stream_status(movie_id, **options):
+    """
+    gets the transcoding status of given movie's stream.
+
+    clients could use the queue position to back off while the stream is queued
+    and the progress to show how much of the stream is ready.
+
+    :param uuid.UUID movie_id: movie id.
+
+    :returns: dict(str status: transcoding status,
+                   int queue_position: position in transcoding queue,
+                   int running_jobs: number of running transcoding jobs,
+                   int queued_jobs: number of queued transcoding jobs,
+                   float percent: transcoded percentage of source,
+                   float speed: transcoding speed relative to playback,
+                   float eta: estimated remaining seconds of transcoding,
+                   list[dict] subtitles: subtitle tracks of the stream)
+    :rtype: dict
+    """
+
+    return streaming_services.get_stream_status(movie_id, **options)
+
+
+@api('/stream/<uuid:movie_id>/direct', authenticated=False)
+def direct_play(movie_id, **options):
+    """
+    sends the original file of given movie if client could play it.
+
+    clients could send comma separated `containers`, `video_codecs` and
+    `audio_codecs` which they could play. if the file could not be played
+    by client, an error will be raised and client must use `start_stream`.
+
+    :param uuid.UUID movie_id: movie id to be played.
+
+    :raises MovieDirectoryNotFoundError: movie directory not found error.
+    :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
+    :raises MovieFileNotFoundError: movie file not found error.
+    :raises MultipleMovieFilesFoundError: multiple movie files found error.
+    :raises DirectPlayNotSupportedError: direct play not supported error.
+
+    :rtype: bytes
+    """
+
+    return streaming_services.direct_play(movie_id, **options)
+
+
 @api('/stream/<uuid:movie_id>/<file>', authenticated=False)
 def continue_stream(movie_id, file, **options):
     """
@@ -49,6 +143,7 @@ def continue_stream(movie_id, file, **options):
     :param uuid.UUID movie_id: movie id to be streamed.
     :param str file: stream file name to be returned.
 
+    :raises StreamIsQueuedError: stream is queued error.
     :raises StreamDoesNotExistError: stream does not exist error.
 
     :rtype: bytes
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+streaming background module.
+"""
+
+from threading import Thread, Event, Lock
+
+import pyrin.logging.services as logging_services
+
+from pyrin.core.structs import CoreObject
+
+
+class PeriodicTask(CoreObject):
+    """
+    periodic task class.
+
+    it calls the given function on a daemon thread on specific intervals
+    until it is stopped. errors of each call will be logged and will not
+    stop the next calls.
+    """
+
+    LOGGER = logging_services.get_logger('streaming')
+
+    def __init__(self, name, interval, function, **options):
+        """
+        initializes an instance of PeriodicTask.
+
+        :param str name: task name.
+        :param float interval: number of seconds to wait between each call.
+        :param callable function: a callable without arguments to be called.
+        """
+
+        super().__init__()
+
+        self._name = name
+        self._interval = interval
+        self._function = function
+        self._stop_event = Event()
+        self._lock = Lock()
+        self._thread = None
+
+    def _run(self):
+        """
+        calls the function of this task until it is stopped.
+        """
+
+        while not self._stop_event.wait(self._interval):
+            try:
+                self._function()
+            except Exception as error:
+                self.LOGGER.exception('Periodic task [{name}] failed: [{error}]'
+                                      .format(name=self._name, error=str(error)))
+
+    def start(self):
+        """
+        starts this task if it is not already running.
+        """
+
+        with self._lock:
+            if self.is_running is True:
+                return
+
+            self._stop_event.clear()
+            self._thread = Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self, **options):
+        """
+        stops this task.
+
+        :keyword float timeout: number of seconds to wait for the
+                                running call to finish. defaults to
+                                None and waits until it finishes.
+        """
+
+        with self._lock:
+            self._stop_event.set()
+            if self._thread is not None:
+                self._thread.join(options.get('timeout'))
+                self._thread = None
+
+    @property
+    def is_running(self):
+        """
+        gets a value indicating that this task is running.
+
+        :rtype: bool
+        """
+
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def name(self):
+        """
+        gets the name of this task.
+
+        :rtype: str
+        """
+
+        return self._name
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+streaming encoding module.
+"""
+
+import os
+
+from threading import Lock
+
+from pyrin.core.structs import CoreObject
+
+from charma.movies.models import MovieEntity
+from charma.streaming.enumerations import TranscoderPresetEnum
+
+
+class AdaptiveEncoder(CoreObject):
+    """
+    adaptive encoder class.
+
+    it selects the preset and number of threads of each transcoding based on
+    the source resolution, the number of running transcodings and the encode
+    speeds which are measured on previous transcodings of the same resolution.
+    the goal is to keep the encode speed just above realtime, so low resolutions
+    do not waste cores and high resolutions do not fall behind playback.
+    """
+
+    # presets which could be selected, ordered from the fastest to the slowest.
+    PRESETS = [TranscoderPresetEnum.ULTRA_FAST,
+               TranscoderPresetEnum.SUPER_FAST,
+               TranscoderPresetEnum.VERY_FAST,
+               TranscoderPresetEnum.FASTER,
+               TranscoderPresetEnum.FAST,
+               TranscoderPresetEnum.MEDIUM,
+               TranscoderPresetEnum.SLOW]
+
+    # initial preset of each resolution. in the form of: {int resolution: str preset}
+    BASE_PRESETS = {MovieEntity.ResolutionEnum.UNKNOWN: TranscoderPresetEnum.FASTER,
+                    MovieEntity.ResolutionEnum.VCD: TranscoderPresetEnum.MEDIUM,
+                    MovieEntity.ResolutionEnum.DVD: TranscoderPresetEnum.MEDIUM,
+                    MovieEntity.ResolutionEnum.HD: TranscoderPresetEnum.FAST,
+                    MovieEntity.ResolutionEnum.FHD: TranscoderPresetEnum.FASTER,
+                    MovieEntity.ResolutionEnum.QHD: TranscoderPresetEnum.VERY_FAST,
+                    MovieEntity.ResolutionEnum.UHD: TranscoderPresetEnum.SUPER_FAST}
+
+    # maximum number of threads which are useful for each resolution.
+    # in the form of: {int resolution: int threads}
+    MAX_THREADS = {MovieEntity.ResolutionEnum.UNKNOWN: 4,
+                   MovieEntity.ResolutionEnum.VCD: 1,
+                   MovieEntity.ResolutionEnum.DVD: 2,
+                   MovieEntity.ResolutionEnum.HD: 4,
+                   MovieEntity.ResolutionEnum.FHD: 6,
+                   MovieEntity.ResolutionEnum.QHD: 8,
+                   MovieEntity.ResolutionEnum.UHD: 12}
+
+    def __init__(self, min_speed, max_speed, **options):
+        """
+        initializes an instance of AdaptiveEncoder.
+
+        :param float min_speed: minimum desired encode speed relative to playback.
+                                slower transcodings make next ones use faster presets.
+
+        :param float max_speed: maximum desired encode speed relative to playback.
+                                faster transcodings make next ones use slower presets.
+        """
+
+        super().__init__()
+
+        self._min_speed = min_speed
+        self._max_speed = max_speed
+        self._lock = Lock()
+
+        # a dict containing preset adjustment of each resolution. in the form of:
+        # {int resolution: int offset}
+        self._offsets = dict()
+
+        # a dict containing the last measured speed of each resolution. in the form of:
+        # {int resolution: float speed}
+        self._speeds = dict()
+
+    def _normalize(self, resolution):
+        """
+        gets the given resolution if it is known, otherwise gets unknown resolution.
+
+        :param int resolution: movie resolution.
+
+        :rtype: int
+        """
+
+        if resolution in self.BASE_PRESETS:
+            return resolution
+
+        return MovieEntity.ResolutionEnum.UNKNOWN
+
+    def select(self, resolution, running_jobs):
+        """
+        gets the encoder settings for a new transcoding.
+
+        cores of the host are shared between running transcodings. if a
+        transcoding gets fewer threads than it could use, a faster preset
+        will be selected to compensate.
+
+        :param int resolution: movie resolution.
+        :param int running_jobs: number of other running transcodings.
+
+        :returns: dict(str preset: transcoding preset name,
+                       int threads: number of threads to be used)
+        :rtype: dict
+        """
+
+        resolution = self._normalize(resolution)
+        max_threads = self.MAX_THREADS[resolution]
+        threads = max((os.cpu_count() or 1) // (running_jobs + 1), 1)
+        index = self.PRESETS.index(self.BASE_PRESETS[resolution])
+        with self._lock:
+            index += self._offsets.get(resolution, 0)
+
+        if threads < max_threads:
+            index -= 1
+
+        index = min(max(index, 0), len(self.PRESETS) - 1)
+        return dict(preset=self.PRESETS[index], threads=min(threads, max_threads))
+
+    def record(self, resolution, speed):
+        """
+        records the measured encode speed of a finished transcoding.
+
+        next transcodings of the same resolution will use one preset
+        faster or slower if the speed is outside of desired range.
+
+        :param int resolution: movie resolution.
+        :param float speed: measured encode speed relative to playback.
+        """
+
+        resolution = self._normalize(resolution)
+        base = self.PRESETS.index(self.BASE_PRESETS[resolution])
+        with self._lock:
+            self._speeds[resolution] = speed
+            offset = self._offsets.get(resolution, 0)
+            if speed < self._min_speed:
+                offset -= 1
+            elif speed > self._max_speed:
+                offset += 1
+
+            # offset is limited, so it recovers quickly when the host load changes.
+            offset = min(max(offset, -base), len(self.PRESETS) - 1 - base)
+            self._offsets[resolution] = offset
+
+    def get_stats(self):
+        """
+        gets current preset adjustments and last measured speeds of each resolution.
+
+        :returns: dict(str resolution: dict(str preset: current preset name,
+                                            float speed: last measured speed))
+        :rtype: dict
+        """
+
+        result = dict()
+        with self._lock:
+            for resolution, speed in self._speeds.items():
+                index = self.PRESETS.index(self.BASE_PRESETS[resolution]) + \
+                    self._offsets.get(resolution, 0)
+                result[str(resolution)] = dict(preset=self.PRESETS[index], speed=speed)
+
+        return result
@@ -71,11 +71,24 @@ class TranscodingStatusEnum(CoreEnum):
     """
 
     NOT_AVAILABLE = 'not_available'
+    QUEUED = 'queued'
     STARTED = 'started'
     FINISHED = 'finished'
     FAILED = 'failed'
 
 
+class TranscodingPriorityEnum(CoreEnum):
+    """
+    transcoding priority enum.
+
+    jobs with lower values will be started first.
+    """
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
 class StreamProviderEnum(CoreEnum):
     """
     stream provider enum.
@@ -83,3 +96,22 @@ class StreamProviderEnum(CoreEnum):
 
     DASH = 'dash'
     HLS = 'hls'
+
+
+class SendModeEnum(CoreEnum):
+    """
+    send mode enum.
+    """
+
+    DIRECT = 'direct'
+    X_ACCEL = 'x_accel'
+    X_SENDFILE = 'x_sendfile'
+
+
+class SegmentStorageEnum(CoreEnum):
+    """
+    segment storage enum.
+    """
+
+    DISK = 'disk'
+    MEMORY = 'memory'
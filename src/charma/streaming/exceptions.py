@@ -88,3 +88,24 @@ class MultipleMovieFilesFoundError(StreamingBusinessException):
     multiple movie files found error.
     """
     pass
+
+
+class StreamIsQueuedError(StreamingBusinessException):
+    """
+    stream is queued error.
+    """
+    pass
+
+
+class InvalidLadderRenditionError(StreamingException):
+    """
+    invalid ladder rendition error.
+    """
+    pass
+
+
+class DirectPlayNotSupportedError(StreamingBusinessException):
+    """
+    direct play not supported error.
+    """
+    pass
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+streaming hooks module.
+"""
+
+from pyrin.application.decorators import application_hook
+from pyrin.application.enumerations import ApplicationStatusEnum
+from pyrin.application.hooks import ApplicationHookBase
+
+import charma.streaming.services as streaming_services
+
+
+@application_hook()
+class ApplicationHook(ApplicationHookBase):
+    """
+    application hook class.
+    """
+
+    def after_runtime_data_prepared(self):
+        """
+        this method will be got called after runtime data is ready.
+
+        note that this method will not get called when application starts in scripting mode.
+        """
+
+        streaming_services.start_background_tasks()
+
+    def application_status_changed(self, old_status, new_status):
+        """
+        this method will be called whenever application status changes.
+
+        :param str old_status: old application status.
+        :param str new_status: new application status.
+
+        :enum status:
+            INITIALIZING = 'Initializing'
+            LOADING = 'Loading'
+            READY = 'Ready'
+            RUNNING = 'Running'
+            TERMINATED = 'Terminated'
+        """
+
+        if new_status == ApplicationStatusEnum.TERMINATED:
+            streaming_services.stop_background_tasks()
@@ -34,11 +34,108 @@ class AbstractStreamProvider(CoreObject, metaclass=StreamProviderSingletonMeta):
         :param str input_file: file path to be transcoded.
         :param str output_directory: output directory path.
 
-        :keyword list[str] subtitles: subtitle file paths.
         :keyword int threads: number of threads to be used.
         :keyword str preset: transcoding preset name.
+        :keyword bool remux: copy the source streams if they are compatible.
+                             defaults to True if not provided.
+
+        :keyword list[tuple[int, str]] ladder: renditions of adaptive output.
+        :keyword str audio_bitrate: audio bitrate of adaptive output.
+        :keyword float segment_duration: duration of each segment in seconds.
+                                         if provided, the file will be
+                                         transcoded just-in-time.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :returns: transcoding process.
+        :rtype: multiprocessing.Process
+        """
+
+        raise CoreNotImplementedError()
+
+    @abstractmethod
+    def create_manifest(self, input_file, output_directory, segment_duration):
+        """
+        writes the complete manifest of given file for just-in-time transcoding.
+
+        it returns the number of segments, or None if the
+        source duration could not be detected.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+        :param float segment_duration: duration of each segment in seconds.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :rtype: int
+        """
+
+        raise CoreNotImplementedError()
+
+    @abstractmethod
+    def create_subtitles(self, input_file, output_directory, subtitles):
+        """
+        converts given subtitle files to webvtt tracks inside output directory.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+        :param list[str] subtitles: subtitle file paths.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :returns: list[dict(str file: webvtt file name,
+                            str manifest: manifest file name of the track,
+                            str language: language code of the track,
+                            str name: name of the track)]
+        :rtype: list[dict]
+        """
+
+        raise CoreNotImplementedError()
+
+    @abstractmethod
+    def get_manifest(self, output_directory, file, tracks):
+        """
+        gets the content of given manifest file including given subtitle tracks.
+
+        it returns None if the file must be sent as is.
+
+        :param str output_directory: output directory path.
+        :param str file: requested file name.
+        :param list[dict] tracks: subtitle tracks.
 
         :raises CoreNotImplementedError: core not implemented error.
+
+        :rtype: str
+        """
+
+        raise CoreNotImplementedError()
+
+    @abstractmethod
+    def get_segment_file(self, index):
+        """
+        gets the segment file name of given index for just-in-time output.
+
+        :param int index: segment index.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :rtype: str
+        """
+
+        raise CoreNotImplementedError()
+
+    @abstractmethod
+    def get_segment_index(self, file):
+        """
+        gets the segment index of given file name for just-in-time output.
+
+        it returns None if the file is not a segment.
+
+        :param str file: file name.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :rtype: int
         """
 
         raise CoreNotImplementedError()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+streaming locking module.
+"""
+
+import os
+
+from threading import Lock
+
+from pyrin.core.structs import CoreObject
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class StreamLock(CoreObject):
+    """
+    stream lock class.
+
+    it is a context manager which holds an exclusive lock on a lock file,
+    so it works across all processes of the application on the same host.
+    on platforms without `fcntl`, it falls back to a process-wide lock.
+    """
+
+    # a dict containing process-wide locks to be used when `fcntl` is not available.
+    # in the form of: {str path: Lock lock}
+    _local_locks = dict()
+    _local_locks_lock = Lock()
+
+    def __init__(self, path):
+        """
+        initializes an instance of StreamLock.
+
+        :param str path: lock file path.
+        """
+
+        super().__init__()
+
+        self._path = path
+        self._file = None
+        self._local_lock = None
+
+    def _get_local_lock(self):
+        """
+        gets the process-wide lock of current lock file.
+
+        :rtype: Lock
+        """
+
+        with self._local_locks_lock:
+            return self._local_locks.setdefault(self._path, Lock())
+
+    def __enter__(self):
+        """
+        acquires the lock and blocks until it is available.
+
+        :rtype: StreamLock
+        """
+
+        if fcntl is None:
+            self._local_lock = self._get_local_lock()
+            self._local_lock.acquire()
+        else:
+            self._file = open(self._path, mode='a')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        releases the lock.
+        """
+
+        if self._file is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+
+        if self._local_lock is not None:
+            self._local_lock.release()
+            self._local_lock = None
+
+
+def is_process_alive(process_id):
+    """
+    gets a value indicating that a process with given id is running on this host.
+
+    it returns None if it could not be determined on current platform.
+
+    :param int process_id: process id.
+
+    :rtype: bool
+    """
+
+    if process_id is None or process_id <= 0:
+        return False
+
+    # on windows, 'os.kill' terminates the process, so we could not use it.
+    if os.name == 'nt':
+        return None
+
+    try:
+        os.kill(process_id, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+    return True
@@ -4,32 +4,49 @@ streaming manager module.
 """
 
 import os
+import json
 import time
+import signal
 
-from time import sleep
+from threading import Lock
+from datetime import timedelta
+from collections import deque, OrderedDict
+from functools import partial
 
-from flask import send_from_directory
+import ffmpeg
 
 import pyrin.globalization.datetime.services as datetime_services
 import pyrin.configuration.services as config_services
 import pyrin.utils.path as path_utils
+import pyrin.logging.services as logging_services
 
 from pyrin.core.globals import _
 from pyrin.core.structs import Manager, Context
+from pyrin.database.services import get_current_store
 
 import charma.movies.services as movie_services
 import charma.movies.collector.services as movie_collector_services
 import charma.movies.root.services as movie_root_services
 import charma.subtitles.services as subtitle_services
 
+from charma.movies.models import MovieEntity, WatchLaterEntity
 from charma.streaming import StreamingPackage
-from charma.streaming.enumerations import TranscodingStatusEnum, StreamProviderEnum
+from charma.streaming.enumerations import TranscodingStatusEnum, StreamProviderEnum, \
+    TranscodingPriorityEnum, SegmentStorageEnum
 from charma.streaming.interface import AbstractStreamProvider
+from charma.streaming.scheduler import TranscodingScheduler
+from charma.streaming.watcher import ManifestWatcher
+from charma.streaming.locking import StreamLock, is_process_alive
+from charma.streaming.background import PeriodicTask
+from charma.streaming.encoding import AdaptiveEncoder
+from charma.streaming.sending import StreamSender
+from charma.streaming.storage import DiskSegmentStorage, MemorySegmentStorage
 from charma.streaming.exceptions import StreamDirectoryNotExistedError, \
     InvalidTranscodingStatusError, InvalidStreamProviderTypeError, \
     StreamProviderDoesNotExistError, DuplicateStreamProviderError, StreamDoesNotExistError, \
     MovieDirectoryNotFoundError, MultipleMovieDirectoriesFoundError, MovieFileNotFoundError, \
-    MultipleMovieFilesFoundError
+    MultipleMovieFilesFoundError, StreamIsQueuedError, InvalidLadderRenditionError, \
+    DirectPlayNotSupportedError
 
 
 class StreamingManager(Manager):
@@ -38,12 +55,25 @@ class StreamingManager(Manager):
     """
 
     package_class = StreamingPackage
+    LOGGER = logging_services.get_logger('streaming')
 
-    # how many seconds to wait for manifest file on each try.
-    INTERVAL = 1
+    # how many seconds to wait for manifest file creation before giving up.
+    MANIFEST_TIMEOUT = 20
 
-    # how many times to check for manifest file creation before giving up.
-    RETRY = 20
+    # how many of the latest manifest wait times must be kept for metrics.
+    METRICS_SIZE = 100
+
+    # name of the file which holds the transcoding state of each stream.
+    STATE_FILE = 'state.json'
+
+    # extensions of manifest files which may change and must not be cached.
+    MANIFEST_EXTENSIONS = ('.mpd', '.m3u8')
+
+    # separator of height and bitrate in ladder renditions config. ex: 720p@2800k
+    RENDITION_SEPARATOR = 'p@'
+
+    # how many resolved movie paths must be kept in memory.
+    MOVIE_PATHS_SIZE = 1000
 
     def __init__(self):
         """
@@ -57,8 +87,97 @@ class StreamingManager(Manager):
         self._providers = Context()
         self._threads = config_services.get('streaming', 'transcoding', 'threads')
         self._preset = config_services.get('streaming', 'transcoding', 'preset')
+        self._remux = config_services.get('streaming', 'transcoding', 'remux')
+        self._encoder = None
+        if config_services.get('streaming', 'transcoding', 'adaptive') is True:
+            self._encoder = AdaptiveEncoder(config_services.get('streaming', 'transcoding',
+                                                                'min_speed'),
+                                            config_services.get('streaming', 'transcoding',
+                                                                'max_speed'))
+        self._ladder = self._get_ladder()
+        self._audio_bitrate = config_services.get('streaming', 'ladder', 'audio_bitrate')
+        self._jit = config_services.get('streaming', 'jit', 'enabled')
+        self._segment_duration = config_services.get('streaming', 'jit', 'segment_duration')
+        self._seek_distance = config_services.get('streaming', 'jit', 'seek_distance')
+        self._segment_timeout = config_services.get('streaming', 'jit', 'segment_timeout')
         self._stream_directory = config_services.get('streaming', 'general', 'directory')
         self._create_stream_directory(self._stream_directory)
+        self._storage = self._create_storage()
+        self._sender = StreamSender(config_services.get('streaming', 'serving', 'mode'),
+                                    accel_prefix=config_services.get('streaming', 'serving',
+                                                                     'accel_prefix'),
+                                    max_age=config_services.get('streaming', 'serving',
+                                                                'max_age'))
+        self._scheduler = TranscodingScheduler(config_services.get('streaming', 'transcoding',
+                                                                   'max_jobs'),
+                                               on_finished=self._on_transcoding_finished)
+        self._watcher = ManifestWatcher()
+
+        # a dict containing cached states of streams. in the form of:
+        # {str directory: tuple(tuple identity, dict state)}
+        self._states = dict()
+        self._state_lock = Lock()
+
+        # latest times in seconds that requests waited for manifest file to become available.
+        self._manifest_wait_times = deque(maxlen=self.METRICS_SIZE)
+
+        # a dict containing access times which are not flushed to disk yet. in the form of:
+        # {str directory: float access_time}
+        self._access_times = dict()
+        self._access_lock = Lock()
+        self._access_flush_task = None
+
+        # a dict containing probed media info of movie files in least recently
+        # used order. in the form of: {str file: tuple(tuple identity, dict info)}
+        self._media_infos = OrderedDict()
+        self._media_info_lock = Lock()
+        self._media_info_size = config_services.get('streaming', 'direct_play',
+                                                    'media_info_size')
+
+        # a dict containing resolved paths of movies in least recently used order.
+        # selected flags specify that the path is selected by request options
+        # among multiple candidates. in the form of:
+        # {uuid.UUID movie_id: tuple(int directory_mtime, str directory, str file,
+        #                            bool directory_selected, bool file_selected)}
+        self._movie_paths = OrderedDict()
+        self._movie_path_lock = Lock()
+        self._direct_play = config_services.get('streaming', 'direct_play', 'enabled')
+        access_flush_interval = config_services.get('streaming', 'general',
+                                                    'access_flush_interval')
+        if access_flush_interval is not None:
+            self._access_flush_task = PeriodicTask('stream.access.flush',
+                                                   access_flush_interval,
+                                                   self.flush_access_times)
+
+        self._max_size = config_services.get('streaming', 'eviction', 'max_size')
+        self._max_idle = config_services.get('streaming', 'eviction', 'max_idle')
+        self._orphan_timeout = config_services.get('streaming', 'eviction', 'orphan_timeout')
+        self._spill_task = None
+        spill_interval = config_services.get('streaming', 'storage', 'spill_interval')
+        if isinstance(self._storage, MemorySegmentStorage) and spill_interval is not None:
+            self._spill_task = PeriodicTask('stream.spill', spill_interval, self.spill)
+
+        self._eviction_task = None
+        eviction_interval = config_services.get('streaming', 'eviction', 'interval')
+        if eviction_interval is not None:
+            self._eviction_task = PeriodicTask('stream.eviction', eviction_interval, self.evict)
+
+        # a set containing stream directories which are submitted by warmup.
+        self._warmups = set()
+        self._warmup_lock = Lock()
+        self._warmup_start_hour = config_services.get('streaming', 'warmup', 'start_hour')
+        self._warmup_end_hour = config_services.get('streaming', 'warmup', 'end_hour')
+        self._warmup_max_jobs = config_services.get('streaming', 'warmup', 'max_jobs')
+        self._warmup_max_load = config_services.get('streaming', 'warmup', 'max_load')
+        self._warmup_limit = config_services.get('streaming', 'warmup', 'limit')
+        self._warmup_recent_days = config_services.get('streaming', 'warmup', 'recent_days')
+        self._warmup_min_resolution = config_services.get('streaming', 'warmup',
+                                                          'min_resolution')
+        self._warmup_task = None
+        warmup_interval = config_services.get('streaming', 'warmup', 'interval')
+        if config_services.get('streaming', 'warmup', 'enabled') is True \
+                and warmup_interval is not None:
+            self._warmup_task = PeriodicTask('stream.warmup', warmup_interval, self.warmup)
 
     def _create_stream_directory(self, directory):
         """
@@ -69,41 +188,187 @@ class StreamingManager(Manager):
 
         path_utils.create_directory(directory, ignore_existed=True)
 
-    def _is_failed(self, directory):
+    def _create_storage(self):
         """
-        gets a value indicating that given stream directory transcoding is failed.
+        creates the segment storage of streams from configs.
+
+        :rtype: DiskSegmentStorage
+        """
+
+        backend = config_services.get('streaming', 'storage', 'backend')
+        if backend == SegmentStorageEnum.MEMORY:
+            return MemorySegmentStorage(self._stream_directory,
+                                        memory_directory=config_services.get(
+                                            'streaming', 'storage', 'memory_directory'),
+                                        ring_size=config_services.get(
+                                            'streaming', 'storage', 'ring_size'),
+                                        max_size=config_services.get(
+                                            'streaming', 'storage', 'max_size'))
+
+        return DiskSegmentStorage(self._stream_directory)
+
+    def _get_ladder(self):
+        """
+        gets the renditions of adaptive output from configs.
+
+        it returns None if adaptive output is disabled.
+
+        :raises InvalidLadderRenditionError: invalid ladder rendition error.
+
+        :returns: list[tuple[int height, str video_bitrate]]
+        :rtype: list[tuple[int, str]]
+        """
+
+        if config_services.get('streaming', 'ladder', 'enabled') is not True:
+            return None
+
+        result = []
+        renditions = config_services.get('streaming', 'ladder', 'renditions') or []
+        for item in renditions:
+            height, separator, bitrate = str(item).partition(self.RENDITION_SEPARATOR)
+            if separator == '' or not height.isdigit() or bitrate == '':
+                raise InvalidLadderRenditionError('Ladder rendition [{rendition}] is invalid. '
+                                                  'It must be in the form of '
+                                                  '[{{height}}p@{{bitrate}}].'
+                                                  .format(rendition=item))
+
+            result.append((int(height), bitrate))
+
+        return result or None
+
+    def _get_state_file_name(self, directory):
+        """
+        gets the state file name of given stream directory.
 
         :param str directory: directory path of stream.
 
-        :rtype: bool
+        :rtype: str
         """
 
-        failed_file = self._get_status_file_name(directory, TranscodingStatusEnum.FAILED)
-        return os.path.exists(failed_file)
+        return os.path.join(directory, self.STATE_FILE)
 
-    def _is_started(self, directory):
+    def _get_state(self, directory):
         """
-        gets a value indicating that given stream directory transcoding is started.
+        gets the transcoding state of given stream directory.
+
+        the state is cached in memory and the cache is validated by the identity
+        of state file, so each call costs a single `stat` if the state has not been
+        changed. it returns None if the stream has no state.
+
+        :param str directory: directory path of stream.
+
+        :returns: dict(str status,
+                       int pid,
+                       int owner,
+                       str error,
+                       int seek,
+                       float seeked_on,
+                       dict jit,
+                       dict progress,
+                       bool warmup,
+                       dict encoder,
+                       str created_on,
+                       str updated_on)
+        :rtype: dict
+        """
+
+        file_name = self._get_state_file_name(directory)
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            self._invalidate_state(directory)
+            return None
+
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._state_lock:
+            cached = self._states.get(directory)
+
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        try:
+            with open(file_name, mode='r') as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        with self._state_lock:
+            self._states[directory] = (identity, state)
+
+        return state
+
+    def _invalidate_state(self, directory):
+        """
+        removes the cached state of given stream directory.
+
+        :param str directory: directory path of stream.
+        """
+
+        with self._state_lock:
+            self._states.pop(directory, None)
+
+    def _update_state(self, directory, **values):
+        """
+        updates the transcoding state of given stream directory with given values.
+
+        the state will be written to a temporary file first and then
+        renamed to the state file, so readers never see a partial state.
+        concurrent updates from the application and transcoding processes
+        are serialized, so no update will be lost.
+
+        :param str directory: directory path of stream.
+
+        :raises StreamDirectoryNotExistedError: stream directory not existed error.
+        """
+
+        if not self.exists(directory):
+            raise StreamDirectoryNotExistedError('Stream directory [{directory}] does not exist.'
+                                                 .format(directory=directory))
+
+        file_name = self._get_state_file_name(directory)
+        with StreamLock('{file}.lock'.format(file=file_name)):
+            now = datetime_services.get_current_timestamp()
+            state = dict(self._get_state(directory) or {})
+            state.setdefault('created_on', now)
+            state.update(values, updated_on=now)
+            temp_file_name = '{file}.{pid}.tmp'.format(file=file_name, pid=os.getpid())
+            with open(temp_file_name, mode='w') as file:
+                json.dump(state, file)
+
+            os.replace(temp_file_name, file_name)
+            self._invalidate_state(directory)
+
+    def _is_queued(self, directory, state):
+        """
+        gets a value indicating that given stream directory is waiting in transcoding queue.
+
+        the stream may have been queued by another process of the application,
+        in that case it is considered queued as long as that process is alive.
 
         :param str directory: directory path of stream.
+        :param dict state: current state of stream.
 
         :rtype: bool
         """
 
-        started_file = self._get_status_file_name(directory, TranscodingStatusEnum.STARTED)
-        return os.path.exists(started_file)
+        if self._scheduler.is_queued(directory):
+            return True
 
-    def _is_finished(self, directory):
+        owner = state.get('owner')
+        return owner is not None and owner != os.getpid() \
+            and is_process_alive(owner) is True
+
+    def _is_status(self, directory, status):
         """
-        gets a value indicating that given stream directory transcoding is finished.
+        gets a value indicating that given stream directory has the given status.
 
         :param str directory: directory path of stream.
+        :param str status: status of transcoding.
 
         :rtype: bool
         """
 
-        finished_file = self._get_status_file_name(directory, TranscodingStatusEnum.FINISHED)
-        return os.path.exists(finished_file)
+        return self.get_status(directory) == status
 
     def _set_status(self, directory, status, **options):
         """
@@ -113,47 +378,158 @@ class StreamingManager(Manager):
         :param str status: status of transcoding.
         :enum status:
             NOT_AVAILABLE = 'not_available'
+            QUEUED = 'queued'
             STARTED = 'started'
             FINISHED = 'finished'
             FAILED = 'failed'
 
-        :keyword str message: message to be written to file.
+        :keyword str message: error message to be stored in state.
+        :keyword int owner: id of the process which has queued the stream.
 
         :raises StreamDirectoryNotExistedError: stream directory not existed error.
         :raises InvalidTranscodingStatusError: invalid transcoding status error.
         """
 
-        if not self.exists(directory):
-            raise StreamDirectoryNotExistedError('Stream directory [{directory}] does not exist.'
-                                                 .format(directory=directory))
-
         if status not in TranscodingStatusEnum:
             raise InvalidTranscodingStatusError('Transcoding status [{status}] is invalid.'
                                                 .format(status=status))
 
+        values = dict(status=status)
+        if 'owner' in options:
+            values.update(owner=options.get('owner'))
+
         message = options.get('message')
-        file_name = self._get_status_file_name(directory, status)
+        if message not in (None, ''):
+            values.update(error=message)
+
+        self._update_state(directory, **values)
+
+    def _get_access_time(self, directory):
+        """
+        gets the last access time of given stream directory.
+
+        it falls back to the modification time of stream
+        directory if no access time has been recorded.
+
+        :param str directory: directory path of stream.
+
+        :rtype: float
+        """
+
+        with self._access_lock:
+            access_time = self._access_times.get(directory)
+
+        if access_time is not None:
+            return access_time
+
+        file_name = os.path.join(directory, 'access')
+        try:
+            with open(file_name, mode='r') as file:
+                return float(file.read())
+        except (OSError, ValueError):
+            return os.path.getmtime(directory)
+
+    def _write_access_time(self, directory, access_time):
+        """
+        writes the given access time into access file of given stream directory.
+
+        :param str directory: directory path of stream.
+        :param float access_time: access time to be written.
+        """
+
+        file_name = os.path.join(directory, 'access')
         with open(file_name, mode='w') as file:
-            now = datetime_services.get_current_timestamp()
-            file.write(now)
-            if message not in (None, ''):
-                message = '\n{message}'.format(message=message)
-                file.write(message)
+            file.write(str(access_time))
+
+    def _get_process_id(self, directory):
+        """
+        gets the ffmpeg process id of given stream directory.
+
+        it returns None if no process id has been recorded.
+
+        :param str directory: directory path of stream.
+
+        :rtype: int
+        """
+
+        state = self._get_state(directory) or {}
+        return state.get('pid')
+
+    def _get_directory_size(self, directory):
+        """
+        gets the total size of all files in given directory in bytes.
+
+        :param str directory: directory path.
+
+        :rtype: int
+        """
+
+        size = 0
+        for root, directories, file_names in os.walk(directory):
+            for item in file_names:
+                try:
+                    size += os.path.getsize(os.path.join(root, item))
+                except OSError:
+                    continue
+
+        return size
 
-    def _get_status_file_name(self, directory, status):
+    def _stop_orphan(self, directory, idle):
         """
-        gets the file name of given status in given stream directory.
+        stops the transcoding of given stream which is not accessed for a long time.
+
+        it kills the ffmpeg process of the stream if it is still running and
+        sets the stream as failed, so it could be evicted. it returns a value
+        indicating that the transcoding has been stopped.
 
         :param str directory: directory path of stream.
-        :param str status: status of transcoding.
-        :enum status:
-            NOT_AVAILABLE = 'not_available'
-            STARTED = 'started'
-            FINISHED = 'finished'
-            FAILED = 'failed'
+        :param float idle: number of seconds since the last access to the stream.
+
+        :rtype: bool
+        """
+
+        process_id = self._get_process_id(directory)
+        is_alive = is_process_alive(process_id)
+        if is_alive is None:
+            return False
+
+        if is_alive is True:
+            try:
+                os.kill(process_id, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        self.set_failed(directory, 'Transcoding stopped because the stream was not '
+                                   'accessed for [{idle}] seconds.'.format(idle=int(idle)))
+
+        self.LOGGER.warning('Orphaned transcoding of stream [{directory}] has been stopped.'
+                            .format(directory=directory))
+        return True
+
+    def _remove_stream(self, directory):
+        """
+        removes the given stream directory if it is not being transcoded.
+
+        it returns a value indicating that the stream has been removed.
+
+        :param str directory: directory path of stream.
+
+        :rtype: bool
         """
 
-        return os.path.join(directory, status)
+        movie_id = path_utils.get_directory_name(directory)
+        with StreamLock(self._get_lock_path(movie_id)):
+            status = self.get_status(directory)
+            if status in (TranscodingStatusEnum.STARTED,
+                          TranscodingStatusEnum.QUEUED):
+                return False
+
+            self._storage.remove(directory)
+            self._invalidate_state(directory)
+            with self._access_lock:
+                self._access_times.pop(directory, None)
+
+            return True
 
     def _get_stream_provider(self, name):
         """
@@ -174,6 +550,20 @@ class StreamingManager(Manager):
 
         return self._providers.get(name)
 
+    def _get_default_stream_provider(self):
+        """
+        gets the stream provider which must be used for new streams.
+
+        just-in-time transcoding is only supported by hls provider.
+
+        :rtype: AbstractStreamProvider
+        """
+
+        if self._jit is True:
+            return self._get_stream_provider(StreamProviderEnum.HLS)
+
+        return self._get_stream_provider(StreamProviderEnum.DASH)
+
     def _get_stream_path(self, movie_id):
         """
         gets the stream path for given movie.
@@ -183,6 +573,20 @@ class StreamingManager(Manager):
 
         return os.path.join(self._stream_directory, str(movie_id))
 
+    def _get_lock_path(self, movie_id):
+        """
+        gets the lock file path for given movie's stream.
+
+        the lock file is kept outside of stream directory, so it
+        survives removal of stream directory on re-transcoding.
+
+        :param uuid.UUID movie_id: movie id.
+
+        :rtype: str
+        """
+
+        return os.path.join(self._stream_directory, '{movie_id}.lock'.format(movie_id=movie_id))
+
     def _get_movie_directory(self, movie_id, **options):
         """
         gets given movie's directory path if possible.
@@ -196,7 +600,8 @@ class StreamingManager(Manager):
         :raises MovieDirectoryNotFoundError: movie directory not found error.
         :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
 
-        :rtype: str
+        :returns: tuple[str directory, bool selected]
+        :rtype: tuple[str, bool]
         """
 
         movie = movie_services.get(movie_id)
@@ -218,7 +623,7 @@ class StreamingManager(Manager):
                                                        'found for movie [{directory}].')
                                                      .format(directory=movie.directory_name))
 
-        return found_directory
+        return found_directory, len(movie_paths) > 1
 
     def _get_movie_file(self, movie_id, directory_path, **options):
         """
@@ -234,7 +639,8 @@ class StreamingManager(Manager):
         :raises MovieFileNotFoundError: movie file not found error.
         :raises MultipleMovieFilesFoundError: multiple movie files found error.
 
-        :rtype: str
+        :returns: tuple[str file, bool selected]
+        :rtype: tuple[str, bool]
         """
 
         movie = movie_services.get(movie_id)
@@ -258,9 +664,68 @@ class StreamingManager(Manager):
                                                  'for movie [{directory}].')
                                                .format(directory=movie.directory_name))
 
-        return found_file
+        return found_file, len(movie_files) > 1
 
-    def _transcode(self, movie_id, **options):
+    def _get_movie_path(self, movie_id, **options):
+        """
+        gets given movie's directory and file paths if possible.
+
+        resolved paths are cached and the cache is validated by modification
+        time of movie directory, which changes whenever a file is added,
+        removed or renamed inside it. so repeated calls do not query roots
+        and do not probe the video files again. request options are only
+        compared with a cached path if it was selected among multiple ones.
+
+        :param uuid.UUID movie_id: movie id to get its paths.
+
+        :keyword str directory: movie directory path.
+                                it will only be used if more than
+                                one directory found for given movie.
+
+        :keyword str file: movie file path.
+                           it will only be used if more than
+                           one file found for given movie.
+
+        :raises MovieDirectoryNotFoundError: movie directory not found error.
+        :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
+        :raises MovieFileNotFoundError: movie file not found error.
+        :raises MultipleMovieFilesFoundError: multiple movie files found error.
+
+        :returns: tuple[str directory, str file]
+        :rtype: tuple[str, str]
+        """
+
+        with self._movie_path_lock:
+            cached = self._movie_paths.get(movie_id)
+
+        if cached is not None:
+            modified_on, directory, file, directory_selected, file_selected = cached
+            if (directory_selected is not True or options.get('directory') == directory) \
+                    and (file_selected is not True or options.get('file') == file):
+                try:
+                    if os.stat(directory).st_mtime_ns == modified_on \
+                            and os.path.isfile(file):
+                        with self._movie_path_lock:
+                            if movie_id in self._movie_paths:
+                                self._movie_paths.move_to_end(movie_id)
+
+                        return directory, file
+                except OSError:
+                    pass
+
+        directory, directory_selected = self._get_movie_directory(movie_id, **options)
+        modified_on = os.stat(directory).st_mtime_ns
+        file, file_selected = self._get_movie_file(movie_id, directory, **options)
+        with self._movie_path_lock:
+            self._movie_paths[movie_id] = (modified_on, directory, file,
+                                           directory_selected, file_selected)
+            self._movie_paths.move_to_end(movie_id)
+            while len(self._movie_paths) > self.MOVIE_PATHS_SIZE:
+                self._movie_paths.popitem(last=False)
+
+        return directory, file
+
+    def _transcode(self, movie_id, priority=None, wait=True, warmup=False, **options):
         """
         transcodes a movie file to stream directory.
 
@@ -268,7 +733,11 @@ class StreamingManager(Manager):
         path and the second item is the output file name.
 
         if the stream is already present and is usable, it returns the available
-        stream and bypasses the transcoding.
+        stream and bypasses the transcoding. if there is no free transcoding slot,
+        the stream will be queued and an error will be raised.
+
+        only `directory` and `file` options are used to find the movie file,
+        other options are ignored and never passed to the stream provider.
 
         :param uuid.UUID movie_id: movie id to be transcoded.
 
@@ -280,50 +749,391 @@ class StreamingManager(Manager):
                            it will only be used if more than
                            one file found for given movie.
 
+        :param int priority: transcoding priority. lower values will be started first.
+                             defaults to `TranscodingPriorityEnum.NORMAL`.
+        :enum priority:
+            HIGH = 0
+            NORMAL = 1
+            LOW = 2
+
+        :param bool wait: wait for the manifest to become available.
+                          if set to False, it returns as soon as the
+                          transcoding is submitted and no error will be
+                          raised for queued streams. defaults to True.
+
+        :param bool warmup: specifies that this stream is pre-transcoded
+                            before any request. defaults to False.
+
         :raises MovieDirectoryNotFoundError: movie directory not found error.
         :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
         :raises MovieFileNotFoundError: movie file not found error.
         :raises MultipleMovieFilesFoundError: multiple movie files found error.
+        :raises StreamIsQueuedError: stream is queued error.
 
         :returns: tuple[str stream_directory, str output_file]
         :rtype: tuple[str, str]
         """
 
         stream_path = self._get_stream_path(movie_id)
-        stream = self._get_stream_provider(StreamProviderEnum.DASH)
-        status = self.get_status(stream_path)
-        if status in (TranscodingStatusEnum.STARTED,
-                      TranscodingStatusEnum.FINISHED):
+        stream = self._get_default_stream_provider()
+
+        # concurrent requests for the same movie, even from other processes, must
+        # wait here, so only the first one starts the transcoding and the others
+        # will find it as started or queued.
+        with StreamLock(self._get_lock_path(movie_id)):
+            status = self.get_status(stream_path)
+            if status == TranscodingStatusEnum.FINISHED \
+                    and os.path.exists(os.path.join(stream_path, stream.output_file)):
+                return stream_path, stream.output_file
+
+            if status not in (TranscodingStatusEnum.QUEUED,
+                              TranscodingStatusEnum.STARTED):
+                self._storage.remove(stream_path)
+                self._invalidate_state(stream_path)
+                found_directory, found_file = self._get_movie_path(
+                    movie_id, directory=options.get('directory'), file=options.get('file'))
+
+                resolution = movie_services.get(movie_id).resolution
+                subtitles = subtitle_services.get_subtitles(found_directory)
+                self._storage.create(stream_path)
+                if warmup is True:
+                    self._update_state(stream_path, warmup=True)
+
+                self._create_subtitles(stream, found_file, stream_path, subtitles)
+                if self._jit is True and self._start_jit(stream, found_file, stream_path,
+                                                         resolution, priority) is True:
+                    return stream_path, stream.output_file
+
+                starter = partial(self._start_transcoding, stream, found_file,
+                                  stream_path, resolution, remux=self._remux,
+                                  ladder=self._ladder, audio_bitrate=self._audio_bitrate)
+                self._scheduler.submit(stream_path, starter, priority=priority)
+                if self._scheduler.is_queued(stream_path):
+                    self.set_queued(stream_path)
+
+        if wait is not True:
             return stream_path, stream.output_file
 
-        path_utils.remove_directory(stream_path)
-        found_directory = self._get_movie_directory(movie_id, **options)
-        found_file = self._get_movie_file(movie_id, found_directory, **options)
-        subtitles = subtitle_services.get_subtitles(found_directory)
-        self._create_stream_directory(stream_path)
-        options.update(threads=self._threads, preset=self._preset, subtitles=subtitles)
-        stream.transcode(found_file, stream_path, **options)
+        self._assert_not_queued(movie_id, stream_path)
 
         # we have to wait here for manifest file to become available.
-        self._wait_for_manifest(stream_path, stream.output_file,
-                                self.RETRY, self.INTERVAL)
+        self._wait_for_manifest(stream_path, stream.output_file, self.MANIFEST_TIMEOUT)
 
         return stream_path, stream.output_file
 
-    def _wait_for_manifest(self, stream_path, manifest, retry, interval):
+    def _create_subtitles(self, stream, movie_file, stream_path, subtitles):
         """
-        sleeps current thread and checks if manifest file is created on specific intervals.
+        creates the subtitle tracks of given stream and stores them in its state.
+
+        tracks are created before transcoding starts, so they are
+        referenced by the manifest from its first request.
+
+        :param AbstractStreamProvider stream: stream provider.
+        :param str movie_file: movie file path.
+        :param str stream_path: stream directory path.
+        :param list[str] subtitles: subtitle file paths.
+        """
+
+        if not subtitles:
+            return
+
+        tracks = stream.create_subtitles(movie_file, stream_path, subtitles)
+        if len(tracks) > 0:
+            self._update_state(stream_path, subtitles=dict(provider=stream.name,
+                                                           tracks=tracks))
+
+    def _get_encoder_settings(self, resolution):
+        """
+        gets the encoder settings for a transcoding which is being started now.
+
+        if adaptive encoding is disabled, configured settings will be returned.
+
+        :param int resolution: movie resolution.
+
+        :returns: dict(str preset: transcoding preset name,
+                       int threads: number of threads to be used)
+        :rtype: dict
+        """
+
+        if self._encoder is None:
+            return dict(preset=self._preset, threads=self._threads)
+
+        return self._encoder.select(resolution, self._scheduler.running_count)
+
+    def _start_transcoding(self, stream, movie_file, stream_path, resolution, **options):
+        """
+        starts the transcoding of given movie file with encoder settings selected now.
+
+        this method is called by transcoding scheduler when the job gets a slot,
+        so encoder settings consider the transcodings which are running at that time.
+
+        :param AbstractStreamProvider stream: stream provider.
+        :param str movie_file: movie file path.
+        :param str stream_path: stream directory path.
+        :param int resolution: movie resolution.
+
+        :returns: transcoding process.
+        :rtype: multiprocessing.Process
+        """
+
+        settings = self._get_encoder_settings(resolution)
+        self._update_state(stream_path, encoder=dict(resolution=resolution, **settings))
+        options.update(settings)
+        return stream.transcode(movie_file, stream_path, **options)
+
+    def _on_transcoding_finished(self, directory):
+        """
+        handles the finish of transcoding process of given stream.
+
+        files of the stream are spilled from memory and the measured encode
+        speed of successful transcodings is recorded to adapt the encoder
+        settings of next transcodings.
+
+        :param str directory: directory path of stream.
+        """
+
+        self._invalidate_state(directory)
+        self._spill_stream(directory)
+        if self._encoder is None:
+            return
+
+        state = self._get_state(directory) or {}
+        speed = (state.get('progress') or {}).get('speed')
+        encoder = state.get('encoder')
+        if state.get('status') == TranscodingStatusEnum.FINISHED \
+                and speed is not None and encoder is not None:
+            self._encoder.record(encoder.get('resolution'), speed)
+
+    def _spill_stream(self, directory):
+        """
+        spills the files of given stream from memory to stream directory.
+
+        all files of streams which are not being transcoded will be spilled,
+        otherwise only old segments will be spilled.
+
+        :param str directory: directory path of stream.
+        """
+
+        movie_id = path_utils.get_directory_name(directory)
+        try:
+            with StreamLock(self._get_lock_path(movie_id)):
+                status = self.get_status(directory)
+                finished = status not in (TranscodingStatusEnum.QUEUED,
+                                          TranscodingStatusEnum.STARTED)
+                self._storage.spill(directory, finished)
+        except OSError as error:
+            self.LOGGER.warning('Stream [{directory}] could not be spilled: [{error}]'
+                                .format(directory=directory, error=str(error)))
+
+        self._invalidate_state(directory)
+
+    def _submit_jit(self, stream, stream_path, jit, start_segment, priority=None):
+        """
+        submits a just-in-time transcoding of given stream from given segment.
+
+        :param AbstractStreamProvider stream: stream provider.
+        :param str stream_path: stream directory path.
+        :param dict jit: just-in-time info of the stream.
+        :param int start_segment: index of the first segment to be produced.
+
+        :param int priority: transcoding priority. lower values will be started first.
+                             defaults to `TranscodingPriorityEnum.NORMAL`.
+        :enum priority:
+            HIGH = 0
+            NORMAL = 1
+            LOW = 2
+        """
+
+        self._update_state(stream_path, seek=start_segment, seeked_on=time.time())
+        starter = partial(self._start_transcoding, stream, jit['source'], stream_path,
+                          jit.get('resolution'), segment_duration=jit['segment_duration'])
+        self._scheduler.submit(stream_path, starter, priority=priority)
+        if self._scheduler.is_queued(stream_path):
+            self.set_queued(stream_path)
+
+    def _start_jit(self, stream, movie_file, stream_path, resolution, priority=None):
+        """
+        starts a just-in-time transcoding of given movie file.
+
+        the complete manifest is written before transcoding starts, so it
+        could be returned immediately. it returns False if the manifest
+        could not be generated and the movie must be transcoded normally.
+
+        :param AbstractStreamProvider stream: stream provider.
+        :param str movie_file: movie file path.
+        :param str stream_path: stream directory path.
+        :param int resolution: movie resolution.
+
+        :param int priority: transcoding priority. lower values will be started first.
+                             defaults to `TranscodingPriorityEnum.NORMAL`.
+        :enum priority:
+            HIGH = 0
+            NORMAL = 1
+            LOW = 2
+
+        :rtype: bool
+        """
+
+        segments = stream.create_manifest(movie_file, stream_path, self._segment_duration)
+        if segments is None:
+            self.LOGGER.warning('Duration of file [{file}] could not be detected, '
+                                'it will not be transcoded just-in-time.'
+                                .format(file=movie_file))
+            return False
+
+        jit = dict(source=movie_file, resolution=resolution,
+                   segment_duration=self._segment_duration, segments=segments)
+        self._update_state(stream_path, jit=jit)
+        self._submit_jit(stream, stream_path, jit, 0, priority)
+        return True
+
+    def _is_far(self, stream, stream_path, index, state):
+        """
+        gets a value indicating that given segment is far from the running transcoding.
+
+        a segment is far if it is before the first segment of current run, or if
+        none of the previous segments up to `seek_distance` are produced by current
+        run yet. segments which are left from previous runs are not considered.
+
+        :param AbstractStreamProvider stream: stream provider.
+        :param str stream_path: stream directory path.
+        :param int index: requested segment index.
+        :param dict state: current state of stream.
+
+        :rtype: bool
+        """
+
+        seek_segment = state.get('seek') or 0
+        if index < seek_segment:
+            return True
+
+        if index - seek_segment <= self._seek_distance:
+            return False
+
+        seeked_on = state.get('seeked_on') or 0
+        for previous in range(index - self._seek_distance, index):
+            try:
+                modified_on = os.path.getmtime(os.path.join(stream_path,
+                                                            stream.get_segment_file(previous)))
+            except OSError:
+                continue
+
+            if modified_on >= seeked_on:
+                return False
+
+        return True
+
+    def _ensure_segment(self, movie_id, stream_path, file):
+        """
+        makes sure that given segment of a just-in-time stream will be available.
+
+        if the segment is not produced yet and the transcoding is far from it,
+        the transcoding will be restarted from this segment. it then blocks
+        until the segment is produced. streams which are not just-in-time
+        will be left untouched.
+
+        :param uuid.UUID movie_id: movie id.
+        :param str stream_path: stream directory path.
+        :param str file: requested file name.
+
+        :raises StreamIsQueuedError: stream is queued error.
+        """
+
+        state = self._get_state(stream_path)
+        if state is None or state.get('jit') is None:
+            return
+
+        stream = self._get_stream_provider(StreamProviderEnum.HLS)
+        index = stream.get_segment_index(file)
+        if index is None or os.path.exists(os.path.join(stream_path, file)):
+            return
+
+        jit = state['jit']
+        if index >= jit['segments']:
+            return
+
+        with StreamLock(self._get_lock_path(movie_id)):
+            if os.path.exists(os.path.join(stream_path, file)):
+                return
+
+            status = self.get_status(stream_path)
+            if status in (TranscodingStatusEnum.QUEUED,
+                          TranscodingStatusEnum.STARTED):
+                state = self._get_state(stream_path) or {}
+                if self._is_far(stream, stream_path, index, state) is True:
+                    self._update_state(stream_path, seek=index, seeked_on=time.time())
+            else:
+                self._submit_jit(stream, stream_path, jit, index,
+                                 priority=TranscodingPriorityEnum.HIGH)
+
+        self._assert_not_queued(movie_id, stream_path)
+        is_failed = partial(self._is_status, stream_path, TranscodingStatusEnum.FAILED)
+        self._watcher.wait(stream_path, file, self._segment_timeout, abort=is_failed)
+
+    def _assert_not_queued(self, movie_id, stream_path):
+        """
+        asserts that given stream is not waiting in transcoding queue.
+
+        :param uuid.UUID movie_id: movie id.
+        :param str stream_path: stream directory path.
+
+        :raises StreamIsQueuedError: stream is queued error.
+        """
+
+        position = self._scheduler.get_position(stream_path)
+        if position is None and self.get_status(stream_path) == TranscodingStatusEnum.QUEUED:
+            raise StreamIsQueuedError(_('Stream of movie [{movie_id}] is queued. '
+                                        'Please try again later.').format(movie_id=movie_id))
+
+        if position is not None and position > 0:
+            raise StreamIsQueuedError(_('Stream of movie [{movie_id}] is queued at '
+                                        'position [{position}]. Please try again later.')
+                                      .format(movie_id=movie_id, position=position),
+                                      data=dict(queue_position=position))
+
+    def _wait_for_manifest(self, stream_path, manifest, timeout):
+        """
+        blocks current thread until manifest file is created or transcoding is failed.
+
+        it returns as soon as the manifest file is written and records
+        the waited time to be exposed in streaming metrics.
 
         :param str stream_path: stream directory path to look for manifest file.
         :param str manifest: manifest file name.
-        :param int retry: number of retries to check if manifest file is created.
-        :param float interval: number of seconds to wait between each interval.
+        :param float timeout: maximum number of seconds to wait for manifest file.
+        """
+
+        if os.path.exists(os.path.join(stream_path, manifest)):
+            return
+
+        start = time.monotonic()
+        is_failed = partial(self._is_status, stream_path, TranscodingStatusEnum.FAILED)
+        if self._watcher.wait(stream_path, manifest, timeout, abort=is_failed) is True:
+            self._manifest_wait_times.append(time.monotonic() - start)
+
+    def _is_immutable(self, stream, file):
+        """
+        gets a value indicating that given file of given stream will never change.
+
+        manifests may change on re-transcoding, but segments of finished
+        streams and segments of just-in-time streams which are written
+        completely before becoming available, never change.
+
+        :param str stream: stream directory.
+        :param str file: file name.
+
+        :rtype: bool
         """
 
-        full_path = os.path.join(stream_path, manifest)
-        while not path_utils.exists(full_path) and retry > 0:
-            retry -= 1
-            sleep(interval)
+        if os.path.splitext(file)[1].lower() in self.MANIFEST_EXTENSIONS:
+            return False
+
+        state = self._get_state(stream) or {}
+        if state.get('jit') is not None:
+            hls = self._get_stream_provider(StreamProviderEnum.HLS)
+            return hls.get_segment_index(file) is not None
+
+        return state.get('status') == TranscodingStatusEnum.FINISHED
 
     def _send_stream(self, stream, file, **options):
         """
@@ -338,12 +1148,120 @@ class StreamingManager(Manager):
         """
 
         full_path = os.path.join(stream, file)
-        if not os.path.exists(full_path):
+        if os.path.basename(file) == file:
+            subtitles = (self._get_state(stream) or {}).get('subtitles')
+            if subtitles is not None:
+                provider = self._get_stream_provider(subtitles['provider'])
+                content = provider.get_manifest(stream, file, subtitles['tracks'])
+                if content is not None:
+                    return self._sender.send_content(content, file)
+
+        if os.path.basename(file) != file or not os.path.isfile(full_path):
             raise StreamDoesNotExistError(_('Stream [{stream}] does not exist.')
                                           .format(stream=full_path))
 
-        options.update(conditional=True)
-        return send_from_directory(stream, file, **options)
+        return self._sender.send(self._stream_directory, stream, file,
+                                 immutable=self._is_immutable(stream, file))
+
+    def _get_media_info(self, file):
+        """
+        gets the container and codecs of given movie file.
+
+        probe results are cached and validated by the identity of file, because
+        clients send many range requests for the same file while playing it.
+        only the results of the most recently played files are kept.
+
+        :param str file: movie file path.
+
+        :returns: dict(str container: file container name,
+                       str video: video codec name,
+                       str audio: audio codec name)
+        :rtype: dict
+        """
+
+        stat = os.stat(file)
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._media_info_lock:
+            cached = self._media_infos.get(file)
+            if cached is not None and cached[0] == identity:
+                self._media_infos.move_to_end(file)
+                return cached[1]
+
+        container = os.path.splitext(file)[1].lstrip('.').lower() or None
+        info = dict(container=container, video=None, audio=None)
+        try:
+            streams = ffmpeg.probe(file).get('streams', [])
+        except ffmpeg.Error:
+            streams = []
+
+        for item in streams:
+            codec_type = item.get('codec_type')
+            disposition = item.get('disposition') or {}
+            if codec_type == 'video' and info['video'] is None \
+                    and disposition.get('attached_pic') != 1:
+                info.update(video=item.get('codec_name'))
+
+            elif codec_type == 'audio' and info['audio'] is None:
+                info.update(audio=item.get('codec_name'))
+
+        with self._media_info_lock:
+            self._media_infos[file] = (identity, info)
+            self._media_infos.move_to_end(file)
+            while len(self._media_infos) > (self._media_info_size or 1):
+                self._media_infos.popitem(last=False)
+
+        return info
+
+    def _get_capabilities(self, name, **options):
+        """
+        gets the client capabilities with given name.
+
+        client could send them as a list or a comma separated string.
+        if client has not sent them, the configured defaults will be used.
+
+        :param str name: capability name.
+
+        :rtype: list[str]
+        """
+
+        values = options.get(name)
+        if values is None:
+            values = config_services.get('streaming', 'direct_play', name) or []
+
+        if isinstance(values, str):
+            values = values.split(',')
+
+        return [str(item).strip().lower() for item in values if str(item).strip()]
+
+    def _get_unsupported(self, info, **options):
+        """
+        gets the parts of given media info which client could not play.
+
+        :param dict info: media info of movie file.
+
+        :keyword list[str] | str containers: containers which client could play.
+        :keyword list[str] | str video_codecs: video codecs which client could play.
+        :keyword list[str] | str audio_codecs: audio codecs which client could play.
+
+        :returns: dict(str container: unsupported container name,
+                       str video: unsupported video codec name,
+                       str audio: unsupported audio codec name)
+        :rtype: dict
+        """
+
+        result = dict()
+        if info['container'] not in self._get_capabilities('containers', **options):
+            result.update(container=info['container'])
+
+        if info['video'] not in self._get_capabilities('video_codecs', **options):
+            result.update(video=info['video'])
+
+        # files without audio could be played by any client.
+        if info['audio'] is not None and \
+                info['audio'] not in self._get_capabilities('audio_codecs', **options):
+            result.update(audio=info['audio'])
+
+        return result
 
     def register_stream_provider(self, instance, **options):
         """
@@ -400,19 +1318,403 @@ class StreamingManager(Manager):
         :rtype: str
         """
 
-        if not self.exists(directory):
+        state = self._get_state(directory)
+        if state is None:
+            if self._scheduler.is_queued(directory):
+                return TranscodingStatusEnum.QUEUED
+
+            # the transcoding process is started but it has not set its status yet.
+            if self._scheduler.is_running(directory):
+                return TranscodingStatusEnum.STARTED
+
+            return TranscodingStatusEnum.NOT_AVAILABLE
+
+        status = state.get('status')
+        if status == TranscodingStatusEnum.QUEUED:
+            if self._is_queued(directory, state):
+                return TranscodingStatusEnum.QUEUED
+
+            if self._scheduler.is_running(directory):
+                return TranscodingStatusEnum.STARTED
+
             return TranscodingStatusEnum.NOT_AVAILABLE
 
-        if self._is_failed(directory):
-            return TranscodingStatusEnum.FAILED
+        if status not in TranscodingStatusEnum:
+            return TranscodingStatusEnum.NOT_AVAILABLE
+
+        return status
+
+    def get_stream_status(self, movie_id, **options):
+        """
+        gets the transcoding status of given movie's stream.
+
+        :param uuid.UUID movie_id: movie id.
+
+        :returns: dict(str status: transcoding status,
+                       int queue_position: position in transcoding queue,
+                       int running_jobs: number of running transcoding jobs,
+                       int queued_jobs: number of queued transcoding jobs,
+                       float percent: transcoded percentage of source,
+                       float speed: transcoding speed relative to playback,
+                       float eta: estimated remaining seconds of transcoding,
+                       list[dict] subtitles: subtitle tracks of the stream)
+        :rtype: dict
+        """
+
+        directory = self._get_stream_path(movie_id)
+        status = self.get_status(directory)
+        state = self._get_state(directory)
+        tracks = ((state or {}).get('subtitles') or {}).get('tracks') or []
+        result = dict(status=status,
+                      queue_position=self._scheduler.get_position(directory),
+                      running_jobs=self._scheduler.running_count,
+                      queued_jobs=self._scheduler.queued_count,
+                      subtitles=[dict(file=item['file'], language=item.get('language'),
+                                      name=item.get('name')) for item in tracks])
+
+        result.update(self._get_progress(status, state))
+        return result
+
+    def _get_progress(self, status, state):
+        """
+        gets the transcoding progress from given stream state.
+
+        :param str status: transcoding status.
+        :param dict state: current state of stream. it could be None.
+
+        :returns: dict(float percent: transcoded percentage of source,
+                       float speed: transcoding speed relative to playback,
+                       float eta: estimated remaining seconds of transcoding)
+        :rtype: dict
+        """
+
+        result = dict(percent=None, speed=None, eta=None)
+        if status == TranscodingStatusEnum.FINISHED:
+            result.update(percent=100.0, eta=0)
+
+        progress = (state or {}).get('progress')
+        if status != TranscodingStatusEnum.STARTED or not progress:
+            return result
+
+        duration = progress.get('duration')
+        current = progress.get('time')
+        speed = progress.get('speed')
+        result.update(speed=speed)
+        if not duration or current is None:
+            return result
+
+        remaining = max(duration - current, 0)
+        result.update(percent=round(min(current / duration, 1) * 100, 2))
+        if speed:
+            result.update(eta=round(remaining / speed, 1))
+
+        return result
+
+    def _is_warmup_time(self):
+        """
+        gets a value indicating that current time is inside warmup hours.
+
+        :rtype: bool
+        """
+
+        if self._warmup_start_hour is None or self._warmup_end_hour is None:
+            return True
+
+        hour = datetime_services.now().hour
+        if self._warmup_start_hour <= self._warmup_end_hour:
+            return self._warmup_start_hour <= hour < self._warmup_end_hour
+
+        return hour >= self._warmup_start_hour or hour < self._warmup_end_hour
+
+    def _get_load(self):
+        """
+        gets the average cpu load of this host per core for the last minute.
+
+        it returns None if it could not be determined on current platform.
+
+        :rtype: float
+        """
+
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return None
+
+    def _get_warmup_budget(self):
+        """
+        gets the number of warmups which could be submitted now.
+
+        warmups are only submitted if no requested stream is waiting in queue,
+        the cpu load is under `max_load` and there are free transcoding slots.
+
+        :rtype: int
+        """
+
+        if self._scheduler.queued_count > 0:
+            return 0
+
+        if self._warmup_max_load is not None:
+            load = self._get_load()
+            if load is not None and load > self._warmup_max_load:
+                return 0
+
+        with self._warmup_lock:
+            self._warmups = set(item for item in self._warmups
+                                if self._scheduler.contains(item))
+            budget = (self._warmup_max_jobs or 1) - len(self._warmups)
+
+        max_jobs = self._scheduler.max_jobs
+        if max_jobs is not None and max_jobs > 0:
+            budget = min(budget, max_jobs - self._scheduler.running_count)
+
+        return max(budget, 0)
+
+    def _get_warmup_candidates(self):
+        """
+        gets the ids of movies which are likely to be played soon.
+
+        movies in watch later list come first, then recently collected
+        movies and then movies with high resolutions which are slow to
+        transcode. watched movies are excluded from the last two.
+
+        :rtype: list[uuid.UUID]
+        """
 
-        if self._is_finished(directory):
-            return TranscodingStatusEnum.FINISHED
+        store = get_current_store()
+        queries = [store.query(WatchLaterEntity.movie_id)
+                   .order_by(WatchLaterEntity.created_on.desc())]
 
-        if self._is_started(directory):
-            return TranscodingStatusEnum.STARTED
+        if self._warmup_recent_days is not None:
+            since = datetime_services.now() - timedelta(days=self._warmup_recent_days)
+            queries.append(store.query(MovieEntity.id)
+                           .filter(MovieEntity.created_on >= since,
+                                   MovieEntity.is_watched == False)
+                           .order_by(MovieEntity.created_on.desc()))
 
-        return TranscodingStatusEnum.NOT_AVAILABLE
+        if self._warmup_min_resolution is not None:
+            queries.append(store.query(MovieEntity.id)
+                           .filter(MovieEntity.resolution >= self._warmup_min_resolution,
+                                   MovieEntity.is_watched == False)
+                           .order_by(MovieEntity.created_on.desc()))
+
+        result = []
+        for query in queries:
+            for movie_id, in query.limit(self._warmup_limit).all():
+                if movie_id not in result:
+                    result.append(movie_id)
+
+        return result
+
+    def warmup(self, **options):
+        """
+        pre-transcodes streams of movies which are likely to be played soon.
+
+        it only submits warmups inside warmup hours and within the cpu budget.
+        warmups are transcoded with low priority, so requested streams are
+        always started first. movies which already have a stream are skipped.
+
+        :returns: dict(int submitted: number of submitted warmups)
+        :rtype: dict
+        """
+
+        submitted = 0
+        if self._is_warmup_time() is not True:
+            return dict(submitted=submitted)
+
+        budget = self._get_warmup_budget()
+        if budget <= 0:
+            return dict(submitted=submitted)
+
+        try:
+            candidates = self._get_warmup_candidates()
+        finally:
+            get_current_store().close()
+
+        for movie_id in candidates:
+            if submitted >= budget:
+                break
+
+            stream_path = self._get_stream_path(movie_id)
+            if self.get_status(stream_path) != TranscodingStatusEnum.NOT_AVAILABLE:
+                continue
+
+            try:
+                self._transcode(movie_id, priority=TranscodingPriorityEnum.LOW,
+                                wait=False, warmup=True)
+            except Exception as error:
+                self.LOGGER.warning('Warmup of movie [{movie_id}] could not be '
+                                    'started: [{error}]'.format(movie_id=movie_id,
+                                                                error=str(error)))
+                continue
+
+            with self._warmup_lock:
+                self._warmups.add(stream_path)
+
+            submitted += 1
+
+        if submitted > 0:
+            self.LOGGER.info('Stream warmup submitted [{submitted}] movies.'
+                             .format(submitted=submitted))
+
+        return dict(submitted=submitted)
+
+    def evict(self, **options):
+        """
+        removes old streams from stream directory.
+
+        streams which are not accessed for `max_idle` hours will be removed, and
+        then least recently accessed streams will be removed until the total size
+        is under `max_size`. streams which are being transcoded or are queued will
+        never be removed, but running transcodings which are not accessed for
+        `orphan_timeout` minutes will be stopped to be removed on next runs.
+        running warmups are not considered orphaned.
+
+        :returns: dict(int removed: number of removed streams,
+                       int stopped: number of stopped orphaned transcodings,
+                       int freed: freed disk space in bytes)
+        :rtype: dict
+        """
+
+        now = time.time()
+        total_size = 0
+        stopped = 0
+        candidates = []
+        for directory in self._storage.get_streams():
+            try:
+                size = self._get_directory_size(directory)
+                access_time = self._get_access_time(directory)
+            except OSError:
+                continue
+
+            total_size += size
+            idle = now - access_time
+            status = self.get_status(directory)
+            if status == TranscodingStatusEnum.QUEUED:
+                continue
+
+            if status == TranscodingStatusEnum.STARTED:
+                # warmups are never accessed while transcoding, so they are not orphaned.
+                if self._orphan_timeout is not None and idle > self._orphan_timeout * 60 \
+                        and (self._get_state(directory) or {}).get('warmup') is not True:
+                    if self._stop_orphan(directory, idle) is True:
+                        stopped += 1
+                continue
+
+            candidates.append((access_time, size, directory))
+
+        max_size = None
+        if self._max_size is not None:
+            max_size = self._max_size * 1024 * 1024
+
+        removed = 0
+        freed = 0
+        for access_time, size, directory in sorted(candidates):
+            is_idle = self._max_idle is not None and now - access_time > self._max_idle * 3600
+            is_oversize = max_size is not None and total_size > max_size
+            if not is_idle and not is_oversize:
+                break
+
+            if self._remove_stream(directory) is True:
+                removed += 1
+                freed += size
+                total_size -= size
+
+        if removed > 0 or stopped > 0:
+            self.LOGGER.info('Stream eviction removed [{removed}] streams, freed [{freed}] '
+                             'bytes and stopped [{stopped}] orphaned transcodings.'
+                             .format(removed=removed, freed=freed, stopped=stopped))
+
+        return dict(removed=removed, stopped=stopped, freed=freed)
+
+    def spill(self, **options):
+        """
+        spills the files of all streams from memory to stream directory.
+
+        only the latest segments of active streams are kept in memory.
+        it does nothing if streams are not stored in memory.
+        """
+
+        for directory in self._storage.get_streams():
+            self._spill_stream(directory)
+
+    def start_background_tasks(self):
+        """
+        starts background tasks of streaming, like access time flush, spill, eviction and warmup.
+        """
+
+        if self._access_flush_task is not None:
+            self._access_flush_task.start()
+
+        if self._spill_task is not None:
+            self._spill_task.start()
+
+        if self._eviction_task is not None:
+            self._eviction_task.start()
+
+        if self._warmup_task is not None:
+            self._warmup_task.start()
+
+    def stop_background_tasks(self):
+        """
+        stops background tasks of streaming.
+
+        it also flushes all pending access times to disk.
+        """
+
+        if self._warmup_task is not None:
+            self._warmup_task.stop(timeout=5)
+
+        if self._eviction_task is not None:
+            self._eviction_task.stop(timeout=5)
+
+        if self._spill_task is not None:
+            self._spill_task.stop(timeout=5)
+
+        if self._access_flush_task is not None:
+            self._access_flush_task.stop(timeout=5)
+
+        self.flush_access_times()
+
+    def get_metrics(self, **options):
+        """
+        gets streaming performance metrics.
+
+        :returns: dict(dict time_to_manifest: dict(int count: number of measured requests,
+                                                   float last: last wait time in seconds,
+                                                   float average: average wait time in seconds,
+                                                   float max: maximum wait time in seconds),
+                       dict encoder: dict(str resolution: dict(str preset: current preset name,
+                                                               float speed: last measured speed)),
+                       dict storage: dict(str backend: storage backend name,
+                                          int streams: number of streams in memory,
+                                          int size: total size of files in memory in bytes))
+        :rtype: dict
+        """
+
+        times = list(self._manifest_wait_times)
+        time_to_manifest = dict(count=len(times), last=None, average=None, max=None)
+        if len(times) > 0:
+            time_to_manifest.update(last=round(times[-1], 3),
+                                    average=round(sum(times) / len(times), 3),
+                                    max=round(max(times), 3))
+
+        encoder = None
+        if self._encoder is not None:
+            encoder = self._encoder.get_stats()
+
+        return dict(time_to_manifest=time_to_manifest, encoder=encoder,
+                    storage=self._storage.get_stats())
+
+    def set_queued(self, directory):
+        """
+        sets the given stream as queued for transcoding by current process.
+
+        :param str directory: directory path of stream.
+
+        :raises StreamDirectoryNotExistedError: stream directory not existed error.
+        """
+
+        self._set_status(directory, TranscodingStatusEnum.QUEUED, owner=os.getpid())
 
     def set_started(self, directory):
         """
@@ -423,7 +1725,7 @@ class StreamingManager(Manager):
         :raises StreamDirectoryNotExistedError: stream directory not existed error.
         """
 
-        self._set_status(directory, TranscodingStatusEnum.STARTED)
+        self._set_status(directory, TranscodingStatusEnum.STARTED, owner=None)
 
     def set_finished(self, directory):
         """
@@ -458,30 +1760,85 @@ class StreamingManager(Manager):
         :raises StreamDirectoryNotExistedError: stream directory not existed error.
         """
 
-        if not self.exists(directory):
-            raise StreamDirectoryNotExistedError('Stream directory [{directory}] does not exist.'
-                                                 .format(directory=directory))
+        self._update_state(directory, pid=process_id)
 
-        file_name = os.path.join(directory, 'pid')
-        with open(file_name, mode='w') as file:
-            file.write(str(process_id))
+    def set_progress(self, directory, **progress):
+        """
+        sets the transcoding progress of given stream.
+
+        :param str directory: directory path of stream.
+
+        :keyword int frame: number of transcoded frames.
+        :keyword float fps: transcoding frames per second.
+        :keyword float time: transcoded time of source in seconds.
+        :keyword float speed: transcoding speed relative to playback.
+        :keyword float duration: source duration in seconds.
+
+        :raises StreamDirectoryNotExistedError: stream directory not existed error.
+        """
+
+        self._update_state(directory, progress=progress)
+
+    def get_seek_segment(self, directory):
+        """
+        gets the segment index which just-in-time transcoding of given stream must start from.
+
+        :param str directory: directory path of stream.
+
+        :rtype: int
+        """
+
+        state = self._get_state(directory) or {}
+        return state.get('seek') or 0
 
-    def set_access_time(self, directory):
+    def set_access_time(self, directory, **options):
         """
         sets the last access time for given stream.
 
+        access times are kept in memory and will be flushed to disk periodically,
+        so this could be called on every segment request without touching the disk.
+
         :param str directory: directory path of stream.
 
+        :keyword bool persist: write the access time to disk immediately.
+                               this must be used by transcoding processes
+                               because their memory is not shared with the
+                               application. defaults to False if not provided.
+
         :raises StreamDirectoryNotExistedError: stream directory not existed error.
         """
 
-        if not self.exists(directory):
+        with self._access_lock:
+            is_tracked = directory in self._access_times
+
+        if not is_tracked and not self.exists(directory):
             raise StreamDirectoryNotExistedError('Stream directory [{directory}] does not exist.'
                                                  .format(directory=directory))
 
-        file_name = os.path.join(directory, 'access')
-        with open(file_name, mode='w') as file:
-            file.write(str(time.time()))
+        access_time = time.time()
+        if options.get('persist', False) is True:
+            self._write_access_time(directory, access_time)
+            return
+
+        with self._access_lock:
+            self._access_times[directory] = access_time
+
+    def flush_access_times(self):
+        """
+        writes all in-memory access times of streams to disk.
+
+        access times of streams which no longer exist will be discarded.
+        """
+
+        with self._access_lock:
+            access_times = self._access_times
+            self._access_times = dict()
+
+        for directory, access_time in access_times.items():
+            try:
+                self._write_access_time(directory, access_time)
+            except OSError:
+                continue
 
     def start_stream(self, movie_id, **options):
         """
@@ -495,15 +1852,66 @@ class StreamingManager(Manager):
         :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
         :raises MovieFileNotFoundError: movie file not found error.
         :raises MultipleMovieFilesFoundError: multiple movie files found error.
+        :raises StreamIsQueuedError: stream is queued error.
         :raises StreamDoesNotExistError: stream does not exist error.
 
         :rtype: bytes
         """
 
+        # these are only set by internal callers, so clients could not
+        # jump the queue or start a stream which is considered as warmup.
+        for name in ('priority', 'wait', 'warmup'):
+            options.pop(name, None)
+
         directory, file = self._transcode(movie_id, **options)
         self.set_access_time(directory)
         return self._send_stream(directory, file)
 
+    def direct_play(self, movie_id, **options):
+        """
+        sends the original file of given movie if client could play it.
+
+        the container and codecs of the file are checked against client
+        capabilities and the file is sent as is with range request support,
+        so no transcoding is involved. if the file could not be played by
+        client, an error will be raised and client must use `start_stream`.
+
+        :param uuid.UUID movie_id: movie id to be played.
+
+        :keyword str directory: movie directory path.
+                                it will only be used if more than
+                                one directory found for given movie.
+
+        :keyword str file: movie file path.
+                           it will only be used if more than
+                           one file found for given movie.
+
+        :keyword list[str] | str containers: containers which client could play.
+        :keyword list[str] | str video_codecs: video codecs which client could play.
+        :keyword list[str] | str audio_codecs: audio codecs which client could play.
+
+        :raises MovieDirectoryNotFoundError: movie directory not found error.
+        :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
+        :raises MovieFileNotFoundError: movie file not found error.
+        :raises MultipleMovieFilesFoundError: multiple movie files found error.
+        :raises DirectPlayNotSupportedError: direct play not supported error.
+
+        :rtype: bytes
+        """
+
+        if self._direct_play is not True:
+            raise DirectPlayNotSupportedError(_('Direct play is disabled.'))
+
+        movie_file = self._get_movie_path(movie_id, **options)[1]
+        unsupported = self._get_unsupported(self._get_media_info(movie_file), **options)
+        if len(unsupported) > 0:
+            raise DirectPlayNotSupportedError(_('Movie [{movie_id}] could not be '
+                                                'played directly by client.')
+                                              .format(movie_id=movie_id),
+                                              data=dict(unsupported=unsupported))
+
+        return self._sender.send_file(movie_file)
+
     def continue_stream(self, movie_id, file, **options):
         """
         continues the streaming of given movie.
@@ -511,6 +1919,7 @@ class StreamingManager(Manager):
         :param uuid.UUID movie_id: movie id to be streamed.
         :param str file: stream file name to be returned.
 
+        :raises StreamIsQueuedError: stream is queued error.
         :raises StreamDoesNotExistError: stream does not exist error.
 
         :rtype: bytes
@@ -518,4 +1927,5 @@ class StreamingManager(Manager):
 
         directory = self._get_stream_path(movie_id)
         self.set_access_time(directory)
+        self._ensure_segment(movie_id, directory, file)
         return self._send_stream(directory, file)
@@ -4,18 +4,27 @@ streaming providers base module.
 """
 
 import os
+import math
+import time
+import subprocess
 
+from threading import Thread
+from collections import deque
 from multiprocessing import Process
 
 import ffmpeg
 
 import pyrin.logging.services as logging_services
-import pyrin.utils.path as path_utils
+
+from pyrin.core.exceptions import CoreNotImplementedError
 
 import charma.streaming.services as stream_services
+import charma.subtitles.services as subtitle_services
 
 from charma.streaming.enumerations import TranscoderPresetEnum
 from charma.streaming.interface import AbstractStreamProvider
+from charma.streaming.exceptions import StreamDirectoryNotExistedError
+from charma.subtitles.exceptions import SubtitleDecodeError
 
 
 class StreamProviderBase(AbstractStreamProvider):
@@ -49,6 +58,44 @@ class StreamProviderBase(AbstractStreamProvider):
     # output file name.
     _output_file = None
 
+    # pixel formats which could be streamed without re-encoding.
+    _copy_pixel_formats = ('yuv420p', 'yuvj420p')
+
+    # specifies that all renditions of adaptive output share a single audio stream.
+    # if set to False, the audio will be mapped once for each rendition.
+    _shared_audio = True
+
+    # forces a keyframe every 2 seconds on all renditions of adaptive output, so
+    # segments of different renditions are aligned and clients could switch between them.
+    _ladder_keyframes = 'expr:gte(t,n_forced*2)'
+
+    # segment file name of just-in-time output. it must contain an `index` placeholder.
+    # providers which do not support just-in-time transcoding must keep it None.
+    _segment_file = None
+
+    # ffmpeg pattern of segment file names of just-in-time output.
+    _segment_pattern = None
+
+    # file name which ffmpeg writes its own manifest into for just-in-time output.
+    # it must differ from the output file, because that one is generated up front.
+    _jit_output_file = None
+
+    # a regex to extract the segment index from segment file names of just-in-time output.
+    _segment_regex = None
+
+    # how many seconds to wait between each check for seek requests
+    # while a just-in-time transcoding is running.
+    _seek_check_interval = 0.5
+
+    # how many lines of the latest ffmpeg errors must be kept while transcoding.
+    _error_lines = 50
+
+    # minimum number of seconds between each progress report of transcoding.
+    _progress_interval = 2
+
+    # webvtt file name of each subtitle track. it must contain an `index` placeholder.
+    _subtitle_file = 'subtitle_{index}.vtt'
+
     def _get_transcoding_configs(self):
         """
         gets a dict containing custom transcoding configs.
@@ -60,6 +107,96 @@ class StreamProviderBase(AbstractStreamProvider):
 
         return dict()
 
+    def _get_ladder_configs(self, count):
+        """
+        gets a dict containing custom transcoding configs for adaptive output.
+
+        this method is intended to be overridden in subclasses.
+
+        :param int count: number of renditions.
+
+        :rtype: dict
+        """
+
+        return dict()
+
+    def _get_jit_configs(self, output_directory, start_segment, segment_duration):
+        """
+        gets a dict containing custom transcoding configs for just-in-time output.
+
+        this method is intended to be overridden in subclasses
+        which support just-in-time transcoding.
+
+        :param str output_directory: output directory path.
+        :param int start_segment: index of the first segment to be produced.
+        :param float segment_duration: duration of each segment in seconds.
+
+        :rtype: dict
+        """
+
+        return dict()
+
+    def _write_manifest(self, output_directory, durations):
+        """
+        writes the complete manifest of a just-in-time output.
+
+        this method is intended to be overridden in subclasses
+        which support just-in-time transcoding.
+
+        :param str output_directory: output directory path.
+        :param list[float] durations: duration of each segment in seconds.
+
+        :raises CoreNotImplementedError: core not implemented error.
+        """
+
+        raise CoreNotImplementedError()
+
+    def _write_subtitle_manifests(self, input_file, output_directory, tracks):
+        """
+        writes a separate manifest for each of given subtitle tracks.
+
+        this method is intended to be overridden in subclasses which
+        could only reference subtitle tracks through their own manifests.
+        the manifest file name of each track must be set in its `manifest` key.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+        :param list[dict] tracks: subtitle tracks.
+        """
+        pass
+
+    def _read_manifest(self, output_directory, file):
+        """
+        reads the content of given manifest file.
+
+        it returns None if the file does not exist.
+
+        :param str output_directory: output directory path.
+        :param str file: manifest file name.
+
+        :rtype: str
+        """
+
+        try:
+            with open(os.path.join(output_directory, file), encoding='utf-8') as manifest:
+                return manifest.read()
+        except FileNotFoundError:
+            return None
+
+    def _get_ladder_output_path(self, output_directory, **options):
+        """
+        gets output file name for adaptive output.
+
+        this method is intended to be overridden in subclasses
+        which write each rendition into a separate manifest.
+
+        :param str output_directory: output directory path.
+
+        :rtype: str
+        """
+
+        return self._get_output_path(output_directory, **options)
+
     def _get_output_path(self, output_directory, **options):
         """
         gets output file name.
@@ -85,54 +222,383 @@ class StreamProviderBase(AbstractStreamProvider):
 
         return value.decode('utf-8')
 
-    def _get_subtitle_file(self, output_directory, **options):
+    def _get_codecs(self, input_file):
         """
-        gets the subtitle file path from inputs.
+        gets the codecs of the first video and audio streams of given file.
 
-        it may return None if no subtitle file is available.
+        each value may be None if it could not be detected.
+
+        :param str input_file: file path to be probed.
+
+        :returns: dict(str video: video codec name,
+                       str audio: audio codec name,
+                       str pixel_format: video pixel format,
+                       int height: video height)
+        :rtype: dict
+        """
 
+        result = dict(video=None, audio=None, pixel_format=None, height=None)
+        try:
+            info = ffmpeg.probe(input_file)
+        except ffmpeg.Error as error:
+            self.LOGGER.warning('Probing failed for file [{file}]: [{details}]'
+                                .format(file=input_file, details=self._decode(error.stderr)))
+            return result
+
+        for item in info.get('streams', []):
+            codec_type = item.get('codec_type')
+            disposition = item.get('disposition') or {}
+            if codec_type == 'video' and result['video'] is None \
+                    and disposition.get('attached_pic') != 1:
+                result.update(video=item.get('codec_name'), pixel_format=item.get('pix_fmt'),
+                              height=item.get('height'))
+
+            elif codec_type == 'audio' and result['audio'] is None:
+                result.update(audio=item.get('codec_name'))
+
+        return result
+
+    def _is_copy_compatible(self, codecs):
+        """
+        gets a value indicating that streams with given codecs could be copied as is.
+
+        :param dict codecs: codecs of the source file.
+
+        :rtype: bool
+        """
+
+        return codecs.get('video') == self._video_codec \
+            and codecs.get('audio') == self._audio_codec \
+            and codecs.get('pixel_format') in self._copy_pixel_formats
+
+    def _get_duration(self, input_file):
+        """
+        gets the duration of given file in seconds.
+
+        it returns None if the duration could not be detected.
+
+        :param str input_file: file path to be probed.
+
+        :rtype: float
+        """
+
+        try:
+            info = ffmpeg.probe(input_file)
+            return float(info['format']['duration'])
+        except ffmpeg.Error as error:
+            self.LOGGER.warning('Probing failed for file [{file}]: [{details}]'
+                                .format(file=input_file, details=self._decode(error.stderr)))
+            return None
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _get_renditions(self, ladder, height):
+        """
+        gets the renditions of given ladder which are not larger than source video.
+
+        if no rendition fits the source height, the smallest one will be returned.
+
+        :param list[tuple[int, str]] ladder: renditions of adaptive output.
+        :param int height: source video height. it could be None if not detected.
+
+        :returns: list[tuple[int height, str video_bitrate]]
+        :rtype: list[tuple[int, str]]
+        """
+
+        renditions = sorted(ladder, key=lambda item: item[0], reverse=True)
+        if not height:
+            return renditions
+
+        result = [item for item in renditions if item[0] <= height]
+        return result or renditions[-1:]
+
+    def _get_ladder_stream(self, video, audio, output_directory, renditions, **options):
+        """
+        gets the ffmpeg output stream of adaptive output for given video and audio.
+
+        the source video is decoded once and then split and scaled
+        into all renditions inside a single ffmpeg invocation.
+
+        :param ffmpeg.nodes.Stream video: source video stream.
+        :param ffmpeg.nodes.Stream audio: source audio stream.
         :param str output_directory: output directory path.
+        :param list[tuple[int, str]] renditions: renditions to be produced.
 
-        :keyword list[str] subtitles: subtitle file paths.
+        :keyword int threads: number of threads to be used.
+        :keyword str preset: transcoding preset name.
+        :keyword str audio_bitrate: audio bitrate of adaptive output.
 
-        :rtype: str
+        :rtype: ffmpeg.nodes.OutputStream
         """
 
-        subtitles = options.get('subtitles')
-        if subtitles:
-            original_subtitle = subtitles[0]
-            if not os.path.exists(original_subtitle):
-                return None
+        preset = options.get('preset') or self._default_preset
+        threads = options.get('threads') or self._default_threads
+        split = video.filter_multi_output('split', len(renditions))
+        configs = dict()
+        streams = []
+        if self._shared_audio is True:
+            streams.append(audio)
+
+        for index, (height, bitrate) in enumerate(renditions):
+            streams.append(split.stream(index).filter('scale', -2, height))
+            if self._shared_audio is not True:
+                streams.append(audio)
+
+            configs['b:v:{index}'.format(index=index)] = bitrate
+
+        audio_bitrate = options.get('audio_bitrate')
+        if audio_bitrate is not None:
+            configs['b:a'] = audio_bitrate
+
+        configs.update(self._get_transcoding_configs())
+        configs.update(self._get_ladder_configs(len(renditions)))
+        output_path = self._get_ladder_output_path(output_directory, **options)
+        return ffmpeg.output(*streams, output_path,
+                             threads=threads, preset=preset,
+                             format=self._format, vcodec=self._video_codec,
+                             acodec=self._audio_codec, sc_threshold=0,
+                             force_key_frames=self._ladder_keyframes, **configs)
+
+    def _get_stream(self, input_file, output_directory, **options):
+        """
+        gets the ffmpeg output stream for given file.
 
-            name = os.path.join(output_directory, 'subtitle.srt')
-            path_utils.copy_file(original_subtitle, name)
-            return name
+        if the source codecs are compatible with this provider, the streams
+        will be copied as is. otherwise they will be re-encoded. if a ladder
+        is provided, an adaptive output with multiple renditions will be
+        produced and remux will be bypassed.
 
-        return None
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+
+        :keyword int threads: number of threads to be used.
+        :keyword str preset: transcoding preset name.
+        :keyword bool remux: copy the source streams if they are compatible.
+                             defaults to True if not provided.
+        :keyword list[tuple[int, str]] ladder: renditions of adaptive output.
+                                               each item is a tuple of video height
+                                               and video bitrate. if not provided,
+                                               a single rendition will be produced.
+
+        :keyword str audio_bitrate: audio bitrate of adaptive output.
+
+        :rtype: ffmpeg.nodes.OutputStream
+        """
+
+        preset = options.get('preset') or self._default_preset
+        threads = options.get('threads') or self._default_threads
+        remux = options.get('remux', True)
+        ladder = options.get('ladder')
+
+        stream = ffmpeg.input(input_file)
+        audio = stream.audio
+        output_path = self._get_output_path(output_directory, **options)
+        if ladder:
+            height = self._get_codecs(input_file).get('height')
+            renditions = self._get_renditions(ladder, height)
+            return self._get_ladder_stream(stream.video, audio, output_directory,
+                                           renditions, **options)
+
+        if remux is not False \
+                and self._is_copy_compatible(self._get_codecs(input_file)) is True:
+            self.LOGGER.info('Remuxing file [{file}] without re-encoding.'
+                             .format(file=input_file))
+            return ffmpeg.output(audio, stream.video, output_path,
+                                 format=self._format, vcodec='copy', acodec='copy',
+                                 **self._get_transcoding_configs())
+
+        return ffmpeg.output(audio, stream, output_path,
+                             loop=0, threads=threads, preset=preset,
+                             format=self._format, vcodec=self._video_codec,
+                             acodec=self._audio_codec, scodec=self._subtitle_codec,
+                             **self._get_transcoding_configs())
 
-    def _transcode(self, stream, input_file, output_directory, **options):
+    def _get_jit_stream(self, input_file, output_directory, start_segment, **options):
         """
-        transcodes the given stream.
+        gets the ffmpeg output stream of just-in-time output for given file.
+
+        ffmpeg seeks to the start of given segment before decoding, so the
+        time to produce a segment does not depend on its position in the file.
+        the source timestamps are kept, so segments of different runs fit
+        together and match the times of subtitle tracks.
 
-        :param ffmpeg.nodes.OutputStream stream: stream to be transcoded.
         :param str input_file: file path to be transcoded.
         :param str output_directory: output directory path.
+        :param int start_segment: index of the first segment to be produced.
+
+        :keyword float segment_duration: duration of each segment in seconds.
+        :keyword int threads: number of threads to be used.
+        :keyword str preset: transcoding preset name.
+
+        :rtype: ffmpeg.nodes.OutputStream
         """
 
-        stream_services.set_started(output_directory)
-        stream_services.set_access_time(output_directory)
-        process = ffmpeg.run_async(stream,
-                                   overwrite_output=True,
-                                   pipe_stderr=True, pipe_stdout=True)
+        preset = options.get('preset') or self._default_preset
+        threads = options.get('threads') or self._default_threads
+        segment_duration = options.get('segment_duration')
+        start = start_segment * segment_duration
+
+        input_options = dict()
+        if start > 0:
+            input_options.update(ss=start)
+
+        stream = ffmpeg.input(input_file, **input_options)
+        audio = stream.audio
+        video = stream.video
+
+        # keyframes must be forced on segment boundaries of the
+        # manifest, otherwise segments will not have the expected times.
+        key_frames = 'expr:gte(t,{start}+n_forced*{duration})'.format(start=start,
+                                                                       duration=segment_duration)
+        configs = self._get_transcoding_configs()
+        configs.update(self._get_jit_configs(output_directory, start_segment, segment_duration))
+        output_path = os.path.join(output_directory, self._jit_output_file)
+        return ffmpeg.output(audio, video, output_path,
+                             threads=threads, preset=preset, copyts=None,
+                             format=self._format, vcodec=self._video_codec,
+                             acodec=self._audio_codec, sc_threshold=0,
+                             force_key_frames=key_frames, **configs)
+
+    def _read_errors(self, process, errors):
+        """
+        reads the error output of given ffmpeg process until it ends.
+
+        only the latest lines will be kept in given errors.
+
+        :param subprocess.Popen process: ffmpeg process.
+        :param deque errors: a deque to keep the latest error lines.
+        """
+
+        for line in process.stderr:
+            errors.append(self._decode(line).rstrip())
+
+    def _to_number(self, value, type_):
+        """
+        converts the given ffmpeg progress value to a number.
+
+        it returns None if the value is not available.
+
+        :param str value: value to be converted.
+        :param type type_: number type to convert to.
+
+        :rtype: int | float
+        """
+
+        if value is None:
+            return None
+
+        try:
+            return type_(value.rstrip('x'))
+        except ValueError:
+            return None
+
+    def _get_progress(self, values, duration):
+        """
+        gets the progress info from given ffmpeg progress values.
+
+        :param dict values: latest ffmpeg progress values.
+        :param float duration: source duration in seconds.
+
+        :returns: dict(int frame: number of transcoded frames,
+                       float fps: transcoding frames per second,
+                       float time: transcoded time of source in seconds,
+                       float speed: transcoding speed relative to playback,
+                       float duration: source duration in seconds)
+        :rtype: dict
+        """
+
+        # 'out_time_ms' is in microseconds too, it is kept for older ffmpeg versions.
+        out_time = self._to_number(values.get('out_time_us', values.get('out_time_ms')), int)
+        current = None
+        if out_time is not None:
+            current = round(out_time / 1000000, 3)
+
+        return dict(frame=self._to_number(values.get('frame'), int),
+                    fps=self._to_number(values.get('fps'), float),
+                    time=current,
+                    speed=self._to_number(values.get('speed'), float),
+                    duration=duration)
+
+    def _read_progress(self, process, output_directory, duration):
+        """
+        reads the progress output of given ffmpeg process until it ends.
+
+        progress is stored in stream state incrementally and at most once
+        per `_progress_interval` seconds, except for the last report.
+
+        :param subprocess.Popen process: ffmpeg process.
+        :param str output_directory: output directory path.
+        :param float duration: source duration in seconds.
+        """
+
+        values = dict()
+        reported_on = 0
+        for line in process.stdout:
+            key, separator, value = self._decode(line).strip().partition('=')
+            if separator == '':
+                continue
+
+            values[key] = value
+            if key != 'progress':
+                continue
+
+            now = time.monotonic()
+            if value == 'end' or now - reported_on >= self._progress_interval:
+                reported_on = now
+                try:
+                    stream_services.set_progress(output_directory,
+                                                 **self._get_progress(values, duration))
+                except (StreamDirectoryNotExistedError, OSError):
+                    pass
+
+    def _start_process(self, stream, output_directory, duration):
+        """
+        starts ffmpeg for given output stream.
+
+        ffmpeg reports its progress through its standard output, and both
+        outputs are consumed by background threads while ffmpeg is running,
+        so memory usage does not grow with the length of the file.
+
+        :param ffmpeg.nodes.OutputStream stream: ffmpeg output stream.
+        :param str output_directory: output directory path.
+        :param float duration: source duration in seconds.
+
+        :returns: tuple[subprocess.Popen process,
+                        deque errors,
+                        list[Thread] readers]
+        :rtype: tuple[subprocess.Popen, deque, list[Thread]]
+        """
+
+        stream = stream.global_args('-progress', 'pipe:1', '-nostats')
+        process = ffmpeg.run_async(stream, overwrite_output=True,
+                                   pipe_stdout=True, pipe_stderr=True)
         stream_services.set_process_id(output_directory, process.pid)
-        stdout, stderr = process.communicate()
-        return_code = process.poll()
-        if stdout:
-            self.LOGGER.info('Transcoding info for file [{file}]: [{details}]'
-                             .format(file=input_file, details=self._decode(stdout)))
-
-        if return_code:
-            error = self._decode(stderr)
+        errors = deque(maxlen=self._error_lines)
+        readers = [Thread(target=self._read_errors, args=(process, errors), daemon=True),
+                   Thread(target=self._read_progress,
+                          args=(process, output_directory, duration), daemon=True)]
+
+        for reader in readers:
+            reader.start()
+
+        return process, errors, readers
+
+    def _finish(self, input_file, output_directory, process, errors, readers):
+        """
+        sets the final status of given finished ffmpeg process.
+
+        :param str input_file: file path which has been transcoded.
+        :param str output_directory: output directory path.
+        :param subprocess.Popen process: finished ffmpeg process.
+        :param deque errors: latest error lines of ffmpeg.
+        :param list[Thread] readers: output reader threads of ffmpeg.
+        """
+
+        for reader in readers:
+            reader.join()
+
+        if process.returncode:
+            error = '\n'.join(errors)
             stream_services.set_failed(output_directory, error)
             self.LOGGER.error('Transcoding failed for file [{file}]: [{details}]'
                               .format(file=input_file, details=error))
@@ -141,6 +607,122 @@ class StreamProviderBase(AbstractStreamProvider):
             self.LOGGER.info('Transcoding finished for file [{file}].'
                              .format(file=input_file))
 
+    def _wait_for_seek(self, process, output_directory, start_segment):
+        """
+        waits for given ffmpeg process to finish or a seek to be requested.
+
+        if a seek to another segment is requested, the process will be
+        terminated and the requested segment index will be returned.
+        otherwise it returns None after the process has been finished.
+
+        :param subprocess.Popen process: ffmpeg process.
+        :param str output_directory: output directory path.
+        :param int start_segment: index of the first segment of current run.
+
+        :rtype: int
+        """
+
+        while True:
+            try:
+                process.wait(self._seek_check_interval)
+                return None
+            except subprocess.TimeoutExpired:
+                pass
+
+            seek_segment = stream_services.get_seek_segment(output_directory)
+            if seek_segment != start_segment:
+                process.terminate()
+                process.wait()
+                return seek_segment
+
+    def _transcode_jit(self, input_file, output_directory, **options):
+        """
+        transcodes the given file just-in-time.
+
+        it starts from the segment which is requested for this stream and
+        restarts ffmpeg whenever a seek to another segment is requested.
+        segments which are already produced will be kept.
+
+        this method will be executed in a separate process.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+
+        :keyword float segment_duration: duration of each segment in seconds.
+        :keyword int threads: number of threads to be used.
+        :keyword str preset: transcoding preset name.
+        """
+
+        start_segment = stream_services.get_seek_segment(output_directory)
+        duration = self._get_duration(input_file)
+        while True:
+            try:
+                stream = self._get_jit_stream(input_file, output_directory,
+                                              start_segment, **options)
+            except Exception as error:
+                stream_services.set_failed(output_directory, str(error))
+                self.LOGGER.exception('Transcoding could not be started for file [{file}]: '
+                                      '[{details}]'.format(file=input_file, details=str(error)))
+                return
+
+            process, errors, readers = self._start_process(stream, output_directory,
+                                                           duration)
+            seek_segment = self._wait_for_seek(process, output_directory, start_segment)
+            if seek_segment is None:
+                break
+
+            for reader in readers:
+                reader.join()
+
+            self.LOGGER.info('Transcoding of file [{file}] restarted from segment [{segment}].'
+                             .format(file=input_file, segment=seek_segment))
+            start_segment = seek_segment
+
+        self._finish(input_file, output_directory, process, errors, readers)
+
+    def _transcode(self, input_file, output_directory, **options):
+        """
+        transcodes the given file.
+
+        this method will be executed in a separate process.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+
+        :keyword int threads: number of threads to be used.
+        :keyword str preset: transcoding preset name.
+        :keyword bool remux: copy the source streams if they are compatible.
+                             defaults to True if not provided.
+        :keyword list[tuple[int, str]] ladder: renditions of adaptive output.
+                                               each item is a tuple of video height
+                                               and video bitrate. if not provided,
+                                               a single rendition will be produced.
+
+        :keyword str audio_bitrate: audio bitrate of adaptive output.
+        :keyword float segment_duration: duration of each segment in seconds.
+                                         if provided, the file will be transcoded
+                                         just-in-time and other options except
+                                         threads and preset are ignored.
+        """
+
+        stream_services.set_access_time(output_directory, persist=True)
+        if options.get('segment_duration') is not None:
+            self._transcode_jit(input_file, output_directory, **options)
+            return
+
+        try:
+            stream = self._get_stream(input_file, output_directory, **options)
+        except Exception as error:
+            stream_services.set_failed(output_directory, str(error))
+            self.LOGGER.exception('Transcoding could not be started for file [{file}]: '
+                                  '[{details}]'.format(file=input_file, details=str(error)))
+            return
+
+        duration = self._get_duration(input_file)
+        process, errors, readers = self._start_process(stream, output_directory, duration)
+        process.wait()
+        self._finish(input_file, output_directory, process, errors, readers)
+
     def transcode(self, input_file, output_directory, **options):
         """
         transcodes a video file to output folder.
@@ -148,30 +730,165 @@ class StreamProviderBase(AbstractStreamProvider):
         :param str input_file: file path to be transcoded.
         :param str output_directory: output directory path.
 
-        :keyword list[str] subtitles: subtitle file paths.
         :keyword int threads: number of threads to be used.
         :keyword str preset: transcoding preset name.
+        :keyword bool remux: copy the source streams if they are compatible.
+                             defaults to True if not provided.
+        :keyword list[tuple[int, str]] ladder: renditions of adaptive output.
+                                               each item is a tuple of video height
+                                               and video bitrate. if not provided,
+                                               a single rendition will be produced.
+
+        :keyword str audio_bitrate: audio bitrate of adaptive output.
+        :keyword float segment_duration: duration of each segment in seconds.
+                                         if provided, the file will be transcoded
+                                         just-in-time and other options except
+                                         threads and preset are ignored.
+
+        :returns: transcoding process.
+        :rtype: multiprocessing.Process
         """
 
-        preset = options.get('preset') or self._default_preset
-        threads = options.get('threads') or self._default_threads
+        # status must be set before starting the process, so concurrent
+        # requests will find this stream as started and will not restart it.
+        # if the process could not be started, the stream must be marked as
+        # failed, otherwise it would be reported as started until evicted.
+        stream_services.set_started(output_directory)
+        try:
+            process = Process(target=self._transcode,
+                              args=(input_file, output_directory),
+                              kwargs=options)
+            process.start()
+        except Exception as error:
+            stream_services.set_failed(output_directory, str(error))
+            raise error
+
+        return process
+
+    def create_manifest(self, input_file, output_directory, segment_duration):
+        """
+        writes the complete manifest of given file for just-in-time transcoding.
 
-        stream = ffmpeg.input(input_file)
-        audio = stream.audio
-        subtitle = self._get_subtitle_file(output_directory, **options)
-        if subtitle is not None:
-            stream = ffmpeg.filter(stream, 'subtitles', subtitle)
+        the manifest is generated from the source duration, so it references
+        all segments before they are produced. it returns the number of
+        segments, or None if the source duration could not be detected.
 
-        output_path = self._get_output_path(output_directory, **options)
-        stream = ffmpeg.output(audio, stream, output_path,
-                               loop=0, threads=threads, preset=preset,
-                               format=self._format, vcodec=self._video_codec,
-                               acodec=self._audio_codec, scodec=self._subtitle_codec,
-                               **self._get_transcoding_configs())
-
-        process = Process(target=self._transcode,
-                          args=(stream, input_file, output_directory))
-        process.start()
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+        :param float segment_duration: duration of each segment in seconds.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :rtype: int
+        """
+
+        if self._segment_file is None:
+            raise CoreNotImplementedError()
+
+        duration = self._get_duration(input_file)
+        if not duration:
+            return None
+
+        count = int(math.ceil(duration / segment_duration))
+        durations = [segment_duration] * (count - 1)
+        durations.append(duration - segment_duration * (count - 1))
+        self._write_manifest(output_directory, durations)
+        return count
+
+    def create_subtitles(self, input_file, output_directory, subtitles):
+        """
+        converts given subtitle files to webvtt tracks inside output directory.
+
+        subtitles are not burned into video, so each track could be selected
+        by client and the video could be copied without re-encoding. subtitle
+        files which could not be converted will be skipped.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+        :param list[str] subtitles: subtitle file paths.
+
+        :returns: list[dict(str file: webvtt file name,
+                            str manifest: manifest file name of the track,
+                            str language: language code of the track,
+                            str name: name of the track)]
+        :rtype: list[dict]
+        """
+
+        tracks = []
+        for subtitle in subtitles or []:
+            file = self._subtitle_file.format(index=len(tracks))
+            try:
+                subtitle_services.convert_to_webvtt(subtitle,
+                                                    os.path.join(output_directory, file))
+            except (SubtitleDecodeError, OSError) as error:
+                self.LOGGER.warning('Subtitle file [{file}] could not be converted: '
+                                    '[{details}]'.format(file=subtitle, details=str(error)))
+                continue
+
+            name = os.path.splitext(os.path.basename(subtitle))[0]
+            tracks.append(dict(file=file, manifest=None, name=name,
+                               language=subtitle_services.get_language(subtitle)))
+
+        if len(tracks) > 0:
+            self._write_subtitle_manifests(input_file, output_directory, tracks)
+
+        return tracks
+
+    def get_manifest(self, output_directory, file, tracks):
+        """
+        gets the content of given manifest file including given subtitle tracks.
+
+        the manifest which is written by ffmpeg does not reference subtitle
+        tracks, and it may be rewritten while transcoding, so tracks are
+        added whenever it is requested. it returns None if the file must
+        be sent as is.
+
+        this method is intended to be overridden in subclasses.
+
+        :param str output_directory: output directory path.
+        :param str file: requested file name.
+        :param list[dict] tracks: subtitle tracks.
+
+        :rtype: str
+        """
+
+        return None
+
+    def get_segment_file(self, index):
+        """
+        gets the segment file name of given index for just-in-time output.
+
+        :param int index: segment index.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :rtype: str
+        """
+
+        if self._segment_file is None:
+            raise CoreNotImplementedError()
+
+        return self._segment_file.format(index=index)
+
+    def get_segment_index(self, file):
+        """
+        gets the segment index of given file name for just-in-time output.
+
+        it returns None if the file is not a segment.
+
+        :param str file: file name.
+
+        :rtype: int
+        """
+
+        if self._segment_regex is None:
+            return None
+
+        match = self._segment_regex.fullmatch(file)
+        if match is None:
+            return None
+
+        return int(match.group(1))
 
     @property
     def name(self):
@@ -3,6 +3,10 @@
 streaming providers dash module.
 """
 
+import os
+
+from xml.sax.saxutils import escape, quoteattr
+
 from charma.streaming.decorators import stream
 from charma.streaming.providers.base import StreamProviderBase
 from charma.streaming.enumerations import TranscoderPresetEnum, VideoCodecEnum, \
@@ -23,3 +27,66 @@ class DASHStream(StreamProviderBase):
     _format = FormatEnum.DASH
     _default_threads = 2
     _output_file = 'dash.mpd'
+
+    def _get_ladder_configs(self, count):
+        """
+        gets a dict containing custom transcoding configs for adaptive output.
+
+        all video renditions are grouped into one adaptation set
+        and the audio into another one inside the same manifest.
+
+        :param int count: number of renditions.
+
+        :rtype: dict
+        """
+
+        return dict(adaptation_sets='id=0,streams=v id=1,streams=a')
+
+    def _get_text_adaptation_set(self, track):
+        """
+        gets an adaptation set which references given subtitle track.
+
+        :param dict track: subtitle track.
+
+        :rtype: str
+        """
+
+        return ('\t\t<AdaptationSet contentType="text" mimeType="text/vtt" lang={language}>\n'
+                '\t\t\t<Role schemeIdUri="urn:mpeg:dash:role:2011" value="subtitle"/>\n'
+                '\t\t\t<Representation id={id} bandwidth="256">\n'
+                '\t\t\t\t<BaseURL>{file}</BaseURL>\n'
+                '\t\t\t</Representation>\n'
+                '\t\t</AdaptationSet>\n').format(
+            language=quoteattr(track.get('language') or 'und'),
+            id=quoteattr(os.path.splitext(track['file'])[0]),
+            file=escape(track['file']))
+
+    def get_manifest(self, output_directory, file, tracks):
+        """
+        gets the content of given manifest file including given subtitle tracks.
+
+        each subtitle track is added as a text adaptation set at the end
+        of the period. it returns None if the file must be sent as is.
+
+        :param str output_directory: output directory path.
+        :param str file: requested file name.
+        :param list[dict] tracks: subtitle tracks.
+
+        :rtype: str
+        """
+
+        if file != self._output_file or not tracks:
+            return None
+
+        content = self._read_manifest(output_directory, file)
+        if content is None:
+            return None
+
+        position = content.rfind('</Period>')
+        if position < 0:
+            return None
+
+        # adaptation sets are inserted as separate lines before the closing tag.
+        position = content.rfind('\n', 0, position) + 1
+        adaptation_sets = ''.join(self._get_text_adaptation_set(item) for item in tracks)
+        return content[:position] + adaptation_sets + content[position:]
@@ -3,6 +3,10 @@
 streaming providers hls module.
 """
 
+import os
+import re
+import math
+
 from charma.streaming.decorators import stream
 from charma.streaming.providers.base import StreamProviderBase
 from charma.streaming.enumerations import TranscoderPresetEnum, VideoCodecEnum, \
@@ -23,3 +27,225 @@ class HLSStream(StreamProviderBase):
     _format = FormatEnum.HLS
     _default_threads = 2
     _output_file = 'hls.m3u8'
+    _shared_audio = False
+    _segment_file = 'segment_{index:05d}.ts'
+    _segment_pattern = 'segment_%05d.ts'
+    _segment_regex = re.compile(r'segment_(\d+)\.ts')
+    _jit_output_file = 'transcoder.m3u8'
+
+    # playlist name of each rendition of adaptive output.
+    # '%v' will be replaced with the rendition index by ffmpeg.
+    _variant_file = 'hls_%v.m3u8'
+
+    # playlist name of each subtitle track. it must contain an `index` placeholder.
+    _subtitle_playlist_file = 'subtitle_{index}.m3u8'
+
+    # name which the playlist written by ffmpeg is served by, when it is not a master
+    # playlist and a master playlist must be generated to reference subtitle tracks.
+    _media_file = 'media.m3u8'
+
+    # group id of subtitle tracks in master playlist.
+    _subtitle_group = 'subtitles'
+
+    # bandwidth of the only rendition of a generated master playlist. it is a nominal
+    # value, because the actual bitrate is not known before the transcoding ends.
+    _nominal_bandwidth = 5000000
+
+    def _get_ladder_configs(self, count):
+        """
+        gets a dict containing custom transcoding configs for adaptive output.
+
+        each rendition is written into its own playlist and a
+        master playlist references all of them.
+
+        :param int count: number of renditions.
+
+        :rtype: dict
+        """
+
+        stream_map = ' '.join('v:{index},a:{index}'.format(index=index)
+                              for index in range(count))
+
+        return dict(var_stream_map=stream_map, master_pl_name=self._output_file)
+
+    def _get_ladder_output_path(self, output_directory, **options):
+        """
+        gets output file name for adaptive output.
+
+        :param str output_directory: output directory path.
+
+        :rtype: str
+        """
+
+        return os.path.join(output_directory, self._variant_file)
+
+    def _get_jit_configs(self, output_directory, start_segment, segment_duration):
+        """
+        gets a dict containing custom transcoding configs for just-in-time output.
+
+        segments are written into temporary files and renamed when
+        completed, so a partially written segment is never served.
+
+        :param str output_directory: output directory path.
+        :param int start_segment: index of the first segment to be produced.
+        :param float segment_duration: duration of each segment in seconds.
+
+        :rtype: dict
+        """
+
+        return dict(hls_time=segment_duration,
+                    hls_list_size=0,
+                    hls_playlist_type='event',
+                    hls_flags='temp_file',
+                    start_number=start_segment,
+                    hls_segment_filename=os.path.join(output_directory,
+                                                      self._segment_pattern))
+
+    def _write_manifest(self, output_directory, durations):
+        """
+        writes the complete playlist of a just-in-time output.
+
+        :param str output_directory: output directory path.
+        :param list[float] durations: duration of each segment in seconds.
+        """
+
+        lines = ['#EXTM3U',
+                 '#EXT-X-VERSION:3',
+                 '#EXT-X-TARGETDURATION:{duration}'.format(
+                     duration=int(math.ceil(max(durations)))),
+                 '#EXT-X-MEDIA-SEQUENCE:0',
+                 '#EXT-X-PLAYLIST-TYPE:VOD']
+
+        for index, duration in enumerate(durations):
+            lines.append('#EXTINF:{duration:.6f},'.format(duration=duration))
+            lines.append(self.get_segment_file(index))
+
+        lines.append('#EXT-X-ENDLIST')
+        self._write_playlist(self._get_output_path(output_directory), lines)
+
+    def _write_playlist(self, output_path, lines):
+        """
+        writes given playlist lines into given file.
+
+        the playlist is written into a temporary file and then renamed,
+        so a partially written playlist is never served.
+
+        :param str output_path: playlist file path.
+        :param list[str] lines: playlist lines.
+        """
+
+        temp_path = '{path}.tmp'.format(path=output_path)
+        with open(temp_path, mode='w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+        os.replace(temp_path, output_path)
+
+    def _write_subtitle_manifests(self, input_file, output_directory, tracks):
+        """
+        writes a playlist for each of given subtitle tracks.
+
+        each playlist has a single segment which is the whole webvtt file.
+        tracks will be left without a playlist if the source duration
+        could not be detected.
+
+        :param str input_file: file path to be transcoded.
+        :param str output_directory: output directory path.
+        :param list[dict] tracks: subtitle tracks.
+        """
+
+        duration = self._get_duration(input_file)
+        if not duration:
+            return
+
+        for index, track in enumerate(tracks):
+            manifest = self._subtitle_playlist_file.format(index=index)
+            lines = ['#EXTM3U',
+                     '#EXT-X-VERSION:3',
+                     '#EXT-X-TARGETDURATION:{duration}'.format(
+                         duration=int(math.ceil(duration))),
+                     '#EXT-X-MEDIA-SEQUENCE:0',
+                     '#EXT-X-PLAYLIST-TYPE:VOD',
+                     '#EXTINF:{duration:.6f},'.format(duration=duration),
+                     track['file'],
+                     '#EXT-X-ENDLIST']
+
+            self._write_playlist(os.path.join(output_directory, manifest), lines)
+            track.update(manifest=manifest)
+
+    def _get_media_lines(self, tracks):
+        """
+        gets master playlist lines which reference given subtitle tracks.
+
+        :param list[dict] tracks: subtitle tracks which have a playlist.
+
+        :rtype: list[str]
+        """
+
+        lines = []
+        for track in tracks:
+            attributes = ['TYPE=SUBTITLES',
+                          'GROUP-ID="{group}"'.format(group=self._subtitle_group),
+                          'NAME="{name}"'.format(name=track['name'].replace('"', '')),
+                          'DEFAULT=NO',
+                          'AUTOSELECT=YES',
+                          'URI="{uri}"'.format(uri=track['manifest'])]
+
+            if track.get('language'):
+                attributes.insert(3, 'LANGUAGE="{language}"'.format(
+                    language=track['language']))
+
+            lines.append('#EXT-X-MEDIA:{attributes}'.format(attributes=','.join(attributes)))
+
+        return lines
+
+    def get_manifest(self, output_directory, file, tracks):
+        """
+        gets the content of given manifest file including given subtitle tracks.
+
+        subtitle tracks are added into the master playlist. if the playlist
+        which is written by ffmpeg is not a master playlist, a master playlist
+        will be generated which references it by another name. it returns
+        None if the file must be sent as is.
+
+        :param str output_directory: output directory path.
+        :param str file: requested file name.
+        :param list[dict] tracks: subtitle tracks.
+
+        :rtype: str
+        """
+
+        tracks = [item for item in tracks or [] if item.get('manifest') is not None]
+        if file not in (self._output_file, self._media_file) or len(tracks) == 0:
+            return None
+
+        content = self._read_manifest(output_directory, self._output_file)
+        if content is None:
+            return None
+
+        is_master = '#EXT-X-STREAM-INF:' in content
+        if file == self._media_file:
+            if is_master is True:
+                return None
+
+            return content
+
+        subtitles = ',SUBTITLES="{group}"'.format(group=self._subtitle_group)
+        media_lines = self._get_media_lines(tracks)
+        if is_master is not True:
+            lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+            lines.extend(media_lines)
+            lines.append('#EXT-X-STREAM-INF:BANDWIDTH={bandwidth}{subtitles}'
+                         .format(bandwidth=self._nominal_bandwidth, subtitles=subtitles))
+            lines.append(self._media_file)
+            return '\n'.join(lines) + '\n'
+
+        lines = []
+        for line in content.splitlines():
+            if line.startswith('#EXT-X-STREAM-INF:'):
+                lines.extend(media_lines)
+                media_lines = []
+                line = line + subtitles
+
+            lines.append(line)
+
+        return '\n'.join(lines) + '\n'
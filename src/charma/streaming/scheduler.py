@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+streaming scheduler module.
+"""
+
+import heapq
+
+from itertools import count
+from threading import RLock, Thread
+
+import pyrin.logging.services as logging_services
+
+from pyrin.core.structs import CoreObject
+
+from charma.streaming.enumerations import TranscodingPriorityEnum
+
+
+class TranscodingScheduler(CoreObject):
+    """
+    transcoding scheduler class.
+
+    it limits the number of concurrent transcoding jobs and keeps
+    the remaining jobs in a priority queue. jobs with the same
+    priority will be started in fifo order.
+    """
+
+    LOGGER = logging_services.get_logger('streaming')
+
+    def __init__(self, max_jobs, **options):
+        """
+        initializes an instance of TranscodingScheduler.
+
+        :param int max_jobs: maximum number of concurrent transcoding jobs.
+                             if it is None or less than 1, there will be no limit.
+
+        :keyword callable on_finished: a callable to be called with the job
+                                       key whenever a running job finishes.
+        """
+
+        super().__init__()
+
+        self._max_jobs = max_jobs
+        self._on_finished = options.get('on_finished')
+        self._lock = RLock()
+        self._sequence = count()
+
+        # a heap of queued jobs. in the form of:
+        # [tuple(int priority, int sequence, str key)]
+        self._queue = []
+
+        # a dict containing the starter function of each queued job. in the form of:
+        # {str key: callable starter}
+        self._pending = dict()
+
+        # a dict containing the process of each running job. in the form of:
+        # {str key: multiprocessing.Process process}
+        self._running = dict()
+
+    def _has_free_slot(self):
+        """
+        gets a value indicating that a new job could be started now.
+
+        :rtype: bool
+        """
+
+        if self._max_jobs is None or self._max_jobs < 1:
+            return True
+
+        return len(self._running) < self._max_jobs
+
+    def _dispatch(self):
+        """
+        starts queued jobs as long as there are free slots.
+        """
+
+        with self._lock:
+            while len(self._queue) > 0 and self._has_free_slot() is True:
+                priority, sequence, key = heapq.heappop(self._queue)
+                starter = self._pending.pop(key, None)
+                if starter is None:
+                    continue
+
+                try:
+                    process = starter()
+                except Exception as error:
+                    self.LOGGER.exception('Transcoding job [{key}] could not be started: '
+                                          '[{error}]'.format(key=key, error=str(error)))
+                    continue
+
+                self._running[key] = process
+                watcher = Thread(target=self._watch, args=(key, process), daemon=True)
+                watcher.start()
+
+    def _watch(self, key, process):
+        """
+        waits for given job process to finish and then releases its slot.
+
+        :param str key: job key.
+        :param multiprocessing.Process process: job process.
+        """
+
+        try:
+            process.join()
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+
+            # queued jobs must be started even if the finish callback fails.
+            if self._on_finished is not None:
+                try:
+                    self._on_finished(key)
+                except Exception as error:
+                    self.LOGGER.exception('Finish callback of transcoding job [{key}] '
+                                          'failed: [{error}]'.format(key=key,
+                                                                     error=str(error)))
+
+            self._dispatch()
+
+    def submit(self, key, starter, **options):
+        """
+        submits a new transcoding job.
+
+        the job will be started immediately if there is a free slot,
+        otherwise it will be queued. if a job with the same key is
+        already queued or running, this call will be ignored.
+
+        :param str key: job key.
+        :param callable starter: a callable which starts the job and
+                                 returns its `multiprocessing.Process`.
+
+        :keyword int priority: job priority. lower values will be started first.
+                               defaults to `TranscodingPriorityEnum.NORMAL`.
+                               values which are not a valid priority will
+                               be treated as the default priority.
+        :enum priority:
+            HIGH = 0
+            NORMAL = 1
+            LOW = 2
+        """
+
+        priority = options.get('priority')
+        if priority not in TranscodingPriorityEnum.values():
+            priority = TranscodingPriorityEnum.NORMAL
+
+        with self._lock:
+            if self.contains(key) is True:
+                return
+
+            self._pending[key] = starter
+            heapq.heappush(self._queue, (priority, next(self._sequence), key))
+            self._dispatch()
+
+    def cancel(self, key):
+        """
+        removes the given job from queue if it is not started yet.
+
+        it returns a value indicating that the job has been removed.
+
+        :param str key: job key.
+
+        :rtype: bool
+        """
+
+        with self._lock:
+            if key not in self._pending:
+                return False
+
+            self._pending.pop(key)
+            self._queue = [item for item in self._queue if item[2] != key]
+            heapq.heapify(self._queue)
+            return True
+
+    def contains(self, key):
+        """
+        gets a value indicating that given job is queued or running.
+
+        :param str key: job key.
+
+        :rtype: bool
+        """
+
+        with self._lock:
+            return key in self._pending or key in self._running
+
+    def is_queued(self, key):
+        """
+        gets a value indicating that given job is waiting in queue.
+
+        :param str key: job key.
+
+        :rtype: bool
+        """
+
+        with self._lock:
+            return key in self._pending
+
+    def is_running(self, key):
+        """
+        gets a value indicating that given job is running.
+
+        :param str key: job key.
+
+        :rtype: bool
+        """
+
+        with self._lock:
+            return key in self._running
+
+    def get_position(self, key):
+        """
+        gets the queue position of given job.
+
+        it returns 0 if the job is running, a positive position starting
+        from 1 if it is queued, and None if the job is unknown.
+
+        :param str key: job key.
+
+        :rtype: int
+        """
+
+        with self._lock:
+            if key in self._running:
+                return 0
+
+            if key not in self._pending:
+                return None
+
+            keys = [item[2] for item in sorted(self._queue) if item[2] in self._pending]
+            return keys.index(key) + 1
+
+    @property
+    def running_count(self):
+        """
+        gets the number of running jobs.
+
+        :rtype: int
+        """
+
+        with self._lock:
+            return len(self._running)
+
+    @property
+    def queued_count(self):
+        """
+        gets the number of queued jobs.
+
+        :rtype: int
+        """
+
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def max_jobs(self):
+        """
+        gets the maximum number of concurrent jobs.
+
+        :rtype: int
+        """
+
+        return self._max_jobs
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+streaming sending module.
+"""
+
+import os
+import mimetypes
+
+from flask import Response, send_file
+
+from pyrin.core.structs import CoreObject
+
+from charma.streaming.enumerations import SendModeEnum
+
+
+class StreamSender(CoreObject):
+    """
+    stream sender class.
+
+    it sends stream files to client in one of these modes:
+
+    direct: the file is sent by the application with support for conditional
+            and range requests. the file is wrapped by `wsgi.file_wrapper`, so
+            wsgi servers which support it (ex. gunicorn and uwsgi) send it
+            with `sendfile` without reading it through python.
+
+    x_accel: only an `X-Accel-Redirect` header is sent and a fronting nginx
+             sends the file from an internal location which maps to stream
+             directory. nginx handles range requests itself.
+
+    x_sendfile: only an `X-Sendfile` header with full file path is sent and a
+                fronting server (ex. apache or lighttpd) sends the file.
+    """
+
+    # mime types of stream files which are not known to all platforms.
+    # in the form of: {str extension: str mimetype}
+    MIMETYPES = {'.mpd': 'application/dash+xml',
+                 '.m3u8': 'application/vnd.apple.mpegurl',
+                 '.m4s': 'video/iso.segment',
+                 '.ts': 'video/mp2t',
+                 '.vtt': 'text/vtt'}
+
+    # cache control of files which may change.
+    NO_CACHE = 'no-cache'
+
+    def __init__(self, mode, **options):
+        """
+        initializes an instance of StreamSender.
+
+        :param str mode: send mode.
+        :enum mode:
+            DIRECT = 'direct'
+            X_ACCEL = 'x_accel'
+            X_SENDFILE = 'x_sendfile'
+
+        :keyword str accel_prefix: internal nginx location which
+                                   maps to stream directory.
+                                   it is required for `x_accel` mode.
+
+        :keyword int max_age: number of seconds that clients could
+                              cache immutable files. defaults to a year.
+        """
+
+        super().__init__()
+
+        self._mode = mode or SendModeEnum.DIRECT
+        self._accel_prefix = (options.get('accel_prefix') or '').rstrip('/')
+        self._max_age = options.get('max_age') or 31536000
+
+    def _get_mimetype(self, file):
+        """
+        gets the mime type of given file.
+
+        :param str file: file name.
+
+        :rtype: str
+        """
+
+        extension = os.path.splitext(file)[1].lower()
+        if extension in self.MIMETYPES:
+            return self.MIMETYPES[extension]
+
+        return mimetypes.guess_type(file)[0] or 'application/octet-stream'
+
+    def _get_cache_control(self, immutable):
+        """
+        gets the cache control header value.
+
+        :param bool immutable: specifies that the file will never change.
+
+        :rtype: str
+        """
+
+        if immutable is not True:
+            return self.NO_CACHE
+
+        return 'public, max-age={max_age}, immutable'.format(max_age=self._max_age)
+
+    def send_file(self, full_path, **options):
+        """
+        sends given file which may be outside of stream directory to client.
+
+        `x_accel` mode could only be used for files inside stream directory,
+        so `direct` mode will be used instead of it.
+
+        :param str full_path: full path of file to be sent.
+
+        :keyword bool immutable: specifies that the file will never change,
+                                 so clients could cache it for a long time.
+                                 defaults to False if not provided.
+
+        :rtype: Response
+        """
+
+        mimetype = self._get_mimetype(full_path)
+        if self._mode == SendModeEnum.X_SENDFILE:
+            response = Response(mimetype=mimetype)
+            response.headers['X-Sendfile'] = full_path
+        else:
+            response = send_file(full_path, mimetype=mimetype, conditional=True)
+
+        response.headers['Cache-Control'] = self._get_cache_control(options.get('immutable'))
+        return response
+
+    def send(self, root, directory, file, **options):
+        """
+        sends given stream file to client.
+
+        :param str root: root directory of all streams.
+        :param str directory: stream directory path inside root directory.
+        :param str file: file name to be sent.
+
+        :keyword bool immutable: specifies that the file will never change,
+                                 so clients could cache it for a long time.
+                                 defaults to False if not provided.
+
+        :rtype: Response
+        """
+
+        full_path = os.path.join(directory, file)
+        if self._mode != SendModeEnum.X_ACCEL:
+            return self.send_file(full_path, **options)
+
+        relative_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+        response = Response(mimetype=self._get_mimetype(file))
+        response.headers['X-Accel-Redirect'] = '{prefix}/{path}'.format(
+            prefix=self._accel_prefix, path=relative_path)
+        response.headers['Cache-Control'] = self._get_cache_control(options.get('immutable'))
+        return response
+
+    def send_content(self, content, file):
+        """
+        sends given content of a stream file which is generated on request to client.
+
+        the content may change on each request, so it is never cached.
+
+        :param str content: file content.
+        :param str file: file name.
+
+        :rtype: Response
+        """
+
+        response = Response(content, mimetype=self._get_mimetype(file))
+        response.headers['Cache-Control'] = self.NO_CACHE
+        return response
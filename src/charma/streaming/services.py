@@ -59,6 +59,111 @@ def get_status(directory):
     return get_component(StreamingPackage.COMPONENT_NAME).get_status(directory)
 
 
+def get_stream_status(movie_id, **options):
+    """
+    gets the transcoding status of given movie's stream.
+
+    :param uuid.UUID movie_id: movie id.
+
+    :returns: dict(str status: transcoding status,
+                   int queue_position: position in transcoding queue,
+                   int running_jobs: number of running transcoding jobs,
+                   int queued_jobs: number of queued transcoding jobs,
+                   float percent: transcoded percentage of source,
+                   float speed: transcoding speed relative to playback,
+                   float eta: estimated remaining seconds of transcoding,
+                   list[dict] subtitles: subtitle tracks of the stream)
+    :rtype: dict
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).get_stream_status(movie_id,
+                                                                            **options)
+
+
+def evict(**options):
+    """
+    removes old streams from stream directory.
+
+    streams which are not accessed for `max_idle` hours will be removed, and
+    then least recently accessed streams will be removed until the total size
+    is under `max_size`. streams which are being transcoded or are queued will
+    never be removed, but running transcodings which are not accessed for
+    `orphan_timeout` minutes will be stopped to be removed on next runs.
+    running warmups are not considered orphaned.
+
+    :returns: dict(int removed: number of removed streams,
+                   int stopped: number of stopped orphaned transcodings,
+                   int freed: freed disk space in bytes)
+    :rtype: dict
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).evict(**options)
+
+
+def warmup(**options):
+    """
+    pre-transcodes streams of movies which are likely to be played soon.
+
+    it only submits warmups inside warmup hours and within the cpu budget.
+    warmups are transcoded with low priority, so requested streams are
+    always started first. movies which already have a stream are skipped.
+
+    :returns: dict(int submitted: number of submitted warmups)
+    :rtype: dict
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).warmup(**options)
+
+
+def start_background_tasks():
+    """
+    starts background tasks of streaming, like access time flush, eviction and warmup.
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).start_background_tasks()
+
+
+def stop_background_tasks():
+    """
+    stops background tasks of streaming.
+
+    it also flushes all pending access times to disk.
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).stop_background_tasks()
+
+
+def get_metrics(**options):
+    """
+    gets streaming performance metrics.
+
+    :returns: dict(dict time_to_manifest: dict(int count: number of measured requests,
+                                               float last: last wait time in seconds,
+                                               float average: average wait time in seconds,
+                                               float max: maximum wait time in seconds),
+                   dict encoder: dict(str resolution: dict(str preset: current preset name,
+                                                           float speed: last measured speed)),
+                   dict storage: dict(str backend: storage backend name,
+                                      int streams: number of streams in memory,
+                                      int size: total size of files in memory in bytes))
+    :rtype: dict
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).get_metrics(**options)
+
+
+def set_queued(directory):
+    """
+    sets the given stream as queued for transcoding by current process.
+
+    :param str directory: directory path of stream.
+
+    :raises StreamDirectoryNotExistedError: stream directory not existed error.
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).set_queued(directory)
+
+
 def set_started(directory):
     """
     sets the given stream as started transcoding.
@@ -110,16 +215,65 @@ def set_process_id(directory, process_id):
                                                                          process_id)
 
 
-def set_access_time(directory):
+def set_progress(directory, **progress):
+    """
+    sets the transcoding progress of given stream.
+
+    :param str directory: directory path of stream.
+
+    :keyword int frame: number of transcoded frames.
+    :keyword float fps: transcoding frames per second.
+    :keyword float time: transcoded time of source in seconds.
+    :keyword float speed: transcoding speed relative to playback.
+    :keyword float duration: source duration in seconds.
+
+    :raises StreamDirectoryNotExistedError: stream directory not existed error.
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).set_progress(directory, **progress)
+
+
+def get_seek_segment(directory):
+    """
+    gets the segment index which just-in-time transcoding of given stream must start from.
+
+    :param str directory: directory path of stream.
+
+    :rtype: int
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).get_seek_segment(directory)
+
+
+def set_access_time(directory, **options):
     """
     sets the last access time for given stream.
 
+    access times are kept in memory and will be flushed to disk periodically,
+    so this could be called on every segment request without touching the disk.
+
     :param str directory: directory path of stream.
 
+    :keyword bool persist: write the access time to disk immediately.
+                           this must be used by transcoding processes
+                           because their memory is not shared with the
+                           application. defaults to False if not provided.
+
     :raises StreamDirectoryNotExistedError: stream directory not existed error.
     """
 
-    return get_component(StreamingPackage.COMPONENT_NAME).set_access_time(directory)
+    return get_component(StreamingPackage.COMPONENT_NAME).set_access_time(directory,
+                                                                          **options)
+
+
+def flush_access_times():
+    """
+    writes all in-memory access times of streams to disk.
+
+    access times of streams which no longer exist will be discarded.
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).flush_access_times()
 
 
 def start_stream(movie_id, **options):
@@ -134,6 +288,7 @@ def start_stream(movie_id, **options):
     :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
     :raises MovieFileNotFoundError: movie file not found error.
     :raises MultipleMovieFilesFoundError: multiple movie files found error.
+    :raises StreamIsQueuedError: stream is queued error.
     :raises StreamDoesNotExistError: stream does not exist error.
 
     :rtype: bytes
@@ -142,6 +297,41 @@ def start_stream(movie_id, **options):
     return get_component(StreamingPackage.COMPONENT_NAME).start_stream(movie_id, **options)
 
 
+def direct_play(movie_id, **options):
+    """
+    sends the original file of given movie if client could play it.
+
+    the container and codecs of the file are checked against client
+    capabilities and the file is sent as is with range request support,
+    so no transcoding is involved. if the file could not be played by
+    client, an error will be raised and client must use `start_stream`.
+
+    :param uuid.UUID movie_id: movie id to be played.
+
+    :keyword str directory: movie directory path.
+                            it will only be used if more than
+                            one directory found for given movie.
+
+    :keyword str file: movie file path.
+                       it will only be used if more than
+                       one file found for given movie.
+
+    :keyword list[str] | str containers: containers which client could play.
+    :keyword list[str] | str video_codecs: video codecs which client could play.
+    :keyword list[str] | str audio_codecs: audio codecs which client could play.
+
+    :raises MovieDirectoryNotFoundError: movie directory not found error.
+    :raises MultipleMovieDirectoriesFoundError: multiple movie directories found error.
+    :raises MovieFileNotFoundError: movie file not found error.
+    :raises MultipleMovieFilesFoundError: multiple movie files found error.
+    :raises DirectPlayNotSupportedError: direct play not supported error.
+
+    :rtype: bytes
+    """
+
+    return get_component(StreamingPackage.COMPONENT_NAME).direct_play(movie_id, **options)
+
+
 def continue_stream(movie_id, file, **options):
     """
     continues the streaming of given movie.
@@ -149,6 +339,7 @@ def continue_stream(movie_id, file, **options):
     :param uuid.UUID movie_id: movie id to be streamed.
     :param str file: stream file name to be returned.
 
+    :raises StreamIsQueuedError: stream is queued error.
     :raises StreamDoesNotExistError: stream does not exist error.
 
     :rtype: bytes
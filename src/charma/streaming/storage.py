@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+streaming storage module.
+"""
+
+import os
+import shutil
+
+from threading import Lock
+
+import pyrin.logging.services as logging_services
+import pyrin.utils.path as path_utils
+
+from pyrin.core.structs import CoreObject
+
+from charma.streaming.enumerations import SegmentStorageEnum
+
+
+class DiskSegmentStorage(CoreObject):
+    """
+    disk segment storage class.
+
+    all files of each stream are written directly into its stream directory.
+    """
+
+    LOGGER = logging_services.get_logger('streaming')
+
+    def __init__(self, directory, **options):
+        """
+        initializes an instance of DiskSegmentStorage.
+
+        :param str directory: root directory of all streams.
+        """
+
+        super().__init__()
+
+        self._directory = directory
+
+    def create(self, path):
+        """
+        creates the given stream directory.
+
+        :param str path: stream directory path.
+        """
+
+        path_utils.create_directory(path, ignore_existed=True)
+
+    def remove(self, path):
+        """
+        removes the given stream directory with all of its files.
+
+        :param str path: stream directory path.
+        """
+
+        path_utils.remove_directory(path, ignore_errors=True)
+
+    def get_streams(self):
+        """
+        gets the directory paths of all streams.
+
+        :rtype: list[str]
+        """
+
+        return path_utils.get_directories(self._directory)
+
+    def spill(self, path, finished):
+        """
+        moves the files of given stream from memory to stream directory.
+
+        this method is intended to be overridden in subclasses
+        which keep the files of active streams in memory.
+
+        :param str path: stream directory path.
+        :param bool finished: specifies that the stream is not being transcoded,
+                              so all of its files could be spilled.
+        """
+        pass
+
+    def get_stats(self):
+        """
+        gets the usage stats of this storage.
+
+        :returns: dict(str backend: storage backend name,
+                       int streams: number of streams in memory,
+                       int size: total size of files in memory in bytes)
+        :rtype: dict
+        """
+
+        return dict(backend=SegmentStorageEnum.DISK, streams=0, size=0)
+
+
+class MemorySegmentStorage(DiskSegmentStorage):
+    """
+    memory segment storage class.
+
+    the stream directory of a new transcoding is a symbolic link to a directory
+    inside the memory directory, which must be on a tmpfs. ffmpeg writes into it
+    and segments are read back from memory. only the latest segments of each
+    active stream are kept in memory, older ones are spilled into a directory
+    on disk and replaced with symbolic links to their spilled files. finished
+    streams are spilled completely and their stream directory is switched to
+    the spilled directory, so memory is only used by active streams.
+
+    all replacements are atomic, so clients never find a file missing.
+    """
+
+    # name of the directory inside root directory which holds spilled files.
+    SPILL_DIRECTORY = '.spill'
+
+    # extensions of segment files which are spilled while transcoding.
+    SEGMENT_EXTENSIONS = ('.m4s', '.ts')
+
+    def __init__(self, directory, **options):
+        """
+        initializes an instance of MemorySegmentStorage.
+
+        :param str directory: root directory of all streams.
+
+        :keyword str memory_directory: root directory of active streams in memory.
+        :keyword int ring_size: number of latest segments of each active
+                                stream to be kept in memory. defaults to 30.
+
+        :keyword int max_size: maximum total size of memory directory in megabytes.
+                               new streams will be written to disk if it is exceeded.
+                               if not provided, there will be no limit.
+        """
+
+        super().__init__(directory, **options)
+
+        self._memory_directory = os.path.abspath(options.get('memory_directory'))
+        self._spill_directory = os.path.join(self._directory, self.SPILL_DIRECTORY)
+        self._ring_size = options.get('ring_size') or 30
+        self._max_size = options.get('max_size')
+        self._lock = Lock()
+        path_utils.create_directory(self._memory_directory, ignore_existed=True)
+        path_utils.create_directory(self._spill_directory, ignore_existed=True)
+
+    def _get_memory_path(self, path):
+        """
+        gets the memory directory of given stream.
+
+        it returns None if the stream is not in memory.
+
+        :param str path: stream directory path.
+
+        :rtype: str
+        """
+
+        if not os.path.islink(path):
+            return None
+
+        target = os.path.realpath(path)
+        if os.path.dirname(target) != os.path.realpath(self._memory_directory):
+            return None
+
+        return target
+
+    def _get_memory_size(self):
+        """
+        gets the total size of files in memory directory in bytes.
+
+        spilled files are symbolic links, so they are not counted.
+
+        :rtype: int
+        """
+
+        size = 0
+        for root, directories, file_names in os.walk(self._memory_directory):
+            for item in file_names:
+                try:
+                    size += os.lstat(os.path.join(root, item)).st_size
+                except OSError:
+                    continue
+
+        return size
+
+    def _has_space(self):
+        """
+        gets a value indicating that a new stream could be written into memory.
+
+        :rtype: bool
+        """
+
+        if self._max_size is None:
+            return True
+
+        return self._get_memory_size() < self._max_size * 1024 * 1024
+
+    def _replace_with_link(self, file, target):
+        """
+        replaces the given file with a symbolic link to given target atomically.
+
+        :param str file: file path to be replaced.
+        :param str target: target path of symbolic link.
+        """
+
+        temp_link = '{file}.link'.format(file=file)
+        if os.path.lexists(temp_link):
+            os.unlink(temp_link)
+
+        os.symlink(target, temp_link)
+        os.replace(temp_link, file)
+
+    def _spill_file(self, source, directory):
+        """
+        copies the given file into given directory on disk.
+
+        the file is copied into a temporary file first and then renamed,
+        so a partially copied file is never found.
+
+        :param str source: file path to be spilled.
+        :param str directory: directory path on disk.
+
+        :returns: spilled file path.
+        :rtype: str
+        """
+
+        target = os.path.join(directory, os.path.basename(source))
+        temp_file = '{file}.tmp'.format(file=target)
+        shutil.copy2(source, temp_file)
+        os.replace(temp_file, target)
+        return target
+
+    def _get_segments(self, memory_path):
+        """
+        gets the segment files of given memory directory which are not spilled yet.
+
+        the result is sorted from the latest to the oldest segment.
+
+        :param str memory_path: memory directory of stream.
+
+        :rtype: list[str]
+        """
+
+        segments = []
+        with os.scandir(memory_path) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False) \
+                        or os.path.splitext(entry.name)[1] not in self.SEGMENT_EXTENSIONS:
+                    continue
+
+                try:
+                    segments.append((entry.stat(follow_symlinks=False).st_mtime, entry.path))
+                except OSError:
+                    continue
+
+        return [item[1] for item in sorted(segments, reverse=True)]
+
+    def create(self, path):
+        """
+        creates the given stream directory.
+
+        it will be created in memory if there is enough space,
+        otherwise it will be created on disk.
+
+        :param str path: stream directory path.
+        """
+
+        with self._lock:
+            if self._has_space() is not True:
+                self.LOGGER.warning('Memory segment storage is full, stream [{path}] '
+                                    'will be written to disk.'.format(path=path))
+                super().create(path)
+                return
+
+            memory_path = os.path.join(self._memory_directory, os.path.basename(path))
+            shutil.rmtree(memory_path, ignore_errors=True)
+            path_utils.create_directory(memory_path)
+            os.symlink(memory_path, path)
+
+    def remove(self, path):
+        """
+        removes the given stream directory with all of its files.
+
+        :param str path: stream directory path.
+        """
+
+        name = os.path.basename(path)
+        if os.path.islink(path):
+            os.unlink(path)
+
+        shutil.rmtree(os.path.join(self._memory_directory, name), ignore_errors=True)
+        shutil.rmtree(os.path.join(self._spill_directory, name), ignore_errors=True)
+        super().remove(path)
+
+    def get_streams(self):
+        """
+        gets the directory paths of all streams.
+
+        :rtype: list[str]
+        """
+
+        return [item for item in super().get_streams()
+                if os.path.basename(item) != self.SPILL_DIRECTORY]
+
+    def spill(self, path, finished):
+        """
+        moves the files of given stream from memory to stream directory.
+
+        if the stream is not finished, only the segments which are older than
+        the latest `ring_size` segments will be spilled. otherwise all files will
+        be spilled and the stream directory will be switched to spilled files.
+
+        :param str path: stream directory path.
+        :param bool finished: specifies that the stream is not being transcoded,
+                              so all of its files could be spilled.
+        """
+
+        memory_path = self._get_memory_path(path)
+        if memory_path is None:
+            return
+
+        spill_path = os.path.join(self._spill_directory, os.path.basename(path))
+        path_utils.create_directory(spill_path, ignore_existed=True)
+        if finished is not True:
+            for item in self._get_segments(memory_path)[self._ring_size:]:
+                self._replace_with_link(item, self._spill_file(item, spill_path))
+            return
+
+        with os.scandir(memory_path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and not entry.name.endswith('.tmp'):
+                    self._spill_file(entry.path, spill_path)
+
+        self._replace_with_link(path, spill_path)
+        shutil.rmtree(memory_path, ignore_errors=True)
+
+    def get_stats(self):
+        """
+        gets the usage stats of this storage.
+
+        :returns: dict(str backend: storage backend name,
+                       int streams: number of streams in memory,
+                       int size: total size of files in memory in bytes)
+        :rtype: dict
+        """
+
+        return dict(backend=SegmentStorageEnum.MEMORY,
+                    streams=len(path_utils.get_directories(self._memory_directory)),
+                    size=self._get_memory_size())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+streaming watcher module.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import select
+import ctypes.util
+
+from pyrin.core.structs import CoreObject
+
+
+class ManifestWatcher(CoreObject):
+    """
+    manifest watcher class.
+
+    it uses linux inotify to get notified as soon as a file is written into
+    a stream directory. on other platforms or if inotify is not available,
+    it falls back to polling with a short interval.
+    """
+
+    # inotify event masks.
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    # how many seconds to wait between each check when polling is used.
+    POLL_INTERVAL = 0.1
+
+    # buffer size to read inotify events.
+    BUFFER_SIZE = 4096
+
+    def __init__(self):
+        """
+        initializes an instance of ManifestWatcher.
+        """
+
+        super().__init__()
+
+        self._libc = self._load_libc()
+
+    def _load_libc(self):
+        """
+        loads the c library if it supports inotify.
+
+        it returns None if inotify is not available.
+
+        :rtype: ctypes.CDLL
+        """
+
+        if not sys.platform.startswith('linux'):
+            return None
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            return libc
+        except (OSError, AttributeError):
+            return None
+
+    def _is_done(self, full_path, abort):
+        """
+        gets a value indicating that waiting must be stopped.
+
+        :param str full_path: full path of the file to wait for.
+        :param callable abort: a callable to check if waiting must be aborted.
+
+        :rtype: bool
+        """
+
+        if os.path.exists(full_path):
+            return True
+
+        return abort is not None and abort() is True
+
+    def _poll(self, full_path, deadline, abort):
+        """
+        waits for given file by polling the file system.
+
+        :param str full_path: full path of the file to wait for.
+        :param float deadline: monotonic time to give up waiting.
+        :param callable abort: a callable to check if waiting must be aborted.
+
+        :rtype: bool
+        """
+
+        while not self._is_done(full_path, abort):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            time.sleep(min(self.POLL_INTERVAL, remaining))
+
+        return os.path.exists(full_path)
+
+    def _notify(self, directory, full_path, deadline, abort):
+        """
+        waits for given file using inotify events of its directory.
+
+        it returns None if inotify could not be initialized.
+
+        :param str directory: directory to be watched.
+        :param str full_path: full path of the file to wait for.
+        :param float deadline: monotonic time to give up waiting.
+        :param callable abort: a callable to check if waiting must be aborted.
+
+        :rtype: bool
+        """
+
+        descriptor = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if descriptor < 0:
+            return None
+
+        try:
+            watch = self._libc.inotify_add_watch(descriptor, os.fsencode(directory),
+                                                 self.WATCH_MASK)
+            if watch < 0:
+                return None
+
+            # the file may have been created before the watch was added.
+            while not self._is_done(full_path, abort):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+
+                ready, _, _ = select.select([descriptor], [], [], remaining)
+                if ready:
+                    try:
+                        os.read(descriptor, self.BUFFER_SIZE)
+                    except BlockingIOError:
+                        pass
+
+            return os.path.exists(full_path)
+        finally:
+            os.close(descriptor)
+
+    def wait(self, directory, file_name, timeout, **options):
+        """
+        blocks current thread until given file is available in given directory.
+
+        it returns a value indicating that the file is available.
+
+        :param str directory: directory path to look for the file.
+        :param str file_name: file name to wait for.
+        :param float timeout: maximum number of seconds to wait.
+
+        :keyword callable abort: a callable without arguments which returns
+                                 True if waiting must be stopped. it will be
+                                 called whenever the directory changes.
+
+        :rtype: bool
+        """
+
+        abort = options.get('abort')
+        full_path = os.path.join(directory, file_name)
+        deadline = time.monotonic() + timeout
+        if self._libc is not None and os.path.isdir(directory):
+            result = self._notify(directory, full_path, deadline, abort)
+            if result is not None:
+                return result
+
+        return self._poll(full_path, deadline, abort)
@@ -13,3 +13,4 @@ class SubtitlesPackage(Package):
 
     NAME = __name__
     COMPONENT_NAME = 'subtitles.component'
+    CONFIG_STORE_NAMES = ['subtitles']
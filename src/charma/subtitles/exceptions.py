@@ -18,3 +18,10 @@ class SubtitlesBusinessException(CoreBusinessException, SubtitlesException):
     subtitles business exception.
     """
     pass
+
+
+class SubtitleDecodeError(SubtitlesBusinessException):
+    """
+    subtitle decode error.
+    """
+    pass
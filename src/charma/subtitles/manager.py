@@ -3,11 +3,16 @@
 subtitles manager module.
 """
 
+import os
+import re
+
+import pyrin.configuration.services as config_services
 import pyrin.utils.path as path_utils
 
 from pyrin.core.structs import Manager
 
 from charma.subtitles import SubtitlesPackage
+from charma.subtitles.exceptions import SubtitleDecodeError
 
 
 class SubtitlesManager(Manager):
@@ -20,6 +25,41 @@ class SubtitlesManager(Manager):
     # all supported subtitle file extensions.
     SUBTITLE_EXTENSIONS = ('srt',)
 
+    # matches a language code at the end of subtitle file name. ex: movie.en.srt
+    LANGUAGE_REGEX = re.compile(r'[._-]([a-zA-Z]{2,3})$')
+
+    def __init__(self):
+        """
+        initializes an instance of SubtitlesManager.
+        """
+
+        super().__init__()
+
+        self._encodings = config_services.get('subtitles', 'general', 'encodings')
+
+    def _read(self, file):
+        """
+        reads the content of given subtitle file.
+
+        :param str file: subtitle file path.
+
+        :raises SubtitleDecodeError: subtitle decode error.
+
+        :rtype: str
+        """
+
+        with open(file, mode='rb') as subtitle:
+            content = subtitle.read()
+
+        for encoding in self._encodings:
+            try:
+                return content.decode(encoding)
+            except (UnicodeDecodeError, LookupError):
+                continue
+
+        raise SubtitleDecodeError('Subtitle file [{file}] could not be decoded.'
+                                  .format(file=file))
+
     def get_subtitles(self, directory):
         """
         gets all subtitle files in given directory.
@@ -30,3 +70,46 @@ class SubtitlesManager(Manager):
         """
 
         return path_utils.get_files(directory, *self.SUBTITLE_EXTENSIONS)
+
+    def get_language(self, file):
+        """
+        gets the language code of given subtitle file from its name.
+
+        it returns None if the file name has no language code.
+
+        :param str file: subtitle file path.
+
+        :rtype: str
+        """
+
+        name = os.path.splitext(os.path.basename(file))[0]
+        match = self.LANGUAGE_REGEX.search(name)
+        if match is None:
+            return None
+
+        return match.group(1).lower()
+
+    def convert_to_webvtt(self, file, output_file):
+        """
+        converts the given srt subtitle file to a webvtt file.
+
+        :param str file: srt subtitle file path.
+        :param str output_file: webvtt file path to be written.
+
+        :raises SubtitleDecodeError: subtitle decode error.
+        """
+
+        content = self._read(file).replace('\r\n', '\n').replace('\r', '\n')
+        lines = ['WEBVTT', '']
+        for line in content.split('\n'):
+            # webvtt uses dot instead of comma for milliseconds of cue timings.
+            if '-->' in line:
+                line = line.replace(',', '.')
+
+            lines.append(line)
+
+        temp_file = '{file}.tmp'.format(file=output_file)
+        with open(temp_file, mode='w', encoding='utf-8') as subtitle:
+            subtitle.write('\n'.join(lines).rstrip('\n') + '\n')
+
+        os.replace(temp_file, output_file)
@@ -18,3 +18,31 @@ def get_subtitles(directory):
     """
 
     return get_component(SubtitlesPackage.COMPONENT_NAME).get_subtitles(directory)
+
+
+def get_language(file):
+    """
+    gets the language code of given subtitle file from its name.
+
+    it returns None if the file name has no language code.
+
+    :param str file: subtitle file path.
+
+    :rtype: str
+    """
+
+    return get_component(SubtitlesPackage.COMPONENT_NAME).get_language(file)
+
+
+def convert_to_webvtt(file, output_file):
+    """
+    converts the given srt subtitle file to a webvtt file.
+
+    :param str file: srt subtitle file path.
+    :param str output_file: webvtt file path to be written.
+
+    :raises SubtitleDecodeError: subtitle decode error.
+    """
+
+    return get_component(SubtitlesPackage.COMPONENT_NAME).convert_to_webvtt(file,
+                                                                             output_file)
@@ -129,6 +129,10 @@ def update_all(**options):
     :keyword bool force: force update data even if a category already
                          has valid data. defaults to False if not provided.
 
+    :keyword int workers: number of movies to be fetched concurrently.
+                          database is only accessed by current thread.
+                          defaults to `workers` config if not provided.
+
     :returns: dict(total: total processed movies count,
                    updated: updated movies count,
                    not_updated: not updated movies count,
@@ -137,3 +141,22 @@ def update_all(**options):
     """
 
     return updater_services.update_all(**options)
+
+
+@api('/updater/stats', authenticated=False)
+def get_stats(**options):
+    """
+    gets the content search stats of all updaters.
+
+    updaters of each category are in the order of their chain.
+
+    :returns: dict[str category: list[dict(str name: updater name,
+                                           int hits: number of searches which found data,
+                                           int misses: number of searches which found nothing,
+                                           int last_hit: sequence of the latest hit between
+                                                         all updaters, it is 0 if there
+                                                         is no hit yet)]]
+    :rtype: dict
+    """
+
+    return updater_services.get_stats()
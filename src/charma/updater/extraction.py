@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+updater extraction module.
+"""
+
+import re
+import json
+
+from html import unescape
+from urllib.parse import urlparse
+
+from pyrin.core.structs import CoreObject
+
+from charma.updater.enumerations import UpdaterCategoryEnum
+
+
+class MovieRecordExtractor(CoreObject):
+    """
+    movie record extractor class.
+
+    it extracts a structured movie record from the data which is embedded into
+    imdb page for scripts. the `__NEXT_DATA__` blob of new imdb page is read
+    first and missing fields are filled from the json-ld blob. only these two
+    script tags are searched, so the page tree is not walked for each category.
+    """
+
+    NEXT_DATA_ID = '__NEXT_DATA__'
+    JSON_LD_TYPE = 'application/ld+json'
+    DURATION_REGEX = re.compile(r'^PT(?:(\d+)H)?(?:(\d+)M)?', re.IGNORECASE)
+    YEAR_REGEX = re.compile(r'^(\d{4})')
+    TAG_REGEX = re.compile(r'<[^>]+>')
+
+    def _load(self, tag):
+        """
+        loads the json content of given script tag.
+
+        it returns None if the content is not a valid json.
+
+        :param bs4.element.Tag tag: script tag.
+
+        :rtype: dict | list
+        """
+
+        if tag is None or not tag.string:
+            return None
+
+        try:
+            return json.loads(tag.string)
+        except ValueError:
+            return None
+
+    def _get_value(self, data, *keys):
+        """
+        gets the value of given keys path from given data.
+
+        it returns None if any of the keys is not available.
+
+        :param dict | list data: data to get value from it.
+        :param str | int keys: keys path of value.
+
+        :rtype: object
+        """
+
+        for key in keys:
+            if isinstance(data, dict):
+                data = data.get(key)
+            elif isinstance(data, list) and isinstance(key, int) and len(data) > key:
+                data = data[key]
+            else:
+                return None
+
+        return data
+
+    def _get_text(self, value):
+        """
+        gets the stripped form of given text.
+
+        it returns None if the text is empty.
+
+        :param str value: text value.
+
+        :rtype: str
+        """
+
+        if not isinstance(value, str):
+            return None
+
+        return unescape(value).strip() or None
+
+    def _get_paths(self, urls):
+        """
+        gets the path of each of given urls.
+
+        imdb gives absolute urls in some pages and relative urls in others,
+        so only the paths are kept. it returns None if no url is available.
+
+        :param list[str] urls: urls to get their paths.
+
+        :rtype: list[str]
+        """
+
+        if not urls:
+            return None
+
+        paths = [urlparse(item).path for item in urls]
+        return [item for item in paths if len(item) > 0] or None
+
+    def _get_texts(self, items, *keys):
+        """
+        gets the stripped texts of given keys path from each of given items.
+
+        it returns None if no text is available.
+
+        :param list items: items to get texts from them.
+        :param str keys: keys path of text in each item.
+
+        :rtype: list[str]
+        """
+
+        if isinstance(items, str):
+            items = [items]
+
+        if not isinstance(items, list):
+            return None
+
+        texts = []
+        for item in items:
+            text = self._get_text(self._get_value(item, *keys))
+            if text is not None:
+                texts.append(text)
+
+        return texts or None
+
+    def _get_int(self, value):
+        """
+        gets the int form of given value.
+
+        it returns None if value is not a positive number.
+
+        :param object value: value to be converted.
+
+        :rtype: int
+        """
+
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return None
+
+        return int(value)
+
+    def _get_float(self, value):
+        """
+        gets the float form of given value.
+
+        it returns None if value is not a positive number.
+
+        :param object value: value to be converted.
+
+        :rtype: float
+        """
+
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return None
+
+        return float(value)
+
+    def _get_runtime(self, duration):
+        """
+        gets the runtime in minutes from given iso 8601 duration.
+
+        it returns None if runtime could not be extracted.
+
+        :param str duration: duration value. for example: `PT2H22M`.
+
+        :rtype: int
+        """
+
+        if not isinstance(duration, str):
+            return None
+
+        matched = self.DURATION_REGEX.match(duration)
+        if not matched:
+            return None
+
+        hours, minutes = matched.groups()
+        return self._get_int(int(hours or 0) * 60 + int(minutes or 0))
+
+    def _get_year(self, date):
+        """
+        gets the year from given iso 8601 date.
+
+        it returns None if year could not be extracted.
+
+        :param str date: date value. for example: `1994-10-14`.
+
+        :rtype: int
+        """
+
+        if not isinstance(date, str):
+            return None
+
+        matched = self.YEAR_REGEX.match(date)
+        if not matched:
+            return None
+
+        return int(matched.group(1))
+
+    def _get_storyline(self, data):
+        """
+        gets the first plot summary of given main column data without its html tags.
+
+        it returns None if it is not available.
+
+        :param dict data: main column data.
+
+        :rtype: str
+        """
+
+        summary = self._get_value(data, 'summaries', 'edges', 0,
+                                  'node', 'plotText', 'plaidHtml')
+
+        if not isinstance(summary, str):
+            return None
+
+        return self._get_text(self.TAG_REGEX.sub('', summary))
+
+    def _get_json_ld(self, content):
+        """
+        gets the json-ld movie data of given content.
+
+        it returns None if it is not available.
+
+        :param bs4.BeautifulSoup content: the html content of imdb page.
+
+        :rtype: dict
+        """
+
+        for tag in content.find_all('script', type=self.JSON_LD_TYPE):
+            data = self._load(tag)
+            if isinstance(data, dict) and '@graph' in data:
+                data = data.get('@graph')
+
+            items = data if isinstance(data, list) else [data]
+            for item in items:
+                if isinstance(item, dict) and item.get('name') is not None:
+                    return item
+
+        return None
+
+    def _extract_next_data(self, content):
+        """
+        extracts movie record from `__NEXT_DATA__` blob of given content.
+
+        :param bs4.BeautifulSoup content: the html content of imdb page.
+
+        :rtype: dict
+        """
+
+        data = self._load(content.find('script', id=self.NEXT_DATA_ID))
+        above = self._get_value(data, 'props', 'pageProps', 'aboveTheFoldData')
+        main = self._get_value(data, 'props', 'pageProps', 'mainColumnData')
+        if above is None:
+            return dict()
+
+        runtime = self._get_int(self._get_value(above, 'runtime', 'seconds'))
+        if runtime is not None:
+            runtime = self._get_int(runtime // 60)
+
+        title = self._get_text(self._get_value(above, 'titleText', 'text'))
+        original_title = self._get_text(self._get_value(above, 'originalTitleText', 'text'))
+
+        # original title is only shown on imdb page if it is different from title.
+        if original_title == title:
+            original_title = None
+
+        record = {
+            UpdaterCategoryEnum.TITLE: title,
+            UpdaterCategoryEnum.ORIGINAL_TITLE: original_title,
+            UpdaterCategoryEnum.PRODUCTION_YEAR: self._get_int(
+                self._get_value(above, 'releaseYear', 'year')),
+            UpdaterCategoryEnum.RUNTIME: runtime,
+            UpdaterCategoryEnum.IMDB_RATE: self._get_float(
+                self._get_value(above, 'ratingsSummary', 'aggregateRating')),
+            UpdaterCategoryEnum.META_SCORE: self._get_int(
+                self._get_value(above, 'metacritic', 'metascore', 'score')),
+            UpdaterCategoryEnum.CONTENT_RATE: self._get_text(
+                self._get_value(above, 'certificate', 'rating')),
+            UpdaterCategoryEnum.GENRE: self._get_texts(
+                self._get_value(above, 'genres', 'genres'), 'text'),
+            UpdaterCategoryEnum.STORYLINE: self._get_storyline(main) or self._get_text(
+                self._get_value(above, 'plot', 'plotText', 'plainText')),
+            UpdaterCategoryEnum.POSTER_NAME: self._get_text(
+                self._get_value(above, 'primaryImage', 'url')),
+            UpdaterCategoryEnum.COUNTRY: self._get_texts(
+                self._get_value(main, 'countriesOfOrigin', 'countries'), 'text'),
+            UpdaterCategoryEnum.LANGUAGE: self._get_texts(
+                self._get_value(main, 'spokenLanguages', 'spokenLanguages'), 'text'),
+        }
+
+        return record
+
+    def _extract_json_ld(self, content):
+        """
+        extracts movie record from json-ld blob of given content.
+
+        :param bs4.BeautifulSoup content: the html content of imdb page.
+
+        :rtype: dict
+        """
+
+        data = self._get_json_ld(content)
+        if data is None:
+            return dict()
+
+        record = {
+            UpdaterCategoryEnum.TITLE: self._get_text(data.get('name')),
+            UpdaterCategoryEnum.PRODUCTION_YEAR: self._get_year(data.get('datePublished')),
+            UpdaterCategoryEnum.RUNTIME: self._get_runtime(data.get('duration')),
+            UpdaterCategoryEnum.IMDB_RATE: self._get_float(
+                self._get_value(data, 'aggregateRating', 'ratingValue')),
+            UpdaterCategoryEnum.CONTENT_RATE: self._get_text(data.get('contentRating')),
+            UpdaterCategoryEnum.GENRE: self._get_texts(data.get('genre')),
+            UpdaterCategoryEnum.STORYLINE: self._get_text(data.get('description')),
+            UpdaterCategoryEnum.POSTER_NAME: self._get_text(data.get('image')),
+            'stars': self._get_paths(self._get_texts(data.get('actor'), 'url')),
+        }
+
+        return record
+
+    def extract(self, content):
+        """
+        extracts a movie record from given content.
+
+        the record has a key for each updater category which has been
+        found in the page, and a `stars` key containing the relative
+        imdb page url of star actors if available.
+
+        :param bs4.BeautifulSoup content: the html content of imdb page.
+
+        :returns: dict[str category, object value]
+        :rtype: dict
+        """
+
+        record = self._extract_next_data(content)
+        for key, value in self._extract_json_ld(content).items():
+            if record.get(key) is None:
+                record[key] = value
+
+        return {key: value for key, value in record.items() if value is not None}
@@ -3,6 +3,8 @@
 updater handlers base module.
 """
 
+from itertools import count
+from threading import Lock
 from abc import abstractmethod
 
 from bs4 import NavigableString
@@ -24,6 +26,9 @@ class UpdaterBase(AbstractUpdater):
     # it is actually the relevant entity's column name.
     _category = None
 
+    # a sequence shared between all updaters to order their hits.
+    _hit_sequence = count(1)
+
     def __init__(self, **options):
         """
         initializes an instance of UpdaterBase.
@@ -31,6 +36,10 @@ class UpdaterBase(AbstractUpdater):
 
         super().__init__()
         self._next_handler = None
+        self._hits = 0
+        self._misses = 0
+        self._last_hit = 0
+        self._stats_lock = Lock()
 
     @abstractmethod
     def _fetch(self, content, **options):
@@ -49,6 +58,34 @@ class UpdaterBase(AbstractUpdater):
 
         raise CoreNotImplementedError()
 
+    def _fetch_record(self, record, **options):
+        """
+        fetches data of this updater's category from given movie record.
+
+        it returns None if the record does not have the data of this category.
+        subclasses could override this if the value needs to be converted.
+
+        :param dict record: movie record which is extracted from imdb page.
+
+        :returns: update data
+        """
+
+        return record.get(self.category)
+
+    def _add_result(self, hit):
+        """
+        adds the result of a content search into stats of this updater.
+
+        :param bool hit: specifies that data has been found in content.
+        """
+
+        with self._stats_lock:
+            if hit is True:
+                self._hits += 1
+                self._last_hit = next(self._hit_sequence)
+            else:
+                self._misses += 1
+
     def _get_text(self, tag, **options):
         """
         gets the string of `next` attribute of given tag if available.
@@ -77,16 +114,48 @@ class UpdaterBase(AbstractUpdater):
         :keyword bs4.BeautifulSoup credits: the html content of credits page.
                                             this is only needed by person updaters.
 
+        :keyword dict record: movie record which is extracted from imdb page.
+                              if it has the data of this updater's category,
+                              the content will not be searched.
+
         :returns: update data
         """
 
-        data = self._fetch(content, **options)
+        data = self.fetch_single(content, **options)
         if data is None:
             if self._next_handler is not None:
                 return self._next_handler.fetch(content, **options)
 
         return data
 
+    def fetch_single(self, content, **options):
+        """
+        fetches data from given content only by this updater.
+
+        the next updater handler will not be tried if no data is found.
+
+        :param bs4.BeautifulSoup content: the html content of imdb page.
+
+        :keyword bs4.BeautifulSoup credits: the html content of credits page.
+                                            this is only needed by person updaters.
+
+        :keyword dict record: movie record which is extracted from imdb page.
+                              if it has the data of this updater's category,
+                              the content will not be searched.
+
+        :returns: update data
+        """
+
+        record = options.get('record')
+        if record is not None:
+            data = self._fetch_record(record, **options)
+            if data is not None:
+                return data
+
+        data = self._fetch(content, **options)
+        self._add_result(data is not None)
+        return data
+
     def set_next(self, updater):
         """
         sets the next updater handler and returns it.
@@ -127,3 +196,21 @@ class UpdaterBase(AbstractUpdater):
         """
 
         return self._category
+
+    @property
+    def stats(self):
+        """
+        gets the content search stats of this updater.
+
+        searches which are skipped because the data has
+        been found in movie record are not counted.
+
+        :returns: dict(int hits: number of searches which found data,
+                       int misses: number of searches which found nothing,
+                       int last_hit: sequence of the latest hit between all
+                                     updaters, it is 0 if there is no hit yet)
+        :rtype: dict
+        """
+
+        with self._stats_lock:
+            return dict(hits=self._hits, misses=self._misses, last_hit=self._last_hit)
@@ -18,6 +18,19 @@ class MoviePosterUpdaterBase(UpdaterBase, ImageFetcherMixin):
     IMAGE_WIDTH = 380
     IMAGE_HEIGHT = 562
 
+    def _fetch_record(self, record, **options):
+        """
+        fetches data of this updater's category from given movie record.
+
+        :param dict record: movie record which is extracted from imdb page.
+
+        :returns: imdb movie poster url.
+        :rtype: str
+        """
+
+        return self.get_resized_image_url(record.get(self.category),
+                                          self.IMAGE_WIDTH, self.IMAGE_HEIGHT)
+
 
 @updater()
 class MoviePosterUpdater(MoviePosterUpdaterBase):
@@ -121,15 +121,23 @@ class ActorUpdaterBase(PersonUpdaterBase):
 
     _category = UpdaterCategoryEnum.ACTORS
 
-    def _get_stars(self, content):
+    def _get_stars(self, content, **options):
         """
         gets imdb page of all star actors.
 
         :param bs4.BeautifulSoup content: the html content of imdb page.
 
+        :keyword dict record: movie record which is extracted from imdb page.
+
         :rtype: list[str]
         """
 
+        record = options.get('record') or {}
+        stars = [url for url in (self._get_person_url(item) for item in record.get('stars', []))
+                 if url is not None]
+        if len(stars) > 0:
+            return stars
+
         stars = self._get_stars_v1(content)
         if len(stars) <= 0:
             stars = self._get_stars_v2(content)
@@ -257,7 +265,7 @@ class ActorUpdater(ActorUpdaterBase, PersonUpdater):
         """
 
         cast_list_container = credits_content.find('table', class_='cast_list')
-        stars = self._get_stars(content)
+        stars = self._get_stars(content, **options)
         actors = []
         if cast_list_container is not None:
             odd_rows = cast_list_container.find_all('tr', class_='odd')
@@ -292,22 +300,21 @@ class DirectorUpdater(DirectorUpdaterBase, PersonUpdater):
     director updater class.
     """
 
-    def _get_photo_url(self, imdb_page):
+    def _get_photo_url(self, content):
         """
         gets photo url of director.
 
         it returns None if it fails to fetch photo url.
 
-        :param str imdb_page: imdb page url of director.
+        :param bs4.BeautifulSoup content: the html content of director imdb page.
 
         :rtype: str
         """
 
-        if imdb_page is None:
+        if content is None:
             return None
 
         with suppress():
-            content = scraper_services.get_soup(imdb_page)
             poster_tag = content.find('img', id='name-poster', src=True)
             if poster_tag is not None:
                 return self.get_resized_image_url(poster_tag.get('src'),
@@ -335,10 +342,17 @@ class DirectorUpdater(DirectorUpdaterBase, PersonUpdater):
             director_list_container = directors_title.find_next(
                 'table', class_='simpleTable simpleCreditsTable')
             if director_list_container is not None:
-                directors_list = director_list_container.find_all('tr')
-                for index, item in enumerate(directors_list):
-                    fullname, imdb_page = self._get_fullname_and_imdb_page(item, class_='name')
-                    photo_name = self._get_photo_url(imdb_page)
+                directors_list = [self._get_fullname_and_imdb_page(item, class_='name')
+                                  for item in director_list_container.find_all('tr')]
+
+                # imdb pages of all directors are fetched concurrently.
+                pages = [imdb_page for fullname, imdb_page in directors_list
+                         if imdb_page is not None]
+                contents = dict(zip(pages, scraper_services.get_soup_many(
+                    pages, ignore_errors=True)))
+
+                for index, (fullname, imdb_page) in enumerate(directors_list):
+                    photo_name = self._get_photo_url(contents.get(imdb_page))
                     single_director = dict(fullname=fullname, imdb_page=imdb_page,
                                            photo_name=photo_name, is_main=index == 0)
 
@@ -35,6 +35,29 @@ class AbstractUpdater(CoreObject, metaclass=UpdaterSingletonMeta):
         :keyword bs4.BeautifulSoup credits: the html content of credits page.
                                             this is only needed by person updaters.
 
+        :keyword dict record: movie record which is extracted from imdb page.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :returns: update data
+        """
+
+        raise CoreNotImplementedError()
+
+    @abstractmethod
+    def fetch_single(self, content, **options):
+        """
+        fetches data from given content only by this updater.
+
+        the next updater handler will not be tried if no data is found.
+
+        :param bs4.BeautifulSoup content: the html content of imdb page.
+
+        :keyword bs4.BeautifulSoup credits: the html content of credits page.
+                                            this is only needed by person updaters.
+
+        :keyword dict record: movie record which is extracted from imdb page.
+
         :raises CoreNotImplementedError: core not implemented error.
 
         :returns: update data
@@ -83,6 +106,23 @@ class AbstractUpdater(CoreObject, metaclass=UpdaterSingletonMeta):
 
         raise CoreNotImplementedError()
 
+    @property
+    @abstractmethod
+    def stats(self):
+        """
+        gets the content search stats of this updater.
+
+        :raises CoreNotImplementedError: core not implemented error.
+
+        :returns: dict(int hits: number of searches which found data,
+                       int misses: number of searches which found nothing,
+                       int last_hit: sequence of the latest hit between all
+                                     updaters, it is 0 if there is no hit yet)
+        :rtype: dict
+        """
+
+        raise CoreNotImplementedError()
+
 
 class ProcessorSingletonMeta(MultiSingletonMeta):
     """
@@ -3,7 +3,9 @@
 updater manager module.
 """
 
-from collections import OrderedDict
+from threading import Lock
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import pyrin.validator.services as validator_services
@@ -29,6 +31,7 @@ import charma.movies.related_persons.directors.services as related_director_serv
 from charma.movies.models import MovieEntity
 from charma.updater import UpdaterPackage
 from charma.updater.enumerations import UpdaterCategoryEnum
+from charma.updater.extraction import MovieRecordExtractor
 from charma.search.enumerations import SearchCategoryEnum
 from charma.updater.interface import AbstractUpdater, AbstractProcessor
 from charma.updater.exceptions import InvalidUpdaterTypeError, DuplicateUpdaterError, \
@@ -56,9 +59,19 @@ class UpdaterManager(Manager):
         # {str category: {str name: AbstractUpdater updater}}
         self._updaters = Context()
 
+        # a dict containing updaters of each category in the order that they must
+        # be tried. each value is replaced as a whole on reorder and is never
+        # changed in place, so it could be iterated without holding the lock.
+        # in the form of: {str category: tuple[AbstractUpdater]}
+        self._ordered_updaters = Context()
+
         # a dict containing update processors for each category. in the form of:
         # {str category: AbstractProcessor processor}
         self._processors = Context()
+        self._extractor = MovieRecordExtractor()
+        self._optimize_handlers = config_services.get('updater', 'general',
+                                                      'optimize_handlers')
+        self._chain_lock = Lock()
 
     def _get_updaters(self, category, **options):
         """
@@ -84,13 +97,51 @@ class UpdaterManager(Manager):
         :param dict[str, AbstractUpdater] updaters: dict of updaters.
         """
 
-        instances = list(updaters.values())
-        length = len(updaters)
-        for i in range(length):
-            if i == length - 1:
-                instances[i].set_next(None)
-            else:
-                instances[i].set_next(instances[i + 1])
+        next_handler = None
+        for item in reversed(list(updaters.values())):
+            item.set_next(next_handler)
+            next_handler = item
+
+    def _get_ordered_updaters(self, category):
+        """
+        gets the updaters of given category in the order that they must be tried.
+
+        :param str category: category name.
+
+        :raises UpdaterCategoryNotFoundError: updater category not found error.
+
+        :rtype: tuple[AbstractUpdater]
+        """
+
+        self._get_updaters(category)
+        with self._chain_lock:
+            return self._ordered_updaters[category]
+
+    def _optimize(self, category):
+        """
+        reorders the updaters of given category based on their latest hits.
+
+        the updater which found data most recently will be tried first, and
+        updaters without any hit keep their registration order at the end.
+        so updaters of outdated imdb layouts are tried after the ones that
+        currently succeed.
+
+        the links of chained updaters are never changed here, because other
+        threads may be walking the chain. only the order of `_fetch` changes.
+
+        :param str category: category name.
+        """
+
+        if self._optimize_handlers is not True:
+            return
+
+        with self._chain_lock:
+            current = self._ordered_updaters[category]
+            ordered = tuple(sorted(current, key=lambda item: item.stats['last_hit'],
+                                   reverse=True))
+
+            if ordered != current:
+                self._ordered_updaters[category] = ordered
 
     def _process(self, movie_id, data, **options):
         """
@@ -175,19 +226,26 @@ class UpdaterManager(Manager):
         :keyword bs4.BeautifulSoup credits: the html content of credits page.
                                             this is only needed by person updaters.
 
+        :keyword dict record: movie record which is extracted from imdb page.
+
         :raises UpdaterCategoryNotFoundError: updater category not found error.
 
         :returns: dict[str category, object value]
         :rtype: dict
         """
 
-        updater = self.get_updater(category, **options)
-        result = updater.fetch(content, **options)
+        result = None
+        for updater in self._get_ordered_updaters(category):
+            result = updater.fetch_single(content, **options)
+            if result is not None:
+                break
+
+        self._optimize(category)
         if result is None:
             return None
 
         final_result = dict()
-        final_result[updater.category] = result
+        final_result[category] = result
         return final_result
 
     def _fetch_all(self, url, *categories, **options):
@@ -217,6 +275,9 @@ class UpdaterManager(Manager):
                 credits_content = scraper_services.get_soup(credits_url, **options)
                 options.update(credits=credits_content)
 
+        # the embedded data of the page is extracted once and shared by all updaters.
+        options.update(record=self._extractor.extract(content))
+
         final_result = dict()
         for item in categories:
             result = self._fetch(content, item, **options)
@@ -225,6 +286,290 @@ class UpdaterManager(Manager):
 
         return final_result
 
+    def _prepare(self, movie_id, **options):
+        """
+        gets the update plan of given movie from its current info.
+
+        it only reads from database and does not send any request.
+
+        :param uuid.UUID movie_id: movie id.
+
+        :keyword bool content_rate: update content rate.
+        :keyword bool country: update country.
+        :keyword bool genre: update genre.
+        :keyword bool imdb_rate: update imdb rate.
+        :keyword bool language: update language.
+        :keyword bool meta_score: update meta score.
+        :keyword bool movie_poster: update movie poster.
+        :keyword bool original_title: update original title.
+        :keyword bool production_year: update production year.
+        :keyword bool runtime: update runtime.
+        :keyword bool storyline: update storyline.
+        :keyword bool title: update title.
+        :keyword bool actors: update actors.
+        :keyword bool directors: update directors.
+        :keyword str imdb_page: an imdb movie page to be used to fetch data from.
+        :keyword bool force: force update data even if a category already
+                             has valid data.
+
+        :raises ValidationError: validation error.
+
+        :returns: dict(uuid.UUID movie_id: movie id,
+                       str imdb_page: imdb page to fetch data from it,
+                       str current_imdb_page: current imdb page of movie,
+                       bool search: specifies that imdb page must be searched,
+                       str full_title: full title of movie,
+                       list[str] categories: categories to be fetched)
+        :rtype: dict
+        """
+
+        content_rate = options.get('content_rate', True)
+        country = options.get('country', True)
+        genre = options.get('genre', True)
+        imdb_rate = options.get('imdb_rate', True)
+        language = options.get('language', True)
+        meta_score = options.get('meta_score', True)
+        movie_poster = options.get('movie_poster', True)
+        original_title = options.get('original_title', True)
+        production_year = options.get('production_year', True)
+        runtime = options.get('runtime', True)
+        storyline = options.get('storyline', True)
+        title = options.get('title', True)
+        actors = options.get('actors', True)
+        directors = options.get('directors', True)
+        force = options.get('force', False)
+        imdb_page = options.get('imdb_page')
+
+        movie_id = validator_services.validate_field(MovieEntity, MovieEntity.id,
+                                                     movie_id, nullable=False)
+
+        entity = movie_services.get(movie_id)
+        imdb_page = imdb_page or entity.imdb_page
+        full_title = movie_services.get_full_title(entity.title or entity.library_title,
+                                                   entity.production_year)
+
+        search = imdb_page is None and \
+            self._needs_update(imdb_page, force, entity.modified_on) is True
+
+        categories = []
+        if content_rate is True and self._needs_update(entity.content_rate_id,
+                                                       force, entity.modified_on):
+            categories.append(UpdaterCategoryEnum.CONTENT_RATE)
+
+        has_country = related_country_services.exists(movie_id) or None
+        if country is True and self._needs_update(has_country, force,
+                                                  entity.modified_on):
+            categories.append(UpdaterCategoryEnum.COUNTRY)
+
+        has_genre = related_genre_services.exists(movie_id) or None
+        if genre is True and self._needs_update(has_genre, force,
+                                                entity.modified_on):
+            categories.append(UpdaterCategoryEnum.GENRE)
+
+        if imdb_rate is True and self._needs_update(entity.imdb_rate, force,
+                                                    entity.modified_on):
+            categories.append(UpdaterCategoryEnum.IMDB_RATE)
+
+        has_language = related_language_services.exists(movie_id) or None
+        if language is True and self._needs_update(has_language, force,
+                                                   entity.modified_on):
+            categories.append(UpdaterCategoryEnum.LANGUAGE)
+
+        if meta_score is True and self._needs_update(entity.meta_score, force,
+                                                     entity.modified_on):
+            categories.append(UpdaterCategoryEnum.META_SCORE)
+
+        if movie_poster is True and self._needs_update(entity.poster_name, force,
+                                                       entity.modified_on):
+            categories.append(UpdaterCategoryEnum.POSTER_NAME)
+
+        if original_title is True and self._needs_update(entity.original_title, force,
+                                                         entity.modified_on):
+            categories.append(UpdaterCategoryEnum.ORIGINAL_TITLE)
+
+        if production_year is True and self._needs_update(entity.production_year, force,
+                                                          entity.modified_on):
+            categories.append(UpdaterCategoryEnum.PRODUCTION_YEAR)
+
+        if runtime is True and self._needs_update(entity.runtime, force,
+                                                  entity.modified_on):
+            categories.append(UpdaterCategoryEnum.RUNTIME)
+
+        if storyline is True and self._needs_update(entity.storyline, force,
+                                                    entity.modified_on):
+            categories.append(UpdaterCategoryEnum.STORYLINE)
+
+        if title is True and self._needs_update(entity.title, force,
+                                                entity.modified_on):
+            categories.append(UpdaterCategoryEnum.TITLE)
+
+        has_actor = related_actor_services.exists(movie_id) or None
+        if actors is True and self._needs_update(has_actor, force,
+                                                 entity.modified_on):
+            categories.append(UpdaterCategoryEnum.ACTORS)
+
+        has_director = related_director_services.exists(movie_id) or None
+        if directors is True and self._needs_update(has_director, force,
+                                                    entity.modified_on):
+            categories.append(UpdaterCategoryEnum.DIRECTORS)
+
+        # this code is to try to correct production year even if it has valid value.
+        # because it is possible that the production year extracted from library
+        # title be incorrect.
+        if production_year is True and len(categories) > 0 \
+                and UpdaterCategoryEnum.PRODUCTION_YEAR not in categories:
+            categories.append(UpdaterCategoryEnum.PRODUCTION_YEAR)
+
+        return dict(movie_id=movie_id, imdb_page=imdb_page,
+                    current_imdb_page=entity.imdb_page, search=search,
+                    full_title=full_title, categories=categories)
+
+    def _fetch_plan(self, plan):
+        """
+        fetches the data of given update plan and puts it into the plan.
+
+        it only sends requests and does not access database,
+        so it could be called from any thread.
+
+        :param dict plan: update plan of a movie.
+
+        :raises ValidationError: validation error.
+
+        :returns: the same plan with `data` key.
+        :rtype: dict
+        """
+
+        imdb_page = plan['imdb_page']
+        if plan['search'] is True:
+            imdb_page = search_services.search(plan['full_title'], SearchCategoryEnum.MOVIE)
+
+        data = dict()
+        if imdb_page is not None:
+            validator_services.validate_field(MovieEntity, MovieEntity.imdb_page,
+                                              imdb_page, nullable=False)
+            if len(plan['categories']) > 0:
+                data = self._fetch_all(imdb_page, *plan['categories'])
+
+        plan.update(imdb_page=imdb_page, data=data)
+        return plan
+
+    def _store(self, plan, **options):
+        """
+        stores the fetched data of given update plan.
+
+        it returns a value indicating that update is done.
+
+        :param dict plan: update plan of a movie which its data is fetched.
+
+        :raises MovieIMDBPageNotFoundError: movie imdb page not found error.
+
+        :rtype: bool
+        """
+
+        movie_id = plan['movie_id']
+        imdb_page = plan['imdb_page']
+        if imdb_page is None:
+            # we update 'imdb_page' to refresh 'modified_on' value.
+            store = get_current_store()
+            entity = movie_services.get(movie_id)
+            entity.update(imdb_page=imdb_page)
+            store.commit()
+            raise MovieIMDBPageNotFoundError(_('IMDb page for movie [{title}] could '
+                                               'not be found.')
+                                             .format(title=plan['full_title']))
+
+        updated_fields = dict()
+        if len(plan['data']) > 0:
+            options.update(imdb_page=imdb_page)
+            updated_fields = self._process(movie_id, plan['data'], **options)
+
+        if imdb_page != plan['current_imdb_page']:
+            updated_fields.update(imdb_page=imdb_page)
+
+        if len(updated_fields) > 0:
+            movie_services.update(movie_id, **updated_fields)
+            return True
+
+        return False
+
+    def _count(self, counts, function, *args, **options):
+        """
+        calls given function in its own transaction and counts the result if it fails.
+
+        :param dict counts: counts of results to be incremented.
+                            in the form of: {str result: int count}
+
+        :param function function: function to be called.
+
+        :returns: the result of function or None if it fails.
+        """
+
+        try:
+            with atomic_context():
+                return function(*args, **options)
+        except Exception as error:
+            counts['failed'] += 1
+            self.LOGGER.exception(str(error))
+            return None
+
+    def _store_fetched(self, future, counts, **options):
+        """
+        stores the update plan of given future and counts the result.
+
+        :param Future future: future of fetching an update plan.
+
+        :param dict counts: counts of results to be incremented.
+                            in the form of: {str result: int count}
+        """
+
+        try:
+            plan = future.result()
+        except Exception as error:
+            counts['failed'] += 1
+            self.LOGGER.exception(str(error))
+            return
+
+        result = self._count(counts, self._store, plan, **options)
+        if result is True:
+            counts['updated'] += 1
+        elif result is False:
+            counts['not_updated'] += 1
+
+    def _update_concurrently(self, movie_ids, counts, workers, **options):
+        """
+        updates given movies while fetching their data concurrently.
+
+        only fetching data is done by worker threads, which do not access database.
+        reading and writing database is done by current thread in the order of given
+        movies, each movie in its own transaction. so movies which share genres,
+        countries, languages or persons are never stored concurrently and the
+        results are the same as updating them one by one.
+
+        :param list[uuid.UUID] movie_ids: movie ids to be updated.
+
+        :param dict counts: counts of results to be incremented.
+                            in the form of: {str result: int count}
+
+        :param int workers: number of worker threads.
+        """
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix='updater') as executor:
+            for movie_id in movie_ids:
+                plan = self._count(counts, self._prepare, movie_id, **options)
+                if plan is not None:
+                    pending.append(executor.submit(self._fetch_plan, plan))
+
+                # fetched plans are stored as soon as possible to keep a limited
+                # number of movies in memory and to not wait for all fetches.
+                while len(pending) > 0 and (pending[0].done() or
+                                            len(pending) >= workers * 2):
+                    self._store_fetched(pending.popleft(), counts, **options)
+
+            while len(pending) > 0:
+                self._store_fetched(pending.popleft(), counts, **options)
+
     def register_updater(self, instance, **options):
         """
         registers a new updater.
@@ -253,6 +598,8 @@ class UpdaterManager(Manager):
         previous_instances[instance.name] = instance
         self._set_next_handlers(previous_instances)
         self._updaters[instance.category] = previous_instances
+        with self._chain_lock:
+            self._ordered_updaters[instance.category] = tuple(previous_instances.values())
 
     def register_processor(self, instance, **options):
         """
@@ -295,6 +642,28 @@ class UpdaterManager(Manager):
         updaters = list(updaters.values())
         return updaters[0]
 
+    def get_stats(self):
+        """
+        gets the content search stats of all updaters.
+
+        updaters of each category are in the order that they are tried.
+
+        :returns: dict[str category: list[dict(str name: updater name,
+                                               int hits: number of searches which found data,
+                                               int misses: number of searches which found nothing,
+                                               int last_hit: sequence of the latest hit between
+                                                             all updaters, it is 0 if there
+                                                             is no hit yet)]]
+        :rtype: dict
+        """
+
+        result = dict()
+        for category in self._updaters.keys():
+            result[category] = [dict(name=item.name, **item.stats)
+                                for item in self._get_ordered_updaters(category)]
+
+        return result
+
     def get_processor(self, category, **options):
         """
         gets the update processor for given category.
@@ -391,129 +760,9 @@ class UpdaterManager(Manager):
         :rtype: bool
         """
 
-        content_rate = options.get('content_rate', True)
-        country = options.get('country', True)
-        genre = options.get('genre', True)
-        imdb_rate = options.get('imdb_rate', True)
-        language = options.get('language', True)
-        meta_score = options.get('meta_score', True)
-        movie_poster = options.get('movie_poster', True)
-        original_title = options.get('original_title', True)
-        production_year = options.get('production_year', True)
-        runtime = options.get('runtime', True)
-        storyline = options.get('storyline', True)
-        title = options.get('title', True)
-        actors = options.get('actors', True)
-        directors = options.get('directors', True)
-        force = options.get('force', False)
-        imdb_page = options.get('imdb_page')
-
-        movie_id = validator_services.validate_field(MovieEntity, MovieEntity.id,
-                                                     movie_id, nullable=False)
-
-        entity = movie_services.get(movie_id)
-        imdb_page = imdb_page or entity.imdb_page
-        full_title = movie_services.get_full_title(entity.title or entity.library_title,
-                                                   entity.production_year)
-
-        if imdb_page is None and \
-                self._needs_update(imdb_page, force, entity.modified_on) is True:
-            imdb_page = search_services.search(full_title, SearchCategoryEnum.MOVIE)
-
-        if imdb_page is None:
-            # we update 'imdb_page' to refresh 'modified_on' value.
-            store = get_current_store()
-            entity.update(imdb_page=imdb_page)
-            store.commit()
-            raise MovieIMDBPageNotFoundError(_('IMDb page for movie [{title}] could '
-                                               'not be found.').format(title=full_title))
-        else:
-            validator_services.validate_field(MovieEntity, MovieEntity.imdb_page,
-                                              imdb_page, nullable=False)
-
-        categories = []
-        if content_rate is True and self._needs_update(entity.content_rate_id,
-                                                       force, entity.modified_on):
-            categories.append(UpdaterCategoryEnum.CONTENT_RATE)
-
-        has_country = related_country_services.exists(movie_id) or None
-        if country is True and self._needs_update(has_country, force,
-                                                  entity.modified_on):
-            categories.append(UpdaterCategoryEnum.COUNTRY)
-
-        has_genre = related_genre_services.exists(movie_id) or None
-        if genre is True and self._needs_update(has_genre, force,
-                                                entity.modified_on):
-            categories.append(UpdaterCategoryEnum.GENRE)
-
-        if imdb_rate is True and self._needs_update(entity.imdb_rate, force,
-                                                    entity.modified_on):
-            categories.append(UpdaterCategoryEnum.IMDB_RATE)
-
-        has_language = related_language_services.exists(movie_id) or None
-        if language is True and self._needs_update(has_language, force,
-                                                   entity.modified_on):
-            categories.append(UpdaterCategoryEnum.LANGUAGE)
-
-        if meta_score is True and self._needs_update(entity.meta_score, force,
-                                                     entity.modified_on):
-            categories.append(UpdaterCategoryEnum.META_SCORE)
-
-        if movie_poster is True and self._needs_update(entity.poster_name, force,
-                                                       entity.modified_on):
-            categories.append(UpdaterCategoryEnum.POSTER_NAME)
-
-        if original_title is True and self._needs_update(entity.original_title, force,
-                                                         entity.modified_on):
-            categories.append(UpdaterCategoryEnum.ORIGINAL_TITLE)
-
-        if production_year is True and self._needs_update(entity.production_year, force,
-                                                          entity.modified_on):
-            categories.append(UpdaterCategoryEnum.PRODUCTION_YEAR)
-
-        if runtime is True and self._needs_update(entity.runtime, force,
-                                                  entity.modified_on):
-            categories.append(UpdaterCategoryEnum.RUNTIME)
-
-        if storyline is True and self._needs_update(entity.storyline, force,
-                                                    entity.modified_on):
-            categories.append(UpdaterCategoryEnum.STORYLINE)
-
-        if title is True and self._needs_update(entity.title, force,
-                                                entity.modified_on):
-            categories.append(UpdaterCategoryEnum.TITLE)
-
-        has_actor = related_actor_services.exists(movie_id) or None
-        if actors is True and self._needs_update(has_actor, force,
-                                                 entity.modified_on):
-            categories.append(UpdaterCategoryEnum.ACTORS)
-
-        has_director = related_director_services.exists(movie_id) or None
-        if directors is True and self._needs_update(has_director, force,
-                                                    entity.modified_on):
-            categories.append(UpdaterCategoryEnum.DIRECTORS)
-
-        # this code is to try to correct production year even if it has valid value.
-        # because it is possible that the production year extracted from library
-        # title be incorrect.
-        if production_year is True and len(categories) > 0 \
-                and UpdaterCategoryEnum.PRODUCTION_YEAR not in categories:
-            categories.append(UpdaterCategoryEnum.PRODUCTION_YEAR)
-
-        updated_fields = dict()
-        if len(categories) > 0:
-            updated_fields = self._fetch_all(imdb_page, *categories)
-            options.update(imdb_page=imdb_page)
-            updated_fields = self._process(entity.id, updated_fields, **options)
-
-        if imdb_page != entity.imdb_page:
-            updated_fields.update(imdb_page=imdb_page)
-
-        if len(updated_fields) > 0:
-            movie_services.update(entity.id, **updated_fields)
-            return True
-
-        return False
+        plan = self._prepare(movie_id, **options)
+        self._fetch_plan(plan)
+        return self._store(plan, **options)
 
     def update_all(self, **options):
         """
@@ -567,6 +816,10 @@ class UpdaterManager(Manager):
         :keyword bool force: force update data even if a category already
                              has valid data. defaults to False if not provided.
 
+        :keyword int workers: number of movies to be fetched concurrently.
+                              database is only accessed by current thread.
+                              defaults to `workers` config if not provided.
+
         :returns: dict(total: total processed movies count,
                        updated: updated movies count,
                        not_updated: not updated movies count,
@@ -588,22 +841,21 @@ class UpdaterManager(Manager):
                                      order_by='-created_time',
                                      **modified_on_criteria)
 
-        updated = 0
-        not_updated = 0
-        failed = 0
-        for item in movies:
-            try:
-                with atomic_context():
-                    result = self.update(item.id, **options)
-                    if result is True:
-                        updated += 1
-                    else:
-                        not_updated += 1
-            except Exception as error:
-                failed += 1
-                self.LOGGER.exception(str(error))
-
-        return dict(total=len(movies),
-                    updated=updated,
-                    not_updated=not_updated,
-                    failed=failed)
+        workers = options.pop('workers', None)
+        if workers is None:
+            workers = config_services.get('updater', 'general', 'workers')
+
+        workers = max(min(workers or 1, len(movies)), 1)
+        counts = dict(updated=0, not_updated=0, failed=0)
+        if workers == 1:
+            for item in movies:
+                result = self._count(counts, self.update, item.id, **options)
+                if result is True:
+                    counts['updated'] += 1
+                elif result is False:
+                    counts['not_updated'] += 1
+        else:
+            self._update_concurrently([item.id for item in movies], counts,
+                                      workers, **options)
+
+        return dict(total=len(movies), **counts)
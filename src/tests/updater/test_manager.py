@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+updater test_manager module.
+"""
+
+import random
+
+from threading import Thread, Lock
+
+from charma.updater.manager import UpdaterManager
+
+
+class FakeUpdater:
+    """
+    fake updater class.
+
+    its latest hit is random on each access, so
+    the order of updaters changes on each optimize.
+    """
+
+    def __init__(self, name, data):
+        """
+        initializes an instance of FakeUpdater.
+
+        :param str name: updater name.
+        :param object data: data to be fetched.
+        """
+
+        self.name = name
+        self._data = data
+
+    def fetch_single(self, content, **options):
+        """
+        fetches the data of this updater.
+        """
+
+        return self._data
+
+    @property
+    def stats(self):
+        """
+        gets the stats of this updater.
+
+        :rtype: dict
+        """
+
+        return dict(last_hit=random.randint(0, 1000))
+
+
+def create_manager(category, *updaters):
+    """
+    creates an updater manager with given updaters without loading the application.
+
+    :param str category: category of updaters.
+    :param FakeUpdater updaters: updaters to be tried in order.
+
+    :rtype: UpdaterManager
+    """
+
+    manager = UpdaterManager.__new__(UpdaterManager)
+    manager._updaters = {category: {item.name: item for item in updaters}}
+    manager._ordered_updaters = {category: tuple(updaters)}
+    manager._optimize_handlers = True
+    manager._chain_lock = Lock()
+    return manager
+
+
+def test_fetch_while_reordering():
+    """
+    fetches from many threads while updaters are reordered and
+    makes sure that no updater is skipped.
+    """
+
+    manager = create_manager('title', FakeUpdater('a', None),
+                             FakeUpdater('b', None), FakeUpdater('c', 'found'))
+    results = []
+    results_lock = Lock()
+
+    def fetch():
+        for index in range(500):
+            result = manager._fetch(None, 'title')
+            with results_lock:
+                results.append(result)
+
+    def reorder():
+        for index in range(2000):
+            manager._optimize('title')
+
+    threads = [Thread(target=fetch) for index in range(8)] + [Thread(target=reorder)]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4000
+    assert all(item == dict(title='found') for item in results)